@@ -0,0 +1,251 @@
+"""Amenity slot reservations
+
+An amenity takes reservations once it has ``slot_minutes`` and
+``slot_capacity``. Each day it is divided into consecutive slots from
+``opens_at`` (midnight when unset) and a slot must end by ``closes_at``.
+Slot times are the building's wall-clock time, compared against the
+server's local clock. Residents reserve one slot at a time, up to
+MAX_ADVANCE_DAYS ahead, and cannot hold overlapping slots.
+
+Capacity is enforced without reading or counting reservations.
+``amenity_slots`` keeps one counter row per (amenity, slot start) and a
+reservation claims a place with a compare-and-set UPDATE:
+
+    UPDATE amenity_slots SET reserved = reserved + 1
+    WHERE amenity_id = ? AND slot_start = ?
+      AND reserved < (SELECT slot_capacity FROM amenities WHERE id = ?)
+
+The counter row is created on demand with INSERT ... ON CONFLICT DO
+NOTHING. As in booking_workflow, the row lock taken by the UPDATE makes
+concurrent claims on Postgres re-check the predicate after each winner
+commits, and SQLite serializes writers, so a burst of requests for the
+last places cannot overfill a slot. A partial unique index keeps one
+confirmed reservation per resident and slot, and the overlap check is a
+range probe on (user_id, slot_start) bounded by MAX_SLOT_MINUTES.
+Cancelling flips the reservation with a guarded UPDATE and gives the
+place back in the same transaction.
+
+Changing an amenity's slot length applies to new slots; reservations
+already made keep theirs.
+"""
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from models import db, Amenity, AmenityReservation, AmenitySlot
+from booking_workflow import TransitionError
+
+MAX_ADVANCE_DAYS = 14
+MIN_SLOT_MINUTES = 15
+MAX_SLOT_MINUTES = 240
+MAX_SLOT_CAPACITY = 1000
+
+slots_table = AmenitySlot.__table__
+reservations_table = AmenityReservation.__table__
+amenities_table = Amenity.__table__
+
+
+class ReservationError(ValueError):
+    """Raised for malformed amenity settings or reservation parameters"""
+
+
+def _clock(value, name):
+    if value in (None, ''):
+        return None
+    try:
+        return time.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ReservationError(f"{name} must be a time of day (HH:MM)")
+
+
+def _whole(value, name, low, high):
+    if value in (None, ''):
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ReservationError(f"{name} must be a whole number from {low} to {high}")
+    return value
+
+
+def amenity_settings(data):
+    """Column values for the opening hours and slot settings present in a request body"""
+    values = {}
+    for name in ('opens_at', 'closes_at'):
+        if name in data:
+            values[name] = _clock(data[name], name)
+    if 'slot_minutes' in data:
+        values['slot_minutes'] = _whole(data['slot_minutes'], 'slot_minutes',
+                                        MIN_SLOT_MINUTES, MAX_SLOT_MINUTES)
+    if 'slot_capacity' in data:
+        values['slot_capacity'] = _whole(data['slot_capacity'], 'slot_capacity', 1, MAX_SLOT_CAPACITY)
+    return values
+
+
+def check_settings(amenity):
+    """Raise ReservationError unless the amenity's hours and slot settings fit together"""
+    if (amenity.opens_at is None) != (amenity.closes_at is None):
+        raise ReservationError('opens_at and closes_at must be set together')
+    if amenity.opens_at is not None and amenity.closes_at <= amenity.opens_at:
+        raise ReservationError('closes_at must be after opens_at')
+    if bool(amenity.slot_minutes) != bool(amenity.slot_capacity):
+        raise ReservationError('slot_minutes and slot_capacity must be set together')
+
+
+def opening_hours(amenity, day):
+    """(open, close) datetimes of the amenity on a day"""
+    if amenity.opens_at is None:
+        start = datetime.combine(day, time.min)
+        return start, start + timedelta(days=1)
+    return datetime.combine(day, amenity.opens_at), datetime.combine(day, amenity.closes_at)
+
+
+def slot_starts(amenity, day):
+    """Start datetimes of every slot of the amenity on a day"""
+    opens, closes = opening_hours(amenity, day)
+    length = timedelta(minutes=amenity.slot_minutes)
+    starts = []
+    start = opens
+    while start + length <= closes:
+        starts.append(start)
+        start += length
+    return starts
+
+
+def check_slot(amenity, slot_start, now):
+    """Return the end of the slot starting at slot_start, or raise TransitionError"""
+    length = timedelta(minutes=amenity.slot_minutes)
+    opens, closes = opening_hours(amenity, slot_start.date())
+    if slot_start < opens or slot_start + length > closes or (slot_start - opens) % length:
+        raise TransitionError('slot_start is not the start of one of the amenity\'s slots')
+    if slot_start < now:
+        raise TransitionError('Slot has already started')
+    if slot_start.date() > now.date() + timedelta(days=MAX_ADVANCE_DAYS):
+        raise TransitionError(f'Slots can be reserved at most {MAX_ADVANCE_DAYS} days ahead')
+    return slot_start + length
+
+
+def _ensure_slot_row(amenity_id, slot_start):
+    """Create the slot's counter row unless it exists"""
+    row = {'amenity_id': amenity_id, 'slot_start': slot_start, 'reserved': 0}
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        db.session.execute(insert(slots_table).values(**row).on_conflict_do_nothing())
+        return
+    exists = db.session.execute(
+        select(slots_table.c.reserved)
+        .where(slots_table.c.amenity_id == amenity_id, slots_table.c.slot_start == slot_start)
+    ).first()
+    if exists is None:
+        db.session.execute(slots_table.insert().values(**row))
+
+
+def _claim_place(amenity_id, slot_start):
+    """Take one place in a slot if any is left; returns whether this transaction won"""
+    capacity = select(amenities_table.c.slot_capacity).where(
+        amenities_table.c.id == amenity_id
+    ).scalar_subquery()
+    return db.session.execute(
+        update(slots_table)
+        .where(slots_table.c.amenity_id == amenity_id, slots_table.c.slot_start == slot_start,
+               slots_table.c.reserved < capacity)
+        .values(reserved=slots_table.c.reserved + 1)
+    ).rowcount == 1
+
+
+def _release_place(amenity_id, slot_start):
+    db.session.execute(
+        update(slots_table)
+        .where(slots_table.c.amenity_id == amenity_id, slots_table.c.slot_start == slot_start,
+               slots_table.c.reserved > 0)
+        .values(reserved=slots_table.c.reserved - 1)
+    )
+
+
+def reserve(user_id, amenity_id, slot_start, now=None):
+    """Reserve a place in an amenity slot; returns the reservation id. Caller commits."""
+    now = now or datetime.now()
+    amenity = db.session.get(Amenity, amenity_id)
+    if not amenity or not amenity.is_active:
+        raise TransitionError('Amenity not found', 404)
+    if not amenity.reservable:
+        raise TransitionError('Amenity does not take reservations', 400)
+    slot_end = check_slot(amenity, slot_start, now)
+
+    overlapping = db.session.execute(
+        select(reservations_table.c.id).where(
+            reservations_table.c.user_id == user_id,
+            reservations_table.c.slot_start > slot_start - timedelta(minutes=MAX_SLOT_MINUTES),
+            reservations_table.c.slot_start < slot_end,
+            reservations_table.c.slot_end > slot_start,
+            reservations_table.c.status == 'confirmed'
+        ).limit(1)
+    ).first()
+    if overlapping:
+        raise TransitionError('You already have a reservation overlapping this slot', 409)
+
+    _ensure_slot_row(amenity.id, slot_start)
+    if not _claim_place(amenity.id, slot_start):
+        raise TransitionError('Slot is full', 409)
+
+    reservation = AmenityReservation(amenity_id=amenity.id, user_id=user_id, slot_start=slot_start,
+                                     slot_end=slot_end, status='confirmed')
+    db.session.add(reservation)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # A concurrent request from the same resident took this slot first
+        raise TransitionError('You already have a reservation for this slot', 409)
+    return reservation.id
+
+
+def cancel(reservation_id, user_id, is_admin=False, now=None):
+    """Cancel a confirmed reservation and free its place. Caller commits."""
+    now = now or datetime.now()
+    reservation = db.session.get(AmenityReservation, reservation_id)
+    if not reservation:
+        raise TransitionError('Reservation not found', 404)
+    if not is_admin and reservation.user_id != user_id:
+        raise TransitionError('Unauthorized', 403)
+    if not is_admin and reservation.slot_start <= now:
+        raise TransitionError('Reservations cannot be cancelled once the slot has started')
+
+    cancelled = db.session.execute(
+        update(reservations_table)
+        .where(reservations_table.c.id == reservation_id, reservations_table.c.status == 'confirmed')
+        .values(status='cancelled', cancelled_at=datetime.utcnow())
+    ).rowcount
+    if not cancelled:
+        raise TransitionError('Reservation already cancelled')
+    _release_place(reservation.amenity_id, reservation.slot_start)
+    return reservation_id
+
+
+def day_slots(amenity, day):
+    """Every slot of the amenity on a day with its capacity and places left"""
+    starts = slot_starts(amenity, day)
+    if not starts:
+        return []
+    reserved = dict(db.session.execute(
+        select(slots_table.c.slot_start, slots_table.c.reserved).where(
+            slots_table.c.amenity_id == amenity.id,
+            slots_table.c.slot_start >= starts[0],
+            slots_table.c.slot_start <= starts[-1]
+        )
+    ).all())
+    length = timedelta(minutes=amenity.slot_minutes)
+    return [
+        {'start': start.isoformat(), 'end': (start + length).isoformat(),
+         'capacity': amenity.slot_capacity, 'reserved': reserved.get(start, 0),
+         'remaining': max(amenity.slot_capacity - reserved.get(start, 0), 0)}
+        for start in starts
+    ]
+
+
+def parse_day(value):
+    """The date in a ?date= parameter, defaulting to today"""
+    if not value:
+        return date.today()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ReservationError('date must be an ISO date (YYYY-MM-DD)')
@@ -3,15 +3,29 @@ from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import Config
 from models import db
+from cache import cache
+from authz import authz, admin_required
+from passwords import passwords
+from metrics import metrics
+import lease_jobs
+import migrations
 
 def create_app():
     """Application factory"""
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    if app.config['PRODUCTION'] and app.debug:
+        raise RuntimeError('FLASK_DEBUG must be off when FLASK_ENV/APP_ENV is production')
+    
     # Initialize extensions
     db.init_app(app)
+    cache.init_app(app)
     jwt = JWTManager(app)
+    authz.init_app(app, jwt)
+    passwords.init_app(app)
+    metrics.init_app(app)
+    lease_jobs.scheduler.init_app(app)
     CORS(app)
     
     # Register blueprints
@@ -19,27 +33,25 @@ def create_app():
     from routes.towers import towers_bp
     from routes.units import units_bp
     from routes.amenities import amenities_bp
+    from routes.reservations import reservations_bp
     from routes.bookings import bookings_bp
     from routes.leases import leases_bp
     from routes.payments import payments_bp
+    from routes.exports import exports_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(towers_bp, url_prefix='/api/towers')
     app.register_blueprint(units_bp, url_prefix='/api/units')
     app.register_blueprint(amenities_bp, url_prefix='/api/amenities')
+    app.register_blueprint(reservations_bp, url_prefix='/api/reservations')
     app.register_blueprint(bookings_bp, url_prefix='/api/bookings')
     app.register_blueprint(leases_bp, url_prefix='/api/leases')
     app.register_blueprint(payments_bp, url_prefix='/api/payments')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
     
-    # Create tables
-    with app.app_context():
-        try:
-            db.create_all()
-            print("✅ PostgreSQL database tables created successfully!")
-        except Exception as e:
-            print(f"❌ Database connection error: {e}")
-            print("Make sure PostgreSQL is running and accessible")
-            print("Run 'python setup_postgres.py' to set up the database")
+    # Schema changes are applied by `flask --app app db upgrade`, not at boot
+    app.cli.add_command(migrations.cli)
+    app.cli.add_command(lease_jobs.cli)
     
     @app.route('/')
     def index():
@@ -51,14 +63,30 @@ def create_app():
                 'towers': '/api/towers',
                 'units': '/api/units',
                 'amenities': '/api/amenities',
+                'reservations': '/api/reservations',
                 'bookings': '/api/bookings',
                 'leases': '/api/leases',
                 'payments': '/api/payments'
             }
         }
     
+    @app.route('/api/cache/stats')
+    @admin_required()
+    def cache_stats():
+        return cache.stats()
+    
     return app
 
+def check_schema(app):
+    """Refuse to serve unless the database is at the schema version this code expects"""
+    with app.app_context():
+        migrations.check(db.engine)
+
 if __name__ == '__main__':
+    # Development server only; production runs: gunicorn -c gunicorn.conf.py wsgi:app
     app = create_app()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    if app.config['PRODUCTION']:
+        raise SystemExit('Refusing to run the development server in production; '
+                         'use: gunicorn -c gunicorn.conf.py wsgi:app')
+    check_schema(app)
+    app.run(host='0.0.0.0', port=5000, debug=app.debug)
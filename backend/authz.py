@@ -0,0 +1,138 @@
+"""Shared authorization: role decorators, a user cache and token revocation
+
+Roles are read from the database rather than trusted from the JWT claim,
+but through an in-process cache: each user's row is snapshotted for
+``AUTHZ_USER_TTL`` seconds, so admin requests cost no extra query and a
+role change takes effect within that window. Changes made through the
+ORM in this process invalidate the entry immediately.
+
+Revocations live in the database, so every worker process sees them and
+they survive restarts: a revoked token id is a ``revoked_tokens`` row
+kept until the token expires, and revoking a user as a whole sets
+``users.tokens_revoked_at``, rejecting every token issued to them before
+that second. flask_jwt_extended's blocklist hook reads both through a
+per-process cache of ``AUTHZ_REVOCATION_TTL`` seconds, so a revocation
+made by another process takes effect within that window and one made by
+this process immediately.
+"""
+import time
+from datetime import datetime
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from sqlalchemy import delete, event, or_, select, update
+from cache import MemoryBackend
+from models import db, User, RevokedToken
+
+# Cached marker for a user id with no row, so deleted users are not re-queried
+_MISSING = False
+
+
+class Authorization:
+    """Flask extension holding the user cache and the revocation cache"""
+
+    def __init__(self):
+        self.users = MemoryBackend(1024)
+        self.ttl = 30
+        self.revocations = MemoryBackend(1024)
+        self.revocation_ttl = 5
+
+    def init_app(self, app, jwt):
+        self.users = MemoryBackend(app.config.get('AUTHZ_USER_CACHE_SIZE', 1024))
+        self.ttl = app.config.get('AUTHZ_USER_TTL', 30)
+        self.revocations = MemoryBackend(app.config.get('AUTHZ_USER_CACHE_SIZE', 1024))
+        self.revocation_ttl = app.config.get('AUTHZ_REVOCATION_TTL', 5)
+        jwt.token_in_blocklist_loader(self._is_revoked)
+        app.extensions['authz'] = self
+
+    def user(self, user_id):
+        """Cached to_dict() snapshot of a user, or None if it does not exist"""
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        snapshot = self.users.get(user_id)
+        if snapshot is None:
+            user = db.session.get(User, user_id)
+            snapshot = user.to_dict() if user else _MISSING
+            self.users.set(user_id, snapshot, self.ttl)
+        return snapshot or None
+
+    def invalidate(self, user_id):
+        self.users.delete(int(user_id))
+
+    def revoke_token(self, jti, user_id, expires_at):
+        """Reject a token id until its expiry (a unix timestamp). Caller commits."""
+        now = datetime.utcnow()
+        db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.session.merge(RevokedToken(
+            jti=jti, user_id=int(user_id), expires_at=datetime.utcfromtimestamp(expires_at), revoked_at=now
+        ))
+        self.revocations.delete(jti)
+
+    def revoke_user(self, user_id):
+        """Reject every token issued to a user before the current second. Caller commits.
+
+        Token ``iat`` claims are whole seconds, so a token issued later in
+        the same second (a login right after "log out everywhere") stays
+        valid; the caller revokes the current token by id.
+        """
+        revoked_at = datetime.utcfromtimestamp(int(time.time()))
+        db.session.execute(
+            update(User).where(User.id == int(user_id)).values(tokens_revoked_at=revoked_at)
+        )
+        # Cached answers for the user's other tokens are stale; revocations are rare
+        self.revocations.clear()
+        self.invalidate(user_id)
+
+    def _is_revoked(self, jwt_header, jwt_payload):
+        jti = jwt_payload.get('jti')
+        revoked = self.revocations.get(jti)
+        if revoked is None:
+            revoked = self._load_revoked(jti, jwt_payload.get('sub'), jwt_payload.get('iat', 0))
+            self.revocations.set(jti, revoked, self.revocation_ttl)
+        return revoked
+
+    def _load_revoked(self, jti, user_id, issued_at):
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            user_id = None
+        token_revoked = select(RevokedToken.jti).where(RevokedToken.jti == jti).exists()
+        user_revoked = select(User.id).where(
+            User.id == user_id, User.tokens_revoked_at > datetime.utcfromtimestamp(issued_at)
+        ).exists()
+        return bool(db.session.execute(select(or_(token_revoked, user_revoked))).scalar())
+
+
+authz = Authorization()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    authz.invalidate(target.id)
+
+
+def current_user():
+    """Cached snapshot of the user making the request, or None"""
+    return authz.user(get_jwt_identity())
+
+
+def current_role():
+    """Role of the user making the request according to the database"""
+    user = current_user()
+    return user['role'] if user else None
+
+
+def admin_required():
+    """Like jwt_required(), but also requires the admin role"""
+    def decorator(view):
+        @wraps(view)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            if current_role() != 'admin':
+                return jsonify({'error': 'Admin access required'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,139 @@
+"""Date-window availability of units
+
+A unit is available for a window of dates when, on every day of it:
+- it is not under maintenance
+- no active lease covers that day
+- no pending booking would cover it once approved, i.e. the day is not
+  within LEASE_TERM_DAYS of the booking's requested move-in date
+
+Approved bookings are represented by the leases they created, so a
+booking whose lease has since expired or been terminated no longer
+blocks its unit. Windows and lease dates are inclusive at both ends.
+
+Query parameters accepted by ``GET /api/units`` and ``/api/units/search``:
+
+- ``available_from``: first day of the window (ISO date)
+- ``available_to``: last day of the window; defaults to one lease term
+  after available_from
+
+Overlap checks are NOT EXISTS subqueries per unit, served by the partial
+indexes from migration 0007: (unit_id, start_date, end_date) over active
+leases and (unit_id, requested_move_in_date) over pending bookings. On
+Postgres, a GiST index over the active leases' daterange also lets the
+planner find the few leases overlapping a window and anti-join them.
+"""
+from datetime import date, timedelta
+from sqlalchemy import and_, exists, func
+from models import db, Unit, Booking, Lease
+from booking_workflow import LEASE_TERM_DAYS
+
+MAX_WINDOW_DAYS = 5 * 366
+
+
+class AvailabilityError(ValueError):
+    """Raised for malformed availability windows"""
+
+
+def _date(args, name):
+    raw = args.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise AvailabilityError(f"{name} must be a date (YYYY-MM-DD)")
+
+
+def parse_window(args, start_name='available_from', end_name='available_to'):
+    """(start, end) of the window in args, or None when no window is given"""
+    start = _date(args, start_name)
+    end = _date(args, end_name)
+    if start is None:
+        if end is not None:
+            raise AvailabilityError(f"{end_name} requires {start_name}")
+        return None
+    if end is None:
+        end = start + timedelta(days=LEASE_TERM_DAYS)
+    if end < start:
+        raise AvailabilityError(f"{end_name} cannot be before {start_name}")
+    if (end - start).days > MAX_WINDOW_DAYS:
+        raise AvailabilityError(f"Availability windows are limited to {MAX_WINDOW_DAYS} days")
+    return start, end
+
+
+def lease_overlaps(start, end):
+    """SQL predicate: an active lease covers a day of [start, end]"""
+    if db.engine.dialect.name == 'postgresql':
+        # Same expression as the GiST index, so the planner can use it
+        period = func.daterange(Lease.start_date, Lease.end_date, '[]')
+        return and_(Lease.status == 'active', period.op('&&')(func.daterange(start, end, '[]')))
+    return and_(Lease.status == 'active', Lease.start_date <= end, Lease.end_date >= start)
+
+
+def booking_overlaps(start, end):
+    """SQL predicate: a pending booking's lease term would cover a day of [start, end]"""
+    return and_(
+        Booking.status == 'pending',
+        Booking.requested_move_in_date <= end,
+        Booking.requested_move_in_date >= start - timedelta(days=LEASE_TERM_DAYS)
+    )
+
+
+def available_between(start, end):
+    """SQL predicate on units free for every day of [start, end]"""
+    return and_(
+        Unit.status != 'maintenance',
+        ~exists().where(Lease.unit_id == Unit.id, lease_overlaps(start, end)),
+        ~exists().where(Booking.unit_id == Unit.id, booking_overlaps(start, end))
+    )
+
+
+def filter_available(query, args):
+    """Restrict a query over units to the availability window in args, if any"""
+    window = parse_window(args)
+    if window is None:
+        return query
+    return query.filter(available_between(*window))
+
+
+def calendar(unit, start, end):
+    """Busy periods of a unit within [start, end] and the free gaps between them
+
+    Periods are clipped to the window and returned in date order as
+    dicts with ``start``/``end`` ISO dates; busy periods also carry their
+    ``kind``: lease, booking (pending) or maintenance.
+    """
+    if unit.status == 'maintenance':
+        busy = [(start, end, 'maintenance')]
+    else:
+        leases = db.session.query(Lease.start_date, Lease.end_date).filter(
+            Lease.unit_id == unit.id, lease_overlaps(start, end)
+        )
+        bookings = db.session.query(Booking.requested_move_in_date).filter(
+            Booking.unit_id == unit.id, booking_overlaps(start, end)
+        )
+        busy = [(max(first, start), min(last, end), 'lease') for first, last in leases]
+        busy += [
+            (max(move_in, start), min(move_in + timedelta(days=LEASE_TERM_DAYS), end), 'booking')
+            for move_in, in bookings
+        ]
+        busy.sort()
+
+    free = []
+    cursor = start
+    for first, last, _ in busy:
+        if first > cursor:
+            free.append((cursor, first - timedelta(days=1)))
+        cursor = max(cursor, last + timedelta(days=1))
+    if cursor <= end:
+        free.append((cursor, end))
+
+    return {
+        'unit_id': unit.id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'available': not busy,
+        'busy': [{'start': first.isoformat(), 'end': last.isoformat(), 'kind': kind}
+                 for first, last, kind in busy],
+        'free': [{'start': first.isoformat(), 'end': last.isoformat()} for first, last in free]
+    }
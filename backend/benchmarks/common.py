@@ -0,0 +1,43 @@
+"""Helpers shared by the benchmark scripts"""
+import json
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(samples):
+    """Request count and p50/p95/p99 latency in milliseconds"""
+    return {
+        'requests': len(samples),
+        'p50_ms': round(percentile(samples, 0.50) * 1000, 1) if samples else None,
+        'p95_ms': round(percentile(samples, 0.95) * 1000, 1) if samples else None,
+        'p99_ms': round(percentile(samples, 0.99) * 1000, 1) if samples else None
+    }
+
+
+def request(url, body=None, headers=None, method=None):
+    """Issue one HTTP request; returns (status, seconds). Bytes bodies are sent as-is."""
+    headers = dict(headers or {})
+    if isinstance(body, bytes):
+        data = body
+    else:
+        data = json.dumps(body).encode() if body is not None else None
+        if data:
+            headers['Content-Type'] = 'application/json'
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        error.read()
+        status = error.code
+    return status, time.perf_counter() - started
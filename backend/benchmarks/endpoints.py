@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark suite
+
+Boots create_app() against the database in DATABASE_URL, generates a
+synthetic portfolio with datagen.py when the database has no towers
+yet, serves the app on a local threaded server and drives every route
+in routes/ with concurrent clients, one endpoint at a time. For each
+endpoint it reports p50/p95/p99 latency, throughput and the number of
+SQL statements per request as JSON.
+
+Write endpoints get their targets (fresh units, pending bookings, refresh
+tokens, ...) inserted before the timed phase, so every request does the
+same work and succeeds. Run from the backend directory, e.g.:
+
+    export DATABASE_URL=sqlite:////tmp/rental_bench.db
+    flask --app app db upgrade
+    python -m benchmarks.endpoints --save benchmarks/baseline.json
+    python -m benchmarks.endpoints --baseline benchmarks/baseline.json
+
+The large portfolio from the capacity plan is --scale 40.
+
+Write endpoints add rows, so compare runs on identical data: seed once,
+then copy the database file (or ``createdb -T`` on Postgres) per run.
+With --baseline, the run exits 1 if any endpoint issues more queries per
+request than the baseline, its p95 grew by more than --tolerance, or it
+returned unexpected statuses. Query counts do not depend on the machine;
+latency does, so record the latency baseline on the host that is
+compared against it.
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from flask import g, has_request_context
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func, insert, select
+from werkzeug.serving import make_server
+
+from app import create_app, check_schema
+from models import db, User, Tower, Unit, Amenity, AmenityReservation, Booking, Lease, Payment
+import datagen
+import lease_jobs
+from refresh_tokens import issue_tokens
+from benchmarks.common import request, summarize
+
+PASSWORD = 'benchmark-password'
+
+# Cache expiry makes query counts drift by a few hundredths between runs;
+# an N+1 regression adds at least one query per request
+QUERY_SLACK = 0.1
+
+
+class Endpoint:
+    """One route under test
+
+    ``make(env, count)`` returns ``count`` (path, body) pairs; it runs
+    before the timing starts and may insert the rows the requests need.
+    """
+
+    def __init__(self, method, rule, make, role='admin', expect=200, share=1.0):
+        self.method = method
+        self.rule = rule
+        self.make = make
+        self.role = role
+        self.expect = expect
+        self.share = share
+
+    @property
+    def name(self):
+        return f'{self.method} {self.rule}'
+
+
+class Environment:
+    """Ids and tokens shared by the endpoint request factories"""
+
+    def __init__(self, app, seed):
+        self.app = app
+        self.rng = random.Random(seed)
+        with app.app_context():
+            # Seeded rows only, so rows written by earlier runs do not change the targets
+            self.tower_ids = self.ids(Tower.id, ~Tower.name.like('Bench%'))
+            self.unit_ids = self.ids(Unit.id, ~Unit.unit_number.like('%-%'))
+            self.amenity_ids = self.ids(Amenity.id, ~Amenity.name.like('Bench%'))
+            self.booking_ids = self.ids(Booking.id)
+            self.lease_ids = self.ids(Lease.id)
+            self.payment_ids = self.ids(Payment.id)
+
+            tag = uuid.uuid4().hex[:8]
+            admin = User(email=f'bench-admin-{tag}@example.com', name='Bench Admin', role='admin')
+            admin.set_password(PASSWORD)
+            db.session.add(admin)
+            db.session.commit()
+            self.admin_email = admin.email
+            self.admin_id = admin.id
+            # A seeded tenant with bookings and leases of their own
+            self.tenant_id = db.session.scalar(select(Lease.user_id).order_by(Lease.id).limit(1)) or admin.id
+            self.tokens = {
+                'admin': self.access_token(admin.id),
+                'user': self.access_token(self.tenant_id)
+            }
+
+    @staticmethod
+    def ids(column, *criteria, limit=5000):
+        return db.session.scalars(select(column).where(*criteria).order_by(column).limit(limit)).all()
+
+    def access_token(self, user_id):
+        user = db.session.get(User, user_id)
+        return create_access_token(identity=str(user.id),
+                                   additional_claims={'role': user.role, 'email': user.email})
+
+    def pick(self, ids):
+        return self.rng.choice(ids)
+
+    def paths(self, count, template, ids=None):
+        return [(template.format(id=self.pick(ids)) if ids else template, None) for _ in range(count)]
+
+    def new_units(self, count, status='available'):
+        """Insert fresh units in one statement; returns their ids"""
+        tower_id = self.tower_ids[0]
+        marker = uuid.uuid4().hex[:8]
+        db.session.execute(insert(Unit), [
+            {'tower_id': tower_id, 'unit_number': f'B-{marker}-{i}', 'floor': 1, 'bedrooms': 2,
+             'bathrooms': 1, 'size_sqft': 900, 'rent_amount': 25000.0, 'status': status,
+             'created_at': datetime.utcnow()}
+            for i in range(count)
+        ])
+        return db.session.scalars(
+            select(Unit.id).where(Unit.unit_number.like(f'B-{marker}-%')).order_by(Unit.id)
+        ).all()
+
+    def pending_bookings(self, count):
+        """One pending booking on its own fresh unit per request; returns booking ids"""
+        unit_ids = self.new_units(count)
+        db.session.execute(insert(Booking), [
+            {'user_id': self.tenant_id, 'unit_id': unit_id, 'requested_move_in_date': date(2025, 1, 1),
+             'status': 'pending', 'created_at': datetime.utcnow(), 'updated_at': datetime.utcnow()}
+            for unit_id in unit_ids
+        ])
+        return db.session.scalars(
+            select(Booking.id).where(Booking.unit_id.in_(unit_ids)).order_by(Booking.id)
+        ).all()
+
+    def reservable_amenity(self):
+        """A fresh amenity open all day with 15-minute slots of ample capacity; returns its id"""
+        return self.new_rows(Amenity, [
+            {'is_active': True, 'slot_minutes': 15, 'slot_capacity': 1000, 'created_at': datetime.utcnow()}
+        ])[0]
+
+    def slot_starts(self, count):
+        """Consecutive 15-minute slot starts from tomorrow, within the reservation window"""
+        first = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        return [first + timedelta(minutes=15 * i) for i in range(count)]
+
+    def confirmed_reservations(self, count):
+        """Confirmed tenant reservations on a fresh amenity; returns their ids"""
+        amenity_id = self.reservable_amenity()
+        starts = self.slot_starts(count)
+        db.session.execute(insert(AmenityReservation), [
+            {'amenity_id': amenity_id, 'user_id': self.tenant_id, 'slot_start': start,
+             'slot_end': start + timedelta(minutes=15), 'status': 'confirmed', 'created_at': datetime.utcnow()}
+            for start in starts
+        ])
+        return db.session.scalars(
+            select(AmenityReservation.id).where(AmenityReservation.amenity_id == amenity_id)
+            .order_by(AmenityReservation.id)
+        ).all()
+
+    def new_rows(self, model, rows):
+        """Insert rows of a model with a marker name; returns their ids"""
+        marker = uuid.uuid4().hex[:8]
+        for i, row in enumerate(rows):
+            row['name'] = f'Bench {marker} {i}'
+        db.session.execute(insert(model), rows)
+        return db.session.scalars(
+            select(model.id).where(model.name.like(f'Bench {marker} %')).order_by(model.id)
+        ).all()
+
+
+def _prepared(build):
+    """Run a request factory that writes rows inside an app context and commit them"""
+    def make(env, count):
+        with env.app.app_context():
+            requests = build(env, count)
+            db.session.commit()
+        return requests
+    return make
+
+
+def _tower_body(env, i):
+    return {'name': f'Bench Tower {i}', 'address': f'{i} Bench Road', 'total_floors': 10}
+
+
+def _unit_body(env, i):
+    return {'tower_id': env.pick(env.tower_ids), 'unit_number': f'N-{uuid.uuid4().hex[:10]}',
+            'floor': 3, 'bedrooms': 2, 'bathrooms': 1, 'size_sqft': 900, 'rent_amount': 25000}
+
+
+def _import_body(env, rows=20):
+    lines = ['tower_id,unit_number,floor,bedrooms,bathrooms,size_sqft,rent_amount']
+    for _ in range(rows):
+        lines.append(f'{env.pick(env.tower_ids)},I-{uuid.uuid4().hex[:10]},4,2,1,950,26000')
+    return ('\n'.join(lines) + '\n').encode()
+
+
+def _tokens(env, count):
+    tokens = []
+    for _ in range(count):
+        tokens.append(issue_tokens(db.session.get(User, env.admin_id)))
+    return tokens
+
+
+ENDPOINTS = [
+    # auth
+    Endpoint('POST', '/api/auth/register', lambda env, n: [
+        ('/api/auth/register', {'name': 'Bench', 'email': f'bench-{uuid.uuid4().hex}@example.com',
+                                'password': PASSWORD}) for _ in range(n)
+    ], role=None, expect=201, share=0.1),
+    Endpoint('POST', '/api/auth/login', lambda env, n: [
+        ('/api/auth/login', {'email': env.admin_email, 'password': PASSWORD}) for _ in range(n)
+    ], role=None, share=0.1),
+    Endpoint('POST', '/api/auth/refresh', _prepared(lambda env, n: [
+        ('/api/auth/refresh', None, tokens['refresh_token']) for tokens in _tokens(env, n)
+    ]), role=None),
+    Endpoint('GET', '/api/auth/me', lambda env, n: env.paths(n, '/api/auth/me'), role='user'),
+    Endpoint('POST', '/api/auth/logout', _prepared(lambda env, n: [
+        ('/api/auth/logout', {'refresh_token': tokens['refresh_token']}, tokens['access_token'])
+        for tokens in _tokens(env, n)
+    ]), role=None),
+    # towers
+    Endpoint('GET', '/api/towers', lambda env, n: env.paths(n, '/api/towers')),
+    Endpoint('GET', '/api/towers/<id>', lambda env, n: env.paths(n, '/api/towers/{id}', env.tower_ids)),
+    Endpoint('POST', '/api/towers', lambda env, n: [
+        ('/api/towers', _tower_body(env, i)) for i in range(n)
+    ], expect=201),
+    Endpoint('PUT', '/api/towers/<id>', lambda env, n: [
+        (f'/api/towers/{env.pick(env.tower_ids)}', {'total_floors': 20}) for _ in range(n)
+    ]),
+    Endpoint('DELETE', '/api/towers/<id>', _prepared(lambda env, n: [
+        (f'/api/towers/{tower_id}', None) for tower_id in env.new_rows(Tower, [
+            {'address': 'Bench Road', 'total_floors': 1, 'created_at': datetime.utcnow()} for _ in range(n)
+        ])
+    ])),
+    # units
+    Endpoint('GET', '/api/units', lambda env, n: [
+        (f'/api/units?tower_id={env.pick(env.tower_ids)}&limit=50', None) for _ in range(n)
+    ]),
+    Endpoint('GET', '/api/units/search', lambda env, n: [
+        (f'/api/units/search?status=available&rent_amount_min={rent}&rent_amount_max={rent + 10000}'
+         f'&sort=rent_amount&limit=20', None)
+        for rent in (env.rng.randrange(15000, 70000, 1000) for _ in range(n))
+    ]),
+    Endpoint('GET', '/api/units/<id>', lambda env, n: env.paths(n, '/api/units/{id}', env.unit_ids)),
+    Endpoint('GET', '/api/units/<id>/availability', lambda env, n: [
+        (f'/api/units/{env.pick(env.unit_ids)}/availability?from={start}&to={start + timedelta(days=365)}', None)
+        for start in (date.today() + timedelta(days=env.rng.randrange(0, 180)) for _ in range(n))
+    ]),
+    Endpoint('POST', '/api/units', lambda env, n: [
+        ('/api/units', _unit_body(env, i)) for i in range(n)
+    ], expect=201),
+    Endpoint('POST', '/api/units/import', lambda env, n: [
+        ('/api/units/import?format=csv', _import_body(env)) for _ in range(n)
+    ], expect=201, share=0.5),
+    Endpoint('PUT', '/api/units/<id>', _prepared(lambda env, n: [
+        (f'/api/units/{unit_id}', {'rent_amount': 27000}) for unit_id in env.new_units(n)
+    ])),
+    Endpoint('DELETE', '/api/units/<id>', _prepared(lambda env, n: [
+        (f'/api/units/{unit_id}', None) for unit_id in env.new_units(n)
+    ])),
+    # amenities
+    Endpoint('GET', '/api/amenities', lambda env, n: env.paths(n, '/api/amenities')),
+    Endpoint('GET', '/api/amenities/<id>', lambda env, n: env.paths(n, '/api/amenities/{id}', env.amenity_ids)),
+    Endpoint('POST', '/api/amenities', lambda env, n: [
+        ('/api/amenities', {'name': f'Bench {uuid.uuid4().hex[:8]}', 'availability_hours': '6-22'})
+        for _ in range(n)
+    ], expect=201),
+    Endpoint('PUT', '/api/amenities/<id>', lambda env, n: [
+        (f'/api/amenities/{env.pick(env.amenity_ids)}', {'availability_hours': '6-23'}) for _ in range(n)
+    ]),
+    Endpoint('DELETE', '/api/amenities/<id>', _prepared(lambda env, n: [
+        (f'/api/amenities/{amenity_id}', None) for amenity_id in env.new_rows(Amenity, [
+            {'is_active': True, 'created_at': datetime.utcnow()} for _ in range(n)
+        ])
+    ])),
+    Endpoint('GET', '/api/amenities/<id>/slots', _prepared(lambda env, n: [
+        (f'/api/amenities/{amenity_id}/slots?date={date.today() + timedelta(days=1)}', None)
+        for amenity_id in [env.reservable_amenity()] for _ in range(n)
+    ])),
+    # reservations
+    Endpoint('POST', '/api/reservations', _prepared(lambda env, n: [
+        ('/api/reservations', {'amenity_id': amenity_id, 'slot_start': start.isoformat()})
+        for amenity_id in [env.reservable_amenity()] for start in env.slot_starts(n)
+    ]), expect=201),
+    Endpoint('GET', '/api/reservations', lambda env, n: env.paths(n, '/api/reservations?limit=50')),
+    Endpoint('GET', '/api/reservations/<id>', _prepared(lambda env, n: [
+        (f'/api/reservations/{reservation_id}', None)
+        for reservation_id in env.rng.choices(env.confirmed_reservations(50), k=n)
+    ])),
+    Endpoint('PUT', '/api/reservations/<id>/cancel', _prepared(lambda env, n: [
+        (f'/api/reservations/{reservation_id}/cancel', None)
+        for reservation_id in env.confirmed_reservations(n)
+    ])),
+    # bookings
+    Endpoint('POST', '/api/bookings', _prepared(lambda env, n: [
+        ('/api/bookings', {'unit_id': unit_id, 'requested_move_in_date': '2025-06-01'})
+        for unit_id in env.new_units(n)
+    ]), role='user', expect=201),
+    Endpoint('GET', '/api/bookings', lambda env, n: env.paths(n, '/api/bookings?limit=50')),
+    Endpoint('GET', '/api/bookings (tenant)', lambda env, n: env.paths(n, '/api/bookings?limit=50'),
+             role='user'),
+    Endpoint('GET', '/api/bookings/<id>', lambda env, n: env.paths(n, '/api/bookings/{id}', env.booking_ids)),
+    Endpoint('PUT', '/api/bookings/<id>/approve', _prepared(lambda env, n: [
+        (f'/api/bookings/{booking_id}/approve', None) for booking_id in env.pending_bookings(n)
+    ])),
+    Endpoint('PUT', '/api/bookings/<id>/reject', _prepared(lambda env, n: [
+        (f'/api/bookings/{booking_id}/reject', {'comments': 'benchmark'})
+        for booking_id in env.pending_bookings(n)
+    ])),
+    Endpoint('POST', '/api/bookings/batch', _prepared(lambda env, n: [
+        ('/api/bookings/batch', {'decisions': [
+            {'booking_id': booking_id, 'decision': 'approve' if i % 2 else 'reject'}
+            for i, booking_id in enumerate(env.pending_bookings(10))
+        ]}) for _ in range(n)
+    ]), share=0.5),
+    # leases
+    Endpoint('GET', '/api/leases', lambda env, n: env.paths(n, '/api/leases?status=active&limit=50')),
+    Endpoint('GET', '/api/leases/<id>', lambda env, n: env.paths(n, '/api/leases/{id}', env.lease_ids)),
+    Endpoint('GET', '/api/leases/stats', lambda env, n: env.paths(n, '/api/leases/stats?by_tower=1')),
+    Endpoint('POST', '/api/leases/stats/rebuild', lambda env, n: env.paths(n, '/api/leases/stats/rebuild'),
+             share=0.1),
+    # The renewal job is idempotent, so each run sees the same offers
+    Endpoint('GET', '/api/leases/renewal-offers', _prepared(lambda env, n: (
+        lease_jobs.create_renewal_offers(), env.paths(n, '/api/leases/renewal-offers?limit=50')
+    )[1])),
+    # payments
+    Endpoint('POST', '/api/payments', lambda env, n: [
+        ('/api/payments', {'lease_id': env.pick(env.lease_ids), 'amount': 25000,
+                           'payment_date': '2025-02-01', 'payment_method': 'upi'}) for _ in range(n)
+    ], expect=201),
+    Endpoint('GET', '/api/payments', lambda env, n: [
+        (f'/api/payments?lease_id={env.pick(env.lease_ids)}&limit=50', None) for _ in range(n)
+    ]),
+    Endpoint('GET', '/api/payments/<id>', lambda env, n: env.paths(n, '/api/payments/{id}', env.payment_ids)),
+    Endpoint('GET', '/api/payments/ledger', lambda env, n: [
+        (f'/api/payments/ledger?tower_id={env.pick(env.tower_ids)}&as_of=2025-06-01', None) for _ in range(n)
+    ], share=0.25),
+    Endpoint('GET', '/api/payments/ledger (tenant)', lambda env, n: env.paths(n, '/api/payments/ledger'),
+             role='user'),
+    # exports
+    Endpoint('GET', '/api/exports/<dataset>', lambda env, n: [
+        (f'/api/exports/{dataset}?from=2024-03-01&to=2024-03-08', None)
+        for dataset in (env.rng.choice(['payments', 'leases', 'bookings']) for _ in range(n))
+    ], share=0.25),
+]
+
+
+def count_queries(app):
+    """Count requests served and SQL statements they issued; returns the live Counter"""
+    totals = Counter()
+    lock = threading.Lock()
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            g.benchmark_queries = g.get('benchmark_queries', 0) + 1
+
+    @app.teardown_request
+    def _record(exc):
+        # Runs after a streamed response finishes, so exports are counted in full
+        with lock:
+            totals['queries'] += g.get('benchmark_queries', 0)
+            totals['requests'] += 1
+
+    return totals
+
+
+def run_endpoint(base, endpoint, requests, tokens, clients):
+    """Send the prepared requests with concurrent clients; returns (samples, statuses, seconds)"""
+    pending = list(requests)
+    lock = threading.Lock()
+    samples = []
+    statuses = Counter()
+
+    def client():
+        while True:
+            with lock:
+                if not pending:
+                    return
+                item = pending.pop()
+            path, body = item[0], item[1]
+            token = item[2] if len(item) > 2 else tokens.get(endpoint.role)
+            headers = {'Authorization': f'Bearer {token}'} if token else {}
+            if isinstance(body, bytes):
+                headers['Content-Type'] = 'text/csv'
+            status, seconds = request(base + path, body, headers, method=endpoint.method)
+            with lock:
+                statuses[status] += 1
+                if status == endpoint.expect:
+                    samples.append(seconds)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, statuses, time.perf_counter() - started
+
+
+def compare(report, baseline, tolerance):
+    """Regressions of report against baseline, as human-readable strings"""
+    regressions = []
+    for name, result in report['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        if (result['queries_per_request'] or 0) > (before['queries_per_request'] or 0) + QUERY_SLACK:
+            regressions.append(f"{name}: {result['queries_per_request']} queries per request "
+                               f"(baseline {before['queries_per_request']})")
+        if result['p95_ms'] and before['p95_ms'] and result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms (baseline {before['p95_ms']} ms)")
+        if result['errors']:
+            regressions.append(f"{name}: unexpected statuses {result['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=2, help='datagen scale factor for an empty database')
+    parser.add_argument('--requests', type=int, default=200, help='requests per endpoint')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent clients per endpoint')
+    parser.add_argument('--only', help='run endpoints whose name contains this text')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for the data and request targets')
+    parser.add_argument('--save', help='write the JSON report to this file')
+    parser.add_argument('--baseline', help='compare against a saved report; exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='allowed p95 growth (1.0 = twice as slow)')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    with app.app_context():
+        if not db.session.query(Tower.id).first():
+            datagen.generate(args.scale, args.seed)
+        rows = {model.__tablename__: db.session.query(func.count(model.id)).scalar()
+                for model in (Tower, Unit, User, Booking, Lease, Payment)}
+    totals = count_queries(app)
+    env = Environment(app, args.seed)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    results = {}
+    for endpoint in ENDPOINTS:
+        if args.only and args.only not in endpoint.name:
+            continue
+        count = max(1, int(args.requests * endpoint.share))
+        requests = endpoint.make(env, count)
+        before = dict(totals)
+        samples, statuses, seconds = run_endpoint(base, endpoint, requests, env.tokens, args.clients)
+        served = totals['requests'] - before.get('requests', 0)
+        issued = totals['queries'] - before.get('queries', 0)
+        results[endpoint.name] = {
+            **summarize(samples),
+            'requests_per_second': round(len(requests) / seconds, 1),
+            'queries_per_request': round(issued / served, 2) if served else None,
+            'errors': {str(status): n for status, n in statuses.items() if status != endpoint.expect}
+        }
+        print(f"{endpoint.name:40} p95 {results[endpoint.name]['p95_ms']} ms, "
+              f"{results[endpoint.name]['queries_per_request']} queries", file=sys.stderr)
+    server.shutdown()
+
+    report = {
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+        'rows': rows,
+        'clients': args.clients,
+        'requests_per_endpoint': args.requests,
+        'endpoints': results
+    }
+    print(json.dumps(report, indent=2))
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(report, handle, indent=2)
+            handle.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get('rows') != rows:
+            print(f"Note: baseline was recorded with {baseline.get('rows')} rows", file=sys.stderr)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
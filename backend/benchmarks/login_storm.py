@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark
+
+Serves the app on a local threaded server and measures the latency of an
+ordinary API read while many clients log in at once. The probe runs
+alone first (baseline), then alongside the login storm. Run it once with
+the process pool and once with --inline (hashing on the request threads)
+to compare, e.g. from the backend directory:
+
+    DATABASE_URL=sqlite:////tmp/rental_bench.db python -m benchmarks.login_storm
+    DATABASE_URL=sqlite:////tmp/rental_bench.db python -m benchmarks.login_storm --inline
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+import uuid
+
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from app import create_app, check_schema
+from models import db, User
+from passwords import passwords
+from benchmarks.common import request, summarize
+
+PROBE_PATH = '/api/units/search?status=available&sort=-rent_amount&limit=20'
+
+
+def probe(base, token, stop, samples):
+    headers = {'Authorization': f'Bearer {token}'}
+    while not stop.is_set():
+        status, seconds = request(base + PROBE_PATH, headers=headers)
+        if status == 200:
+            samples.append(seconds)
+
+
+def storm(base, email, password, stop, outcomes, lock):
+    while not stop.is_set():
+        status, _ = request(base + '/api/auth/login', {'email': email, 'password': password})
+        with lock:
+            outcomes[status] = outcomes.get(status, 0) + 1
+
+
+def phase(base, token, seconds, login_clients=0, credentials=None):
+    """Run the probe (and optionally the storm) for a number of seconds"""
+    stop = threading.Event()
+    samples, outcomes, lock = [], {}, threading.Lock()
+    threads = [threading.Thread(target=probe, args=(base, token, stop, samples))]
+    threads += [
+        threading.Thread(target=storm, args=(base, *credentials, stop, outcomes, lock))
+        for _ in range(login_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    result = {'probe': summarize(samples)}
+    if login_clients:
+        result['logins'] = {
+            'ok_per_second': round(outcomes.get(200, 0) / seconds, 1),
+            'rejected_503': outcomes.get(503, 0),
+            'statuses': {str(code): count for code, count in sorted(outcomes.items())}
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--inline', action='store_true', help='hash on request threads (no pool)')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    if args.inline:
+        app.config['PASSWORD_HASH_WORKERS'] = 0
+        passwords.init_app(app)
+
+    password = uuid.uuid4().hex
+    with app.app_context():
+        admin = User(email=f'storm-{password[:8]}@example.com', name='Storm', role='admin')
+        admin.set_password(password)
+        db.session.add(admin)
+        db.session.commit()
+        token = create_access_token(identity=str(admin.id), additional_claims={'role': 'admin'})
+        credentials = (admin.email, password)
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+
+    mode = 'inline' if args.inline else f'pool of {passwords.workers}'
+    print(f"Hashing: {passwords.method} ({mode}), {args.clients} login clients, {args.seconds}s per phase")
+    report = {
+        'hash_method': passwords.method,
+        'hash_workers': passwords.workers,
+        'login_clients': args.clients,
+        'baseline': phase(base, token, args.seconds),
+        'storm': phase(base, token, args.seconds, args.clients, credentials)
+    }
+    server.shutdown()
+    passwords.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Serialization micro-benchmark
+
+Compares the two ways a list endpoint can turn rows into a response body,
+for a page of each model:
+
+- ``to_dict``: load ORM objects with the model's list loading profile,
+  call ``to_dict()`` on each and encode with ``jsonify``
+- ``schema``: select only the response's columns with the model's
+  serializers Schema, ``dump`` the rows and encode with ``json_response``
+- ``sparse``: the same for a small ``?fields=`` selection, as a mobile
+  list view would request
+
+Each case is timed end to end (query, objects or rows, dicts, encoding)
+and for encoding alone, and the two bodies are checked to be identical.
+Reports the median milliseconds per page as JSON. Run from the backend
+directory against a seeded database, e.g.:
+
+    export DATABASE_URL=sqlite:////tmp/rental_bench.db
+    python -m benchmarks.serialization --rows 500
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from flask import jsonify
+from werkzeug.datastructures import MultiDict
+
+from app import create_app, check_schema
+from models import db, EMPTY_UNIT_COUNTS, Tower, Unit, Amenity, Booking, Lease, Payment
+from routes.towers import serialize_towers
+from serializers import (json_response, unit_schema, tower_schema, amenity_schema,
+                         booking_schema, lease_schema, payment_schema)
+
+
+def towers_to_dict(towers):
+    """Tower dicts the way the towers list built them before schemas"""
+    counts = Tower.unit_counts([tower.id for tower in towers])
+    return [tower.to_dict(unit_counts=counts.get(tower.id, EMPTY_UNIT_COUNTS)) for tower in towers]
+
+
+# name -> (model, schema, dict builder for ORM objects, dict builder for schema rows, sparse fields)
+CASES = {
+    'units': (Unit, unit_schema, None, None, 'id,unit_number,rent_amount,status'),
+    'towers': (Tower, tower_schema, towers_to_dict, serialize_towers, 'id,name'),
+    'amenities': (Amenity, amenity_schema, None, None, 'id,name'),
+    'bookings': (Booking, booking_schema, None, None, 'id,unit_number,status'),
+    'leases': (Lease, lease_schema, None, None, 'id,end_date,status'),
+    'payments': (Payment, payment_schema, None, None, 'id,amount,payment_date'),
+}
+
+
+def legacy_page(model, rows, to_dicts):
+    query = model.query_with('list') if hasattr(model, 'query_with') else model.query
+    objects = query.order_by(model.id).limit(rows).all()
+    dicts = to_dicts(objects) if to_dicts else [obj.to_dict() for obj in objects]
+    return jsonify(dicts).get_data()
+
+
+def schema_page(model, view, rows, dump):
+    result = view.query().order_by(model.id).limit(rows).all()
+    dicts = dump(result, view) if dump else view.dump(result)
+    return json_response(dicts).get_data()
+
+
+def timed(function, repeat):
+    """Median seconds per call, after one warm-up call"""
+    function()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+        # Release the identity map so every ORM run builds fresh objects
+        db.session.expunge_all()
+    return statistics.median(samples)
+
+
+def run_case(model, schema, to_dicts, dump, fields, rows, repeat):
+    legacy_body = legacy_page(model, rows, to_dicts)
+    db.session.expunge_all()
+    schema_body = schema_page(model, schema.default, rows, dump)
+    dicts = json.loads(schema_body)
+    sparse_view = schema.view(MultiDict({'fields': fields}))
+
+    legacy = timed(lambda: legacy_page(model, rows, to_dicts), repeat)
+    fast = timed(lambda: schema_page(model, schema.default, rows, dump), repeat)
+    sparse = timed(lambda: schema_page(model, sparse_view, rows, dump), repeat)
+    encode_legacy = timed(lambda: jsonify(dicts).get_data(), repeat)
+    encode_fast = timed(lambda: json_response(dicts).get_data(), repeat)
+    return {
+        'rows': len(dicts),
+        'identical': legacy_body == schema_body,
+        'to_dict_ms': round(legacy * 1000, 2),
+        'schema_ms': round(fast * 1000, 2),
+        'speedup': round(legacy / fast, 2) if fast else None,
+        'sparse_fields': fields,
+        'sparse_ms': round(sparse * 1000, 2),
+        'sparse_bytes': len(schema_page(model, sparse_view, rows, dump)),
+        'full_bytes': len(schema_body),
+        'jsonify_encode_ms': round(encode_legacy * 1000, 2),
+        'fast_encode_ms': round(encode_fast * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500, help='rows per page')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per case')
+    parser.add_argument('--only', help='run cases whose name contains this text')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    results = {}
+    with app.test_request_context():
+        for name, (model, schema, to_dicts, dump, fields) in CASES.items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = run_case(model, schema, to_dicts, dump, fields, args.rows, args.repeat)
+            result = results[name]
+            print(f"{name:10} {result['rows']:5} rows: to_dict {result['to_dict_ms']} ms, "
+                  f"schema {result['schema_ms']} ms ({result['speedup']}x), "
+                  f"sparse {result['sparse_ms']} ms, identical={result['identical']}", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+    if not all(result['identical'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Read-throughput benchmark against a running server
+
+Logs in as an admin, then runs concurrent clients that cycle through the
+main read endpoints for a fixed time, and reports requests per second
+plus per-endpoint latency percentiles. Start the server the way it runs
+in production, then point the benchmark at it, e.g. from backend/:
+
+    gunicorn -c gunicorn.conf.py wsgi:app &
+    python -m benchmarks.throughput --url http://127.0.0.1:5000 \\
+        --email admin@rental.com --password admin123 --clients 32
+"""
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+from benchmarks.common import request, summarize
+
+ENDPOINTS = [
+    '/api/towers',
+    '/api/units?limit=50',
+    '/api/units/search?status=available&sort=rent_amount&limit=20',
+    '/api/amenities',
+    '/api/bookings?limit=50',
+    '/api/leases?limit=50',
+    '/api/payments?limit=50',
+    '/api/leases/stats',
+]
+
+
+def login(base, email, password):
+    body = json.dumps({'email': email, 'password': password}).encode()
+    req = urllib.request.Request(base + '/api/auth/login', data=body,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req, timeout=60) as response:
+        return json.loads(response.read())['access_token']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--email', default='admin@rental.com')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=15)
+    args = parser.parse_args()
+
+    base = args.url.rstrip('/')
+    headers = {'Authorization': f'Bearer {login(base, args.email, args.password)}'}
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(offset):
+        position = offset
+        while not stop.is_set():
+            path = ENDPOINTS[position % len(ENDPOINTS)]
+            position += 1
+            status, seconds = request(base + path, headers=headers)
+            with lock:
+                if status == 200:
+                    samples[path].append(seconds)
+                else:
+                    errors[f'{path} {status}'] += 1
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in samples.values())
+    print(json.dumps({
+        'url': base,
+        'clients': args.clients,
+        'seconds': round(elapsed, 1),
+        'requests_per_second': round(total / elapsed, 1),
+        'overall': summarize([value for values in samples.values() for value in values]),
+        'endpoints': {path: summarize(samples[path]) for path in ENDPOINTS},
+        'errors': dict(errors)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
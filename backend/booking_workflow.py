@@ -0,0 +1,290 @@
+"""Booking approval/rejection shared by the single and batch endpoints
+
+State transitions are concurrency-safe without relying on the isolation
+level. Every status change is a compare-and-set UPDATE, for example
+``... WHERE id IN (...) AND status = 'pending'``, and the affected row
+count shows whether this transaction won. On Postgres the row lock taken
+by the UPDATE makes a competing transaction re-check the predicate after
+the winner commits; on SQLite writers are serialized by the database
+lock. Once a unit is claimed, the other pending bookings for it are
+rejected in the same transaction. Lock and serialization conflicts are
+retried a bounded number of times by ``run_transaction``.
+
+A batch is processed in one transaction:
+- bookings and their units are loaded with one joined query
+- each decision is validated in Python, in request order
+- leases are created with one executemany INSERT ... RETURNING
+- booking and unit statuses are changed with set-based UPDATEs
+- lease counters are updated with one batched upsert
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm.exc import StaleDataError
+from models import db, Booking, Unit, Lease
+import lease_stats
+
+LEASE_TERM_DAYS = 365
+DEPOSIT_MONTHS = 2
+DECISIONS = ('approve', 'reject')
+MAX_BATCH_SIZE = 500
+AUTO_REJECT_COMMENT = 'Unit has been leased to another applicant'
+
+MAX_ATTEMPTS = 4
+RETRY_BACKOFF_SECONDS = 0.05
+
+# Postgres serialization failure, deadlock and lock-not-available codes
+RETRYABLE_PGCODES = ('40001', '40P01', '55P03')
+
+bookings_table = Booking.__table__
+units_table = Unit.__table__
+leases_table = Lease.__table__
+
+
+class BatchError(ValueError):
+    """Raised when the batch request itself is malformed"""
+
+
+class TransitionError(Exception):
+    """A booking transition that cannot be applied, with its HTTP status"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ConcurrentUpdateError(Exception):
+    """Rows changed between being read and being updated; safe to retry"""
+
+
+def is_conflict(error):
+    """Whether an exception is a transient concurrency conflict"""
+    if isinstance(error, (StaleDataError, ConcurrentUpdateError)):
+        return True
+    if isinstance(error, DBAPIError):
+        if getattr(error.orig, 'pgcode', None) in RETRYABLE_PGCODES:
+            return True
+        return 'database is locked' in str(error.orig)
+    return False
+
+
+def run_transaction(operation, attempts=MAX_ATTEMPTS):
+    """Run operation() and commit, retrying on concurrency conflicts"""
+    for attempt in range(1, attempts + 1):
+        try:
+            result = operation()
+            db.session.commit()
+            return result
+        except Exception as error:
+            db.session.rollback()
+            if attempt == attempts or not is_conflict(error):
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt * (0.5 + random.random()))
+
+
+def lease_values(booking, unit):
+    """Column values for the lease created when a booking is approved"""
+    return {
+        'booking_id': booking.id,
+        'user_id': booking.user_id,
+        'unit_id': booking.unit_id,
+        'start_date': booking.requested_move_in_date,
+        'end_date': booking.requested_move_in_date + timedelta(days=LEASE_TERM_DAYS),
+        'monthly_rent': unit.rent_amount,
+        'security_deposit': unit.rent_amount * DEPOSIT_MONTHS,
+        'status': 'active'
+    }
+
+
+def _claim_bookings(booking_ids, status, now, comments=None):
+    """Move pending bookings to status; returns the number of rows won"""
+    values = {'status': status, 'updated_at': now, 'version': bookings_table.c.version + 1}
+    if comments is not None:
+        values['admin_comments'] = comments
+    return db.session.execute(
+        update(bookings_table)
+        .where(bookings_table.c.id.in_(booking_ids), bookings_table.c.status == 'pending')
+        .values(**values)
+    ).rowcount
+
+
+def _claim_units(unit_ids):
+    """Mark available units occupied; returns the number of rows won"""
+    return db.session.execute(
+        update(units_table)
+        .where(units_table.c.id.in_(unit_ids), units_table.c.status == 'available')
+        .values(status='occupied', version=units_table.c.version + 1)
+    ).rowcount
+
+
+def _reject_competing(unit_ids, now):
+    """Reject the remaining pending bookings for units that were just leased"""
+    return db.session.execute(
+        update(bookings_table)
+        .where(bookings_table.c.unit_id.in_(unit_ids), bookings_table.c.status == 'pending')
+        .values(status='rejected', admin_comments=AUTO_REJECT_COMMENT, updated_at=now,
+                version=bookings_table.c.version + 1)
+    ).rowcount
+
+
+def create(user_id, unit_id, move_in_date):
+    """Create a pending booking for an available unit; returns its id. Caller commits."""
+    if not db.session.get(Unit, unit_id):
+        raise TransitionError('Unit not found', 404)
+
+    # A guarded write rather than a read: it takes the unit's row lock, so an
+    # approval committing concurrently either sees this booking and rejects
+    # it, or has already occupied the unit and this update matches no row
+    locked = db.session.execute(
+        update(units_table)
+        .where(units_table.c.id == unit_id, units_table.c.status == 'available')
+        .values(version=units_table.c.version + 1)
+    ).rowcount
+    if not locked:
+        raise TransitionError('Unit is not available', 400)
+
+    booking = Booking(user_id=user_id, unit_id=unit_id, requested_move_in_date=move_in_date,
+                      status='pending')
+    db.session.add(booking)
+    db.session.flush()
+    return booking.id
+
+
+def approve(booking_id):
+    """Approve one booking; returns (booking_id, lease_id). Caller commits."""
+    booking = Booking.query.get(booking_id)
+    if not booking:
+        raise TransitionError('Booking not found', 404)
+    if booking.status != 'pending':
+        raise TransitionError('Booking already processed', 400)
+    unit = booking.unit
+    now = datetime.utcnow()
+
+    if not _claim_bookings([booking.id], 'approved', now):
+        raise TransitionError('Booking already processed', 400)
+    if not _claim_units([unit.id]):
+        raise TransitionError('Unit is not available', 409)
+
+    lease = Lease(**lease_values(booking, unit))
+    db.session.add(lease)
+    db.session.flush()
+
+    _reject_competing([unit.id], now)
+    lease_stats.record_transition(
+        unit.tower_id, None, 'active', lease.monthly_rent, lease.security_deposit
+    )
+    return booking.id, lease.id
+
+
+def reject(booking_id, comments):
+    """Reject one pending booking. Caller commits."""
+    booking = Booking.query.get(booking_id)
+    if not booking:
+        raise TransitionError('Booking not found', 404)
+    if not _claim_bookings([booking.id], 'rejected', datetime.utcnow(), comments=comments):
+        raise TransitionError('Booking already processed', 400)
+    return booking.id
+
+
+def parse_decisions(data):
+    """Validate the request body shape; returns the list of decisions"""
+    decisions = (data or {}).get('decisions')
+    if not isinstance(decisions, list) or not decisions:
+        raise BatchError('decisions must be a non-empty list')
+    if len(decisions) > MAX_BATCH_SIZE:
+        raise BatchError(f'At most {MAX_BATCH_SIZE} decisions per batch')
+    for item in decisions:
+        if not isinstance(item, dict):
+            raise BatchError('Each decision must be an object')
+    return decisions
+
+
+def process_batch(decisions):
+    """Apply approve/reject decisions; returns (per-item results, units_changed)
+
+    Raises ConcurrentUpdateError if another transaction changed a booking
+    or unit after it was loaded, so run_transaction re-runs the batch
+    against fresh state. The caller commits.
+    """
+    booking_ids = [item.get('booking_id') for item in decisions if isinstance(item.get('booking_id'), int)]
+    loaded = {
+        booking.id: (booking, unit)
+        for booking, unit in db.session.query(Booking, Unit)
+        .join(Unit, Unit.id == Booking.unit_id)
+        .filter(Booking.id.in_(booking_ids))
+    }
+
+    now = datetime.utcnow()
+    results = []
+    seen = set()
+    claimed_units = set()
+    approvals = []
+    rejections = {}
+
+    for item in decisions:
+        booking_id = item.get('booking_id')
+        decision = item.get('decision')
+        result = {'booking_id': booking_id, 'decision': decision}
+        results.append(result)
+
+        error = None
+        if decision not in DECISIONS:
+            error = f"decision must be one of: {', '.join(DECISIONS)}"
+        elif booking_id not in loaded:
+            error = 'Booking not found'
+        elif booking_id in seen:
+            error = 'Duplicate booking in batch'
+        else:
+            booking, unit = loaded[booking_id]
+            if booking.status != 'pending':
+                error = 'Booking already processed'
+            elif decision == 'approve' and (unit.status != 'available' or unit.id in claimed_units):
+                error = 'Unit is not available'
+
+        if error:
+            result.update(status='error', error=error)
+            continue
+
+        seen.add(booking_id)
+        if decision == 'approve':
+            claimed_units.add(unit.id)
+            approvals.append((booking, unit))
+            result['status'] = 'approved'
+        else:
+            rejections[booking_id] = item.get('comments', '')
+            result['status'] = 'rejected'
+
+    if rejections:
+        comments = case(rejections, value=bookings_table.c.id)
+        if _claim_bookings(list(rejections), 'rejected', now, comments=comments) != len(rejections):
+            raise ConcurrentUpdateError('Bookings changed during batch')
+
+    if approvals:
+        if _claim_bookings([booking.id for booking, _ in approvals], 'approved', now) != len(approvals):
+            raise ConcurrentUpdateError('Bookings changed during batch')
+        unit_ids = [unit.id for _, unit in approvals]
+        if _claim_units(unit_ids) != len(approvals):
+            raise ConcurrentUpdateError('Units changed during batch')
+        _reject_competing(unit_ids, now)
+
+        lease_rows = [dict(lease_values(booking, unit), created_at=now) for booking, unit in approvals]
+        created = db.session.execute(
+            insert(leases_table).returning(leases_table.c.id, leases_table.c.booking_id),
+            lease_rows
+        )
+        lease_ids = {booking_id: lease_id for lease_id, booking_id in created}
+
+        deltas = lease_stats.LeaseDeltas()
+        for booking, unit in approvals:
+            deltas.transition(
+                unit.tower_id, None, 'active', unit.rent_amount, unit.rent_amount * DEPOSIT_MONTHS
+            )
+        lease_stats.apply_deltas(deltas)
+
+        for result in results:
+            if result.get('status') == 'approved':
+                result['lease_id'] = lease_ids.get(result['booking_id'])
+
+    return results, bool(approvals)
@@ -0,0 +1,237 @@
+"""Server-side response cache for public catalog endpoints
+
+Cached GET responses are keyed on the namespace, the namespace's current
+generation, the request path and the normalized query string. Writes call
+``cache.invalidate(namespace)``, which bumps the generation so every
+existing entry for that namespace is skipped and later ages out through
+TTL/LRU eviction.
+
+Backends:
+- ``memory``: per-process LRU dict (default)
+- ``sqlite``: a local SQLite file shared by all workers on the host
+- ``none``: caching disabled
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+
+
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def generation(self, namespace):
+        return self._generations.get(namespace, 0)
+
+    def bump_generation(self, namespace):
+        with self._lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """LRU store in a local SQLite file, shared across worker processes"""
+
+    # Check the entry count on every Nth write rather than every write
+    EVICT_EVERY = 64
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at '
+                'ON cache_entries (accessed_at)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_generations ('
+                'namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL)'
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < now:
+            conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+        return bytes(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?)', (key, value, now + ttl, now)
+        )
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM cache_entries WHERE expires_at < ?', (time.time(),))
+        excess = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key IN ('
+                'SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)', (excess,)
+            )
+
+    def generation(self, namespace):
+        row = self._connect().execute(
+            'SELECT generation FROM cache_generations WHERE namespace = ?', (namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def bump_generation(self, namespace):
+        self._connect().execute(
+            'INSERT INTO cache_generations (namespace, generation) VALUES (?, 1) '
+            'ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1',
+            (namespace,)
+        )
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache_entries')
+
+
+class ResponseCache:
+    """Flask extension caching JSON GET responses per namespace"""
+
+    def __init__(self):
+        self.backend = None
+        self.default_ttl = 60
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config.get('CACHE_BACKEND', 'memory')
+        max_entries = app.config.get('CACHE_MAX_ENTRIES', 1024)
+        self.default_ttl = app.config.get('CACHE_DEFAULT_TTL', 60)
+
+        if backend == 'memory':
+            self.backend = MemoryBackend(max_entries)
+        elif backend == 'sqlite':
+            path = app.config.get('CACHE_SQLITE_PATH') or os.path.join(
+                tempfile.gettempdir(), 'rental_portal_cache.sqlite3'
+            )
+            self.backend = SQLiteBackend(path, max_entries)
+        elif backend == 'none':
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown CACHE_BACKEND '{backend}'")
+        app.extensions['response_cache'] = self
+
+    def _count(self, namespace, outcome):
+        with self._lock:
+            counters = self._counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counters[outcome] += 1
+
+    def _key(self, namespace):
+        args = '&'.join(
+            f'{name}={value}' for name, value in sorted(request.args.items(multi=True))
+        )
+        return f'{namespace}:{self.backend.generation(namespace)}:{request.path}?{args}'
+
+    def cached(self, namespace, ttl=None):
+        """Decorator caching successful GET responses of a view"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.backend is None or request.method != 'GET':
+                    return view(*args, **kwargs)
+
+                key = self._key(namespace)
+                body = self.backend.get(key)
+                if body is not None:
+                    self._count(namespace, 'hits')
+                    response = make_response(body, 200)
+                    response.mimetype = 'application/json'
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                self._count(namespace, 'misses')
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and response.is_json:
+                    self.backend.set(key, response.get_data(), ttl or self.default_ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self, *namespaces):
+        """Drop every cached response in the given namespaces"""
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            self.backend.bump_generation(namespace)
+
+    def stats(self):
+        """Hit/miss counters for this process"""
+        with self._lock:
+            namespaces = {name: dict(counts) for name, counts in self._counters.items()}
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': sum(counts['hits'] for counts in namespaces.values()),
+            'misses': sum(counts['misses'] for counts in namespaces.values()),
+            'namespaces': namespaces
+        }
+
+
+cache = ResponseCache()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Index usage check for the list endpoints' queries
+
+Runs EXPLAIN (Postgres) or EXPLAIN QUERY PLAN (SQLite) on the queries the
+routes issue and fails if any of them falls back to a full scan of the
+table being listed. Use --seed to first apply any pending migrations and
+load a synthetic portfolio (see datagen.py) large enough for the planner
+to prefer indexes, so it also works on a fresh database, e.g.:
+
+    DATABASE_URL=sqlite:////tmp/rental_check.db python check_indexes.py --seed
+"""
+
+import argparse
+import re
+import sys
+from datetime import date, timedelta
+from sqlalchemy import text
+
+from app import create_app, check_schema
+import migrations
+from models import db, Tower, Unit, Amenity, AmenityReservation, Booking, Lease, LeaseRenewalOffer, Payment
+from availability import available_between
+import datagen
+
+
+def endpoint_queries():
+    """(label, table, query) for each list endpoint access path"""
+    page = 50
+    some_tower = db.session.query(db.func.min(Tower.id)).scalar()
+    some_user = db.session.query(db.func.min(Booking.user_id)).scalar()
+    some_lease = db.session.query(db.func.min(Payment.lease_id)).scalar()
+    some_amenity = db.session.query(db.func.min(Amenity.id)).scalar()
+    user_leases = db.session.query(Lease.id).filter(Lease.user_id == some_user).scalar_subquery()
+    window_start = date.today()
+    window_end = window_start + timedelta(days=365)
+
+    return [
+        ('GET /api/units?tower_id', 'units',
+         Unit.query_with('list').filter_by(tower_id=some_tower)),
+        ('GET /api/units?status=available&bedrooms', 'units',
+         Unit.query_with('list').filter_by(status='available', bedrooms=2)),
+        ('GET /api/units?tower_id&status=available', 'units',
+         Unit.query_with('list').filter_by(tower_id=some_tower, status='available')),
+        ('GET /api/units?limit', 'units',
+         Unit.query_with('list').order_by(Unit.created_at, Unit.id).limit(page)),
+        ('GET /api/units/search?status&rent_amount range', 'units',
+         Unit.query_with('list').filter(Unit.status == 'available', Unit.rent_amount.between(20000, 30000))
+         .order_by(Unit.rent_amount, Unit.id).limit(page)),
+        ('GET /api/units?available_from (lease overlap)', 'leases',
+         Unit.query_with('list').filter(available_between(window_start, window_end))
+         .order_by(Unit.created_at, Unit.id).limit(page)),
+        ('GET /api/units?available_from (booking overlap)', 'bookings',
+         Unit.query_with('list').filter(available_between(window_start, window_end))
+         .order_by(Unit.created_at, Unit.id).limit(page)),
+        ('GET /api/towers (unit counts)', 'units',
+         db.session.query(Unit.tower_id, Unit.status, db.func.count(Unit.id))
+         .group_by(Unit.tower_id, Unit.status)),
+        ('GET /api/amenities?limit', 'amenities',
+         Amenity.query.filter_by(is_active=True).order_by(Amenity.created_at, Amenity.id).limit(page)),
+        ('GET /api/reservations (admin) ?limit', 'amenity_reservations',
+         AmenityReservation.query.order_by(AmenityReservation.slot_start.desc(), AmenityReservation.id.desc())
+         .limit(page)),
+        ('GET /api/reservations?amenity_id', 'amenity_reservations',
+         AmenityReservation.query.filter_by(amenity_id=some_amenity)
+         .order_by(AmenityReservation.slot_start.desc(), AmenityReservation.id.desc()).limit(page)),
+        ('GET /api/reservations (tenant)', 'amenity_reservations',
+         AmenityReservation.query.filter_by(user_id=some_user)
+         .order_by(AmenityReservation.slot_start.desc(), AmenityReservation.id.desc())),
+        ('GET /api/bookings (admin) ?limit', 'bookings',
+         Booking.query_with('list').order_by(Booking.created_at.desc(), Booking.id.desc()).limit(page)),
+        ('GET /api/bookings?status=pending', 'bookings',
+         Booking.query_with('list').filter_by(status='pending')
+         .order_by(Booking.created_at.desc(), Booking.id.desc()).limit(page)),
+        ('GET /api/bookings (tenant)', 'bookings',
+         Booking.query_with('list').filter_by(user_id=some_user)
+         .order_by(Booking.created_at.desc(), Booking.id.desc())),
+        ('GET /api/leases (admin) ?limit', 'leases',
+         Lease.query_with('list').order_by(Lease.created_at.desc(), Lease.id.desc()).limit(page)),
+        ('GET /api/leases?status=active', 'leases',
+         Lease.query_with('list').filter_by(status='active')
+         .order_by(Lease.created_at.desc(), Lease.id.desc()).limit(page)),
+        ('GET /api/leases (tenant)', 'leases',
+         Lease.query_with('list').filter_by(user_id=some_user)
+         .order_by(Lease.created_at.desc(), Lease.id.desc())),
+        ('GET /api/leases/renewal-offers (admin) ?limit', 'lease_renewal_offers',
+         LeaseRenewalOffer.query.order_by(LeaseRenewalOffer.created_at.desc(), LeaseRenewalOffer.id.desc())
+         .limit(page)),
+        ('GET /api/leases/renewal-offers (tenant)', 'lease_renewal_offers',
+         LeaseRenewalOffer.query.filter_by(user_id=some_user)
+         .order_by(LeaseRenewalOffer.created_at.desc(), LeaseRenewalOffer.id.desc())),
+        ('lease expiry job (ended active leases)', 'leases',
+         Lease.query.with_entities(Lease.id).filter(Lease.status == 'active', Lease.end_date < window_start)
+         .order_by(Lease.end_date, Lease.id).limit(1000)),
+        ('lease renewal job (active leases ending soon)', 'leases',
+         Lease.query.with_entities(Lease.id).filter(Lease.status == 'active', Lease.end_date >= window_start,
+                                                    Lease.end_date <= window_start + timedelta(days=60))
+         .order_by(Lease.end_date, Lease.id).limit(1000)),
+        ('GET /api/payments?lease_id', 'payments',
+         Payment.query.filter_by(lease_id=some_lease)
+         .order_by(Payment.payment_date.desc(), Payment.id.desc())),
+        ('GET /api/payments (admin) ?limit', 'payments',
+         Payment.query.order_by(Payment.payment_date.desc(), Payment.id.desc()).limit(page)),
+        ('GET /api/payments (tenant)', 'payments',
+         Payment.query.filter(Payment.lease_id.in_(user_leases))
+         .order_by(Payment.payment_date.desc(), Payment.id.desc())),
+    ]
+
+
+def explain(query):
+    """Return the query plan as a list of text lines"""
+    connection = db.session.connection()
+    compiled = query.statement.compile(
+        dialect=connection.dialect, compile_kwargs={'render_postcompile': True}
+    )
+    if connection.dialect.name == 'sqlite':
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f'EXPLAIN {compiled}', compiled.params)
+    return [row[0] for row in rows]
+
+
+def full_scan(plan, table):
+    """True if the plan reads every row of the table without an index"""
+    sqlite_scan = re.compile(rf'^SCAN {table}\b(?! USING)')
+    postgres_scan = re.compile(rf'Seq Scan on {table}\b')
+    return any(sqlite_scan.search(line.strip()) or postgres_scan.search(line) for line in plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', action='store_true', help='load a synthetic dataset first')
+    parser.add_argument('--scale', type=float, default=10, help='datagen scale factor for --seed')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.seed:
+        with app.app_context():
+            migrations.upgrade(db.engine)
+    check_schema(app)
+    with app.app_context():
+        if args.seed:
+            datagen.generate(args.scale)
+        db.session.execute(text('ANALYZE'))
+
+        failures = 0
+        for label, table, query in endpoint_queries():
+            plan = explain(query)
+            ok = not full_scan(plan, table)
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {label}")
+            if args.verbose or not ok:
+                for line in plan:
+                    print(f"      {line}")
+
+        db.session.rollback()
+
+    if failures:
+        print(f"\n{failures} endpoint queries fall back to a full table scan")
+        sys.exit(1)
+    print("\nAll endpoint queries use an index")
+
+
+if __name__ == "__main__":
+    main()
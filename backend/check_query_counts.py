@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Query count check for the list endpoints
+
+Every list endpoint should issue the same number of SQL statements no
+matter how many rows it returns; a lazy load per row (an N+1) shows up
+as a count that grows with the data. This script adds N bookings, leases
+and payments for a fresh tenant, counts the statements each list
+endpoint issues, adds 9N more and counts again, and fails if any count
+grew. Lists are requested unpaged, so every row is serialized.
+
+Point it at a migrated scratch database, e.g.:
+
+    export DATABASE_URL=sqlite:////tmp/rental_queries.db
+    flask --app app db upgrade && python check_query_counts.py
+"""
+
+import argparse
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, insert, select
+
+from app import create_app, check_schema
+from authz import authz
+from cache import cache
+from models import db, User, Tower, Unit, Booking, Lease, Payment
+
+# (label, path, role); tenant lists only contain the fresh tenant's rows
+ENDPOINTS = [
+    ('bookings (admin)', '/api/bookings', 'admin'),
+    ('bookings (admin, expanded)', '/api/bookings?expand=user,unit,lease', 'admin'),
+    ('bookings (tenant)', '/api/bookings', 'user'),
+    ('leases (admin)', '/api/leases', 'admin'),
+    ('leases (admin, expanded)', '/api/leases?expand=tenant,unit', 'admin'),
+    ('leases (tenant)', '/api/leases', 'user'),
+    ('payments (admin)', '/api/payments', 'admin'),
+    ('payments (admin, expanded)', '/api/payments?expand=lease', 'admin'),
+    ('payments (tenant)', '/api/payments', 'user'),
+    ('units of a tower', '/api/units?tower_id={tower_id}', 'user'),
+    ('units of a tower (expanded)', '/api/units?tower_id={tower_id}&expand=tower', 'user'),
+]
+
+
+def setup():
+    """Create a tower, an admin and a tenant; returns (tower id, tenant id, tokens)"""
+    tag = uuid.uuid4().hex[:8]
+    tower = Tower(name=f'Query Check {tag}', address='1 Check Road', total_floors=10)
+    # Tokens are minted directly, so no password is needed
+    admin = User(email=f'query-admin-{tag}@example.com', name='Query Admin', role='admin', password_hash='!')
+    tenant = User(email=f'query-tenant-{tag}@example.com', name='Query Tenant', role='user', password_hash='!')
+    db.session.add_all([tower, admin, tenant])
+    db.session.commit()
+    tokens = {
+        user.role: create_access_token(identity=str(user.id),
+                                       additional_claims={'role': user.role, 'email': user.email})
+        for user in (admin, tenant)
+    }
+    return tower.id, tenant.id, tokens
+
+
+def add_rows(tower_id, tenant_id, count):
+    """Add count units, each with an approved booking, an active lease and a payment"""
+    marker = uuid.uuid4().hex[:8]
+    now = datetime.utcnow()
+    db.session.execute(insert(Unit), [
+        {'tower_id': tower_id, 'unit_number': f'Q-{marker}-{i}', 'floor': 1 + i % 10, 'bedrooms': 2,
+         'bathrooms': 1, 'size_sqft': 900, 'rent_amount': 25000.0, 'status': 'occupied', 'created_at': now}
+        for i in range(count)
+    ])
+    unit_ids = db.session.scalars(
+        select(Unit.id).where(Unit.unit_number.like(f'Q-{marker}-%')).order_by(Unit.id)
+    ).all()
+    move_in = date.today() - timedelta(days=30)
+    db.session.execute(insert(Booking), [
+        {'user_id': tenant_id, 'unit_id': unit_id, 'requested_move_in_date': move_in,
+         'status': 'approved', 'created_at': now, 'updated_at': now}
+        for unit_id in unit_ids
+    ])
+    bookings = db.session.execute(
+        select(Booking.id, Booking.unit_id).where(Booking.unit_id.in_(unit_ids))
+    ).all()
+    db.session.execute(insert(Lease), [
+        {'booking_id': booking_id, 'user_id': tenant_id, 'unit_id': unit_id, 'start_date': move_in,
+         'end_date': move_in + timedelta(days=365), 'monthly_rent': 25000.0, 'security_deposit': 50000.0,
+         'status': 'active', 'created_at': now}
+        for booking_id, unit_id in bookings
+    ])
+    lease_ids = db.session.scalars(select(Lease.id).where(Lease.unit_id.in_(unit_ids))).all()
+    db.session.execute(insert(Payment), [
+        {'lease_id': lease_id, 'amount': 25000.0, 'payment_date': move_in, 'payment_method': 'card',
+         'status': 'completed', 'created_at': now}
+        for lease_id in lease_ids
+    ])
+    db.session.commit()
+
+
+def count_statements(app, tower_id, tokens):
+    """Statements issued per endpoint, with response sizes; exits on an unexpected status"""
+    client = app.test_client()
+    statements = []
+    listener = lambda *args: statements.append(1)
+
+    results = {}
+    for label, path, role in ENDPOINTS:
+        path = path.format(tower_id=tower_id)
+        headers = {'Authorization': f'Bearer {tokens[role]}'}
+        client.get(path, headers=headers)  # warm the user cache and compiled views
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                statements.clear()
+                response = client.get(path, headers=headers)
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+        if response.status_code != 200:
+            sys.exit(f"❌ {label}: GET {path} returned {response.status_code}")
+        results[label] = (len(statements), len(response.get_json()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20, help='N: rows added before the first count')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    # Cached responses would issue no statements at all
+    cache.backend = None
+    # Keep the warm-up's revocation lookup cached through slow measured requests
+    authz.revocation_ttl = 3600
+    with app.app_context():
+        tower_id, tenant_id, tokens = setup()
+        add_rows(tower_id, tenant_id, args.rows)
+    before = count_statements(app, tower_id, tokens)
+    with app.app_context():
+        add_rows(tower_id, tenant_id, args.rows * 9)
+    after = count_statements(app, tower_id, tokens)
+
+    failures = 0
+    for label, _, _ in ENDPOINTS:
+        (queries, rows), (queries_after, rows_after) = before[label], after[label]
+        ok = queries_after <= queries
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}: {queries} queries for {rows} rows, "
+              f"{queries_after} for {rows_after}")
+
+    if failures:
+        print(f"\n{failures} endpoint(s) issue more queries as rows are added")
+        sys.exit(1)
+    print("\n✅ Query counts do not grow with the number of rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Logout check across app processes
+
+Under gunicorn a logout is handled by one worker while the token's next
+request may reach another, so revocations must reach every process. This
+script logs a tenant out through one app and calls /api/auth/me with the
+same tokens from a second app in a separate (spawned, not forked)
+process, which shares nothing with the first but the database. The
+second process first sees the tokens as valid, so it also checks that
+its cached answer expires after AUTHZ_REVOCATION_TTL seconds.
+
+Point it at a migrated scratch database, e.g.:
+
+    export DATABASE_URL=sqlite:////tmp/rental_revocation.db
+    flask --app app db upgrade && python check_revocation.py
+"""
+
+import argparse
+import multiprocessing
+import sys
+import time
+import uuid
+
+from app import create_app, check_schema
+from models import db, User
+import refresh_tokens
+
+
+def probe(connection):
+    """Serve (method, path, token) requests from a separate app until told to stop"""
+    client = create_app().test_client()
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        method, path, token = request
+        response = client.open(path, method=method, headers={'Authorization': f'Bearer {token}'})
+        connection.send(response.status_code)
+
+
+class Checker:
+    def __init__(self, app, connection):
+        self.client = app.test_client()
+        self.connection = connection
+        self.failures = 0
+
+    def elsewhere(self, method, path, token):
+        self.connection.send((method, path, token))
+        return self.connection.recv()
+
+    def expect(self, label, status, expected):
+        ok = status == expected
+        self.failures += not ok
+        print(f"{'✅' if ok else '❌'} {label}: {status} (expected {expected})")
+
+
+def issue(app, user_id):
+    with app.app_context():
+        tokens = refresh_tokens.issue_tokens(db.session.get(User, user_id))
+        db.session.commit()
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    wait = app.config['AUTHZ_REVOCATION_TTL'] + 1
+    with app.app_context():
+        # Tokens are minted directly, so no password is needed
+        user = User(email=f'revocation-{uuid.uuid4().hex[:8]}@example.com', name='Revocation Check',
+                    role='user', password_hash='!')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    connection, child_connection = multiprocessing.Pipe()
+    process = multiprocessing.get_context('spawn').Process(target=probe, args=(child_connection,), daemon=True)
+    process.start()
+    check = Checker(app, connection)
+
+    print("Logout of one session:")
+    tokens = issue(app, user_id)
+    access = {'Authorization': f"Bearer {tokens['access_token']}"}
+    check.expect("other process, before logout", check.elsewhere('GET', '/api/auth/me', tokens['access_token']), 200)
+    response = check.client.post('/api/auth/logout', headers=access, json={'refresh_token': tokens['refresh_token']})
+    check.expect("logout", response.status_code, 200)
+    check.expect("same process, after logout", check.client.get('/api/auth/me', headers=access).status_code, 401)
+    time.sleep(wait)
+    check.expect(f"other process, {wait}s after logout",
+                 check.elsewhere('GET', '/api/auth/me', tokens['access_token']), 401)
+    check.expect("other process, refresh after logout",
+                 check.elsewhere('POST', '/api/auth/refresh', tokens['refresh_token']), 401)
+
+    print("\nLogout everywhere:")
+    older = issue(app, user_id)
+    check.expect("other process, older session", check.elsewhere('GET', '/api/auth/me', older['access_token']), 200)
+    # iat is whole seconds; a token from the same second as the logout stays valid
+    time.sleep(1.1)
+    current = issue(app, user_id)
+    response = check.client.post('/api/auth/logout?all=1',
+                                 headers={'Authorization': f"Bearer {current['access_token']}"})
+    check.expect("logout ?all=1", response.status_code, 200)
+    time.sleep(wait)
+    check.expect("other process, older session after logout",
+                 check.elsewhere('GET', '/api/auth/me', older['access_token']), 401)
+    check.expect("other process, logged out session",
+                 check.elsewhere('GET', '/api/auth/me', current['access_token']), 401)
+    time.sleep(1.1)
+    later = issue(app, user_id)
+    check.expect("other process, new login", check.elsewhere('GET', '/api/auth/me', later['access_token']), 200)
+
+    connection.send(None)
+    process.join()
+
+    if check.failures:
+        print(f"\n❌ {check.failures} check(s) failed: revocations do not reach every process")
+        sys.exit(1)
+    print("\n✅ Logouts reach every app process")
+
+
+if __name__ == "__main__":
+    main()
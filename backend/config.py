@@ -4,9 +4,18 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _flag(name, default='false'):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+
 class Config:
     """Application configuration"""
     
+    # Environment: production refuses to start with debug enabled
+    APP_ENV = os.environ.get('APP_ENV') or os.environ.get('FLASK_ENV') or 'development'
+    PRODUCTION = APP_ENV == 'production'
+    DEBUG = _flag('FLASK_DEBUG')
+    
     # Secret keys
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key-change-in-production'
@@ -21,9 +30,64 @@ class Config:
     SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
-    # JWT Configuration
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
-    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    # Connection pool per worker process. Each gunicorn thread holds at most
+    # one connection, so the pool defaults to the thread count; size the
+    # database's max_connections for workers * (pool size + overflow).
+    # SQLite keeps SQLAlchemy's defaults.
+    SQLALCHEMY_ENGINE_OPTIONS = {} if DATABASE_URL.startswith('sqlite') else {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', os.environ.get('GUNICORN_THREADS', 4))),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 4)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _flag('DB_POOL_PRE_PING', 'true')
+    }
+    
+    # JWT Configuration: short-lived access tokens, renewed through
+    # single-use refresh tokens at /api/auth/refresh
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get('JWT_ACCESS_TOKEN_MINUTES', 60)))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.environ.get('JWT_REFRESH_TOKEN_DAYS', 30)))
+    REFRESH_REUSE_GRACE_SECONDS = int(os.environ.get('REFRESH_REUSE_GRACE_SECONDS', 10))
+    
+    # Response cache for public catalog endpoints (memory, sqlite or none)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 60))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')
+    
+    # Authorization: seconds a cached user/role snapshot is trusted
+    AUTHZ_USER_TTL = int(os.environ.get('AUTHZ_USER_TTL', 30))
+    AUTHZ_USER_CACHE_SIZE = int(os.environ.get('AUTHZ_USER_CACHE_SIZE', 10000))
+    # Seconds a process trusts its cached answer for whether a token is revoked
+    AUTHZ_REVOCATION_TTL = int(os.environ.get('AUTHZ_REVOCATION_TTL', 5))
+    
+    # Password hashing: werkzeug method string, process pool size (0 = inline)
+    # and how many hashes may queue before logins get a 503
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(os.cpu_count() or 1, 4)))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get('PASSWORD_HASH_TIMEOUT', 30))
+    
+    # Bulk unit import
+    UNIT_IMPORT_BATCH_SIZE = int(os.environ.get('UNIT_IMPORT_BATCH_SIZE', 1000))
+    UNIT_IMPORT_MAX_ROWS = int(os.environ.get('UNIT_IMPORT_MAX_ROWS', 100000))
+    
+    # Streaming exports: rows fetched per server-side cursor round trip
+    EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+    
+    # Metrics on /metrics (Prometheus text format). Workers sharing
+    # METRICS_DIR report combined counters; METRICS_TOKEN, if set, must be
+    # sent as a bearer token. X-Query-Count is added outside production.
+    METRICS_DIR = os.environ.get('METRICS_DIR')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_QUERY_HEADER = _flag('METRICS_QUERY_HEADER', 'false' if PRODUCTION else 'true')
+    
+    # Lease jobs (lease_jobs.py): leases per transaction, renewal notice
+    # period and rent increase, and how often each app process runs them
+    # (0 = only from cron via `flask --app app leases run`)
+    LEASE_JOBS_CHUNK_SIZE = int(os.environ.get('LEASE_JOBS_CHUNK_SIZE', 1000))
+    LEASE_RENEWAL_NOTICE_DAYS = int(os.environ.get('LEASE_RENEWAL_NOTICE_DAYS', 60))
+    LEASE_RENEWAL_RENT_INCREASE = float(os.environ.get('LEASE_RENEWAL_RENT_INCREASE', 0.05))
+    LEASE_JOBS_INTERVAL_MINUTES = float(os.environ.get('LEASE_JOBS_INTERVAL_MINUTES', 0))
     
     # CORS settings
     CORS_HEADERS = 'Content-Type'
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+Synthetic portfolio generator
+
+Generates a realistic rental portfolio at any scale: towers in several
+cities with 2-8 units per floor, units whose size and rent follow their
+layout, floor and city, and each unit's letting history over the last
+few years. A history is a sequence of tenancies separated by vacancies.
+Every lease comes from an approved booking, often after rejected
+competing requests, and many end in a renewal by the same tenant. Each
+month of a lease gets a payment that is usually on time, sometimes
+late, occasionally failed and retried. Units let today are occupied and
+have an active lease; vacant units may have pending booking requests.
+
+Scale 1 is 12 towers, about 1,300 units, 11k bookings and 60k payments;
+everything grows linearly, so scale 40 is roughly the 50k-unit, 450k
+booking, 2.3M payment portfolio of the capacity plan. Rows are streamed
+per tower into per-table buffers and written in chunks (COPY on
+PostgreSQL, executemany elsewhere), so memory stays flat at any scale.
+The same --seed always produces the same data. From the backend
+directory:
+
+    flask --app app db upgrade
+    python datagen.py --scale 40 --seed 42
+    python datagen.py --scale 1 --reset     # drop everything first
+"""
+
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, time as clock_time, timedelta
+from sqlalchemy import func, select, text
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from models import db, User, Tower, Unit, Amenity, Booking, Lease, Payment
+from passwords import passwords
+import lease_stats
+import migrations
+
+CHUNK_SIZE = 10000
+TOWERS_PER_SCALE = 12
+HISTORY_YEARS = 4
+TENANT_PASSWORD = 'password123'
+
+# Tables in foreign-key order, with the columns the generator fills
+TABLES = [
+    (User, ('id', 'email', 'password_hash', 'name', 'phone', 'role', 'created_at')),
+    (Tower, ('id', 'name', 'address', 'total_floors', 'description', 'created_at')),
+    (Unit, ('id', 'tower_id', 'unit_number', 'floor', 'bedrooms', 'bathrooms', 'size_sqft',
+            'rent_amount', 'status', 'description', 'created_at', 'version')),
+    (Booking, ('id', 'user_id', 'unit_id', 'requested_move_in_date', 'status', 'admin_comments',
+               'created_at', 'updated_at', 'version')),
+    (Lease, ('id', 'booking_id', 'user_id', 'unit_id', 'start_date', 'end_date', 'monthly_rent',
+             'security_deposit', 'status', 'created_at')),
+    (Payment, ('id', 'lease_id', 'amount', 'payment_date', 'payment_method', 'status', 'created_at')),
+]
+
+# city -> (localities, rent per square foot per month)
+CITIES = {
+    'Mumbai': (['Bandra West', 'Andheri East', 'Powai', 'Lower Parel', 'Chembur'], 62),
+    'Bangalore': (['Whitefield', 'Koramangala', 'HSR Layout', 'Hebbal', 'Electronic City'], 38),
+    'New Delhi': (['Dwarka', 'Saket', 'Vasant Kunj', 'Rohini', 'Mayur Vihar'], 40),
+    'Pune': (['Hinjewadi', 'Baner', 'Kharadi', 'Wakad', 'Viman Nagar'], 30),
+    'Hyderabad': (['Gachibowli', 'Kondapur', 'Madhapur', 'Banjara Hills', 'Kukatpally'], 32),
+    'Chennai': (['Adyar', 'OMR', 'Anna Nagar', 'Velachery', 'T Nagar'], 33),
+}
+TOWER_NAMES = ['Skyline', 'Green Valley', 'Royal', 'Palm', 'Lake View', 'Silver Oak', 'Sunrise',
+               'Orchid', 'Emerald', 'Harmony', 'Meridian', 'Crest']
+TOWER_SUFFIXES = ['Residency', 'Apartments', 'Heights', 'Towers', 'Enclave', 'Gardens']
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Sai', 'Rohan', 'Ishaan', 'Kabir', 'Ananya',
+               'Diya', 'Priya', 'Saanvi', 'Meera', 'Kavya', 'Neha', 'Pooja', 'Rahul', 'Rajesh',
+               'Sneha', 'Vikram', 'Lakshmi', 'Farhan', 'Zoya', 'Arnav']
+LAST_NAMES = ['Sharma', 'Kumar', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Gupta', 'Singh', 'Das',
+              'Mehta', 'Rao', 'Khan', 'Joshi', 'Menon', 'Bose', 'Chopra', 'Pillai', 'Verma']
+# name -> (description, hours, opens/closes at, slot minutes and capacity when reservable)
+AMENITIES = [
+    ('Swimming Pool', 'Temperature-controlled swimming pool', '6:00 AM - 10:00 PM', (6, 22), (60, 25)),
+    ('Gymnasium', 'Fully equipped gym with modern equipment', '24/7', None, (60, 20)),
+    ('Covered Parking', 'Secure covered parking facility', '24/7', None, None),
+    ('Community Hall', 'Community hall for events and gatherings', '8:00 AM - 11:00 PM', (8, 23), (180, 1)),
+    ('Children Play Area', 'Safe outdoor play area for children', '7:00 AM - 9:00 PM', (7, 21), None),
+    ('Power Backup', '24x7 power backup for common areas', '24/7', None, None),
+    ('Clubhouse', 'Lounge with indoor games', '9:00 AM - 10:00 PM', (9, 22), (60, 12)),
+    ('Jogging Track', 'Landscaped jogging track', '5:00 AM - 9:00 PM', (5, 21), None),
+]
+
+# bedrooms -> (relative frequency, typical size in square feet)
+LAYOUTS = {1: (30, 650), 2: (40, 950), 3: (22, 1300), 4: (8, 1800)}
+LEASE_MONTHS = [11] * 5 + [12] * 3 + [6, 24]
+PAYMENT_METHODS = ['upi'] * 10 + ['bank_transfer'] * 6 + ['card'] * 3 + ['cash']
+REJECTION_COMMENTS = ['Unit already committed to another applicant', 'Incomplete documents',
+                      'Move-in date not available', None]
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, min(day.day, 28))
+
+
+class BulkWriter:
+    """Buffers generated rows per table and writes them in chunks
+
+    The generator calls flush_if_full() only between units, and all
+    buffers are written together in foreign-key order, so a chunk never
+    references a row that is not stored yet. PostgreSQL gets COPY ...
+    FROM STDIN; other databases get one executemany INSERT per table and
+    chunk.
+    """
+
+    def __init__(self, engine, chunk_size=CHUNK_SIZE, log=print):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.log = log
+        self.buffers = {model.__table__: [] for model, _ in TABLES}
+        self.columns = {model.__table__: columns for model, columns in TABLES}
+        self.written = {model.__tablename__: 0 for model, _ in TABLES}
+        self.started = time.perf_counter()
+        self.last_report = 0.0
+
+    def add(self, model, row):
+        self.buffers[model.__table__].append(row)
+
+    def flush_if_full(self):
+        if any(len(rows) >= self.chunk_size for rows in self.buffers.values()):
+            self.flush()
+
+    def flush(self):
+        with self.engine.begin() as connection:
+            for table, rows in self.buffers.items():
+                if not rows:
+                    continue
+                if connection.dialect.name == 'postgresql':
+                    self._copy(connection, table, rows)
+                else:
+                    columns = self.columns[table]
+                    connection.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+                self.written[table.name] += len(rows)
+                rows.clear()
+        self.report()
+
+    def _copy(self, connection, table, rows):
+        statement = f"COPY {table.name} ({', '.join(self.columns[table])}) FROM STDIN WITH (FORMAT csv)"
+        dbapi_connection = connection.connection.dbapi_connection
+        if connection.dialect.driver == 'psycopg':
+            with dbapi_connection.cursor() as cursor, cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+            return
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with dbapi_connection.cursor() as cursor:
+            cursor.copy_expert(statement, buffer)
+
+    def report(self, final=False):
+        elapsed = time.perf_counter() - self.started
+        if not final and elapsed - self.last_report < 2:
+            return
+        self.last_report = elapsed
+        total = sum(self.written.values())
+        counts = ', '.join(f'{name} {count:,}' for name, count in self.written.items())
+        self.log(f"   {total:,} rows in {elapsed:.0f}s ({total / max(elapsed, 1e-9):,.0f}/s): {counts}")
+
+
+class PortfolioGenerator:
+    """Streams a synthetic portfolio into a BulkWriter"""
+
+    def __init__(self, writer, seed, today=None, years=HISTORY_YEARS):
+        self.writer = writer
+        self.rng = random.Random(seed)
+        self.today = today or date.today()
+        self.history_start = add_months(self.today, -12 * years)
+        self.password_hash = generate_password_hash(TENANT_PASSWORD, passwords.method)
+        self.ids = {}
+        self.first_tenant = None
+
+    def start_ids(self):
+        """Continue after the highest existing id of every table"""
+        with self.writer.engine.connect() as connection:
+            for model, _ in TABLES:
+                self.ids[model] = connection.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+
+    def next_id(self, model):
+        self.ids[model] += 1
+        return self.ids[model]
+
+    def moment(self, day):
+        """A datetime during office hours on a day"""
+        return datetime(day.year, day.month, day.day, self.rng.randint(9, 19), self.rng.randrange(60),
+                        self.rng.randrange(60))
+
+    def tenant(self, day):
+        """A new tenant, or sometimes one who already rented in the portfolio"""
+        if self.first_tenant and self.ids[User] > self.first_tenant and self.rng.random() < 0.15:
+            return self.rng.randint(self.first_tenant, self.ids[User])
+        user_id = self.next_id(User)
+        if self.first_tenant is None:
+            self.first_tenant = user_id
+        first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+        self.writer.add(User, (
+            user_id, f'{first.lower()}.{last.lower()}.{user_id}@example.com', self.password_hash,
+            f'{first} {last}', f'9{self.rng.randrange(10 ** 9):09d}', 'user',
+            self.moment(day - timedelta(days=self.rng.randint(1, 30)))
+        ))
+        return user_id
+
+    def amenities(self):
+        with self.writer.engine.begin() as connection:
+            if connection.execute(select(Amenity.id).limit(1)).first():
+                return
+            connection.execute(Amenity.__table__.insert(), [
+                {'name': name, 'description': description, 'availability_hours': hours,
+                 'opens_at': clock_time(hours_open[0]) if hours_open else None,
+                 'closes_at': clock_time(hours_open[1]) if hours_open else None,
+                 'slot_minutes': slots[0] if slots else None,
+                 'slot_capacity': slots[1] if slots else None,
+                 'is_active': True, 'created_at': datetime.combine(self.history_start, datetime.min.time())}
+                for name, description, hours, hours_open, slots in AMENITIES
+            ])
+
+    def portfolio(self, towers):
+        for index in range(towers):
+            self.tower(index)
+        self.writer.flush()
+
+    def tower(self, index):
+        rng = self.rng
+        city = rng.choice(list(CITIES))
+        localities, rate = CITIES[city]
+        floors = int(rng.triangular(6, 40, 16))
+        per_floor = rng.randint(2, 8)
+        tower_id = self.next_id(Tower)
+        built = self.history_start - timedelta(days=rng.randint(30, 2000))
+        self.writer.add(Tower, (
+            tower_id, f'{rng.choice(TOWER_NAMES)} {rng.choice(TOWER_SUFFIXES)} {index + 1}',
+            f'{rng.choice(localities)}, {city}', floors,
+            f'{floors}-storey residential tower in {city}', self.moment(built)
+        ))
+        # Every floor repeats the tower's layout, as in a real building
+        layout = rng.choices(list(LAYOUTS), weights=[weight for weight, _ in LAYOUTS.values()], k=per_floor)
+        for floor in range(1, floors + 1):
+            for position, bedrooms in enumerate(layout, start=1):
+                self.unit(tower_id, built, rate, floor, position, bedrooms)
+
+    def unit(self, tower_id, built, rate, floor, position, bedrooms):
+        rng = self.rng
+        size = int(LAYOUTS[bedrooms][1] * rng.uniform(0.9, 1.15))
+        rent = round(size * rate * (1 + floor * 0.01) * rng.uniform(0.9, 1.1), -2)
+        unit_id = self.next_id(Unit)
+        occupied = self.history(unit_id, rent)
+        if occupied:
+            status = 'occupied'
+        else:
+            status = 'maintenance' if rng.random() < 0.05 else 'available'
+            if status == 'available' and rng.random() < 0.3:
+                self.pending_requests(unit_id)
+        self.writer.add(Unit, (
+            unit_id, tower_id, f'{floor}{position:02d}', floor, bedrooms,
+            max(1, bedrooms - rng.randint(0, 1)), size, rent, status,
+            f'{bedrooms}BHK, {size} sq ft on floor {floor}', self.moment(built), 1
+        ))
+        self.writer.flush_if_full()
+
+    def history(self, unit_id, rent):
+        """Tenancies of one unit up to today; returns True if it is let now"""
+        rng = self.rng
+        move_in = self.history_start + timedelta(days=rng.randint(0, 180))
+        tenant = None
+        while move_in <= self.today:
+            renewal = tenant is not None and rng.random() < 0.4
+            if not renewal:
+                tenant = self.tenant(move_in - timedelta(days=30))
+                for _ in range(rng.choice([0, 0, 1, 1, 2, 3])):
+                    self.booking(unit_id, self.tenant(move_in - timedelta(days=40)), move_in, 'rejected')
+            booking_id = self.booking(unit_id, tenant, move_in, 'approved')
+            end, status = self.lease(booking_id, tenant, unit_id, move_in, rent)
+            if status == 'active':
+                return True
+            if renewal or rng.random() < 0.4:
+                move_in = end + timedelta(days=1)
+            else:
+                tenant = None
+                move_in = end + timedelta(days=rng.randint(7, 90))
+            rent = round(rent * rng.uniform(1.0, 1.08), -2)
+        return False
+
+    def booking(self, unit_id, user_id, move_in, status):
+        rng = self.rng
+        requested = self.moment(min(move_in - timedelta(days=rng.randint(7, 45)), self.today))
+        decided = requested + timedelta(days=rng.randint(0, 5), hours=rng.randint(1, 8))
+        comments = rng.choice(REJECTION_COMMENTS) if status == 'rejected' else None
+        booking_id = self.next_id(Booking)
+        self.writer.add(Booking, (
+            booking_id, user_id, unit_id, move_in, status, comments, requested,
+            requested if status == 'pending' else decided, 1
+        ))
+        return booking_id
+
+    def pending_requests(self, unit_id):
+        for _ in range(self.rng.randint(1, 3)):
+            move_in = self.today + timedelta(days=self.rng.randint(7, 60))
+            user_id = self.tenant(self.today)
+            requested = self.moment(self.today - timedelta(days=self.rng.randint(0, 14)))
+            booking_id = self.next_id(Booking)
+            self.writer.add(Booking, (
+                booking_id, user_id, unit_id, move_in, 'pending', None, requested, requested, 1
+            ))
+
+    def lease(self, booking_id, user_id, unit_id, start, rent):
+        """Write a lease and its payments; returns (end date, status)"""
+        rng = self.rng
+        end = add_months(start, rng.choice(LEASE_MONTHS)) - timedelta(days=1)
+        if end >= self.today:
+            status = 'active'
+        elif rng.random() < 0.06:
+            status = 'terminated'
+            end = start + timedelta(days=rng.randint(60, max(61, (end - start).days - 30)))
+        else:
+            status = 'expired'
+        lease_id = self.next_id(Lease)
+        self.writer.add(Lease, (
+            lease_id, booking_id, user_id, unit_id, start, end, rent, rent * 2, status,
+            self.moment(start - timedelta(days=rng.randint(1, 7)))
+        ))
+        self.payments(lease_id, start, min(end, self.today), rent)
+        return end, status
+
+    def payments(self, lease_id, start, last_day, rent):
+        rng = self.rng
+        month = 0
+        while True:
+            due = add_months(start, month)
+            if due > last_day:
+                return
+            month += 1
+            paid = due + timedelta(days=rng.choice([0, 0, 0, 1, 2, 3, 5, 9]))
+            method = rng.choice(PAYMENT_METHODS)
+            if paid > self.today:
+                self.payment(lease_id, rent, self.today, method, 'pending')
+                continue
+            if rng.random() < 0.03:
+                self.payment(lease_id, rent, paid, method, 'failed')
+                paid += timedelta(days=rng.randint(1, 4))
+                if paid > self.today:
+                    continue
+            self.payment(lease_id, rent, paid, method, 'completed')
+
+    def payment(self, lease_id, amount, day, method, status):
+        self.writer.add(Payment, (self.next_id(Payment), lease_id, amount, day, method, status, self.moment(day)))
+
+
+def reset_sequences(engine):
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    if engine.dialect.name != 'postgresql':
+        return
+    with engine.begin() as connection:
+        for model, _ in TABLES + [(Amenity, None)]:
+            table = model.__tablename__
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+            ))
+
+
+def generate(scale=1.0, seed=42, chunk_size=CHUNK_SIZE, log=print):
+    """Generate a portfolio of scale * TOWERS_PER_SCALE towers; returns rows written per table.
+
+    Runs inside an app context and appends to whatever is already stored.
+    """
+    engine = db.engine
+    writer = BulkWriter(engine, chunk_size=chunk_size, log=log)
+    generator = PortfolioGenerator(writer, seed)
+    generator.start_ids()
+    towers = max(1, round(scale * TOWERS_PER_SCALE))
+
+    log(f"Generating {towers} towers with {HISTORY_YEARS} years of history (seed {seed})...")
+    generator.amenities()
+    generator.portfolio(towers)
+    writer.report(final=True)
+    reset_sequences(engine)
+
+    log("Rebuilding lease statistics...")
+    lease_stats.rebuild_counters()
+    db.session.commit()
+    with engine.begin() as connection:
+        connection.execute(text('ANALYZE'))
+    return dict(writer.written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help=f'1 = {TOWERS_PER_SCALE} towers')
+    parser.add_argument('--seed', type=int, default=42, help='random seed; same seed, same data')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='rows per table per write')
+    parser.add_argument('--reset', action='store_true', help='drop all tables and re-run migrations first')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            migrations.reset(db.engine)
+        else:
+            migrations.check(db.engine)
+        started = time.perf_counter()
+        written = generate(args.scale, args.seed, args.chunk_size)
+    print(f"\n✅ Generated {sum(written.values()):,} rows in {time.perf_counter() - started:.0f}s")
+    print(f"   Tenant password: {TENANT_PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
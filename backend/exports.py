@@ -0,0 +1,164 @@
+"""Streaming exports of payments, leases and bookings
+
+Each dataset is one flat SELECT over the columns accounting needs, joined
+to the tenant, unit and tower, ordered by id. Rows are fetched through a
+server-side cursor (``stream_results`` with ``yield_per``) and written
+one chunk at a time as NDJSON or CSV, so memory use does not grow with
+the size of the export and the first chunk is sent as soon as the query
+returns rows.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from models import db, User, Tower, Unit, Booking, Lease, Payment
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+class ExportError(ValueError):
+    """Raised for an unknown dataset or malformed filter"""
+
+
+def _payments():
+    statement = (
+        select(
+            Payment.id, Payment.lease_id, Lease.user_id, User.name.label('tenant_name'),
+            Lease.unit_id, Unit.unit_number, Tower.name.label('tower_name'), Payment.amount,
+            Payment.payment_date, Payment.payment_method, Payment.status, Payment.created_at
+        )
+        .join(Lease, Lease.id == Payment.lease_id)
+        .join(User, User.id == Lease.user_id)
+        .join(Unit, Unit.id == Lease.unit_id)
+        .join(Tower, Tower.id == Unit.tower_id)
+        .order_by(Payment.id)
+    )
+    return statement, Payment.status, Payment.payment_date
+
+
+def _leases():
+    statement = (
+        select(
+            Lease.id, Lease.booking_id, Lease.user_id, User.name.label('tenant_name'),
+            User.email.label('tenant_email'), Lease.unit_id, Unit.unit_number,
+            Tower.name.label('tower_name'), Lease.start_date, Lease.end_date, Lease.monthly_rent,
+            Lease.security_deposit, Lease.status, Lease.created_at
+        )
+        .join(User, User.id == Lease.user_id)
+        .join(Unit, Unit.id == Lease.unit_id)
+        .join(Tower, Tower.id == Unit.tower_id)
+        .order_by(Lease.id)
+    )
+    return statement, Lease.status, Lease.start_date
+
+
+def _bookings():
+    statement = (
+        select(
+            Booking.id, Booking.user_id, User.name.label('user_name'),
+            User.email.label('user_email'), Booking.unit_id, Unit.unit_number,
+            Tower.name.label('tower_name'), Unit.rent_amount, Booking.requested_move_in_date,
+            Booking.status, Booking.admin_comments, Booking.created_at, Booking.updated_at
+        )
+        .join(User, User.id == Booking.user_id)
+        .join(Unit, Unit.id == Booking.unit_id)
+        .join(Tower, Tower.id == Unit.tower_id)
+        .order_by(Booking.id)
+    )
+    return statement, Booking.status, Booking.created_at
+
+
+# dataset -> builder of (statement, status column, column filtered by from/to)
+DATASETS = {
+    'payments': _payments,
+    'leases': _leases,
+    'bookings': _bookings
+}
+
+
+def _date_arg(args, name):
+    raw = args.get(name)
+    if not raw:
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ExportError(f'{name} must be an ISO date (YYYY-MM-DD)')
+
+
+def _select_fields(statement, raw):
+    """Keep only the comma-separated columns in raw, in the order given"""
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    if not names:
+        return statement
+    columns = {column.key: column for column in statement.selected_columns}
+    for name in names:
+        if name not in columns:
+            raise ExportError(f"Unknown field '{name}'; expected one of: {', '.join(columns)}")
+    return statement.with_only_columns(*[columns[name] for name in dict.fromkeys(names)])
+
+
+def export_query(dataset, args):
+    """SELECT statement for a dataset, narrowed by fields, status and from/to dates"""
+    if dataset not in DATASETS:
+        raise ExportError(f"dataset must be one of: {', '.join(DATASETS)}")
+    statement, status_column, date_column = DATASETS[dataset]()
+    statement = _select_fields(statement, args.get('fields', ''))
+
+    status = args.get('status')
+    if status:
+        statement = statement.where(status_column == status)
+    start = _date_arg(args, 'from')
+    end = _date_arg(args, 'to')
+    if start:
+        statement = statement.where(date_column >= start)
+    if end:
+        # Inclusive end date, also for datetime columns
+        statement = statement.where(date_column < date.fromordinal(end.toordinal() + 1))
+    return statement
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(statement, chunk_size):
+    """Yield (column names, list of row tuples) per chunk from a server-side cursor"""
+    result = db.session.execute(
+        statement, execution_options={'stream_results': True, 'yield_per': chunk_size}
+    )
+    try:
+        columns = list(result.keys())
+        for partition in result.partitions():
+            yield columns, partition
+    finally:
+        result.close()
+
+
+def ndjson_chunks(statement, chunk_size):
+    """Yield NDJSON text, one chunk of lines per fetched partition"""
+    for columns, rows in stream_rows(statement, chunk_size):
+        yield ''.join(
+            json.dumps({column: _plain(value) for column, value in zip(columns, row)}) + '\n'
+            for row in rows
+        )
+
+
+def csv_chunks(statement, chunk_size):
+    """Yield CSV text: the header line first, then one chunk per partition"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([column.key for column in statement.selected_columns])
+    yield buffer.getvalue()
+
+    for _, rows in stream_rows(statement, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue()
@@ -0,0 +1,70 @@
+"""Gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker is a separate process with its own connection pool and
+caches, and runs GUNICORN_THREADS request threads (gthread). Most
+request time is spent waiting on the database, so the default of
+2 * cores + 1 workers with 4 threads keeps every core busy without
+oversubscribing Postgres: the connection count is at most
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+
+State the workers must agree on is shared: the response cache defaults
+to one SQLite file below, and token revocations are stored in the
+database (see authz.py), so a logout handled by one worker reaches the
+others within AUTHZ_REVOCATION_TTL seconds and survives their restarts.
+"""
+import glob
+import multiprocessing
+import os
+import tempfile
+
+# Imported up front: child_exit runs in the master's SIGCHLD handler
+from metrics import fold_exited
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+# Every worker has its own password hashing pool and queue, so split one
+# machine-wide budget (a pool per core, up to 4, and 32 queued hashes)
+# between them rather than starting workers * 4 scrypt processes. Set
+# PASSWORD_HASH_WORKERS / PASSWORD_HASH_MAX_PENDING to choose per-worker values.
+os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(1, min(multiprocessing.cpu_count(), 4) // workers)))
+os.environ.setdefault('PASSWORD_HASH_MAX_PENDING', str(max(2, 32 // workers)))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Workers write metrics snapshots here so /metrics reports all of them
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'rental_portal_metrics'))
+
+# The memory cache is per process, so an invalidation in one worker would
+# leave the others serving stale units and availability; share one file
+os.environ.setdefault('CACHE_BACKEND', 'sqlite')
+os.environ.setdefault('CACHE_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'rental_portal_cache.sqlite3'))
+
+
+def on_starting(server):
+    """Start every deployment's counters and response cache from zero"""
+    os.makedirs(os.environ['METRICS_DIR'], exist_ok=True)
+    for path in glob.glob(os.path.join(os.environ['METRICS_DIR'], '*.json')):
+        os.remove(path)
+    if os.environ['CACHE_BACKEND'] == 'sqlite':
+        for path in glob.glob(glob.escape(os.environ['CACHE_SQLITE_PATH']) + '*'):
+            os.remove(path)
+    elif os.environ['CACHE_BACKEND'] == 'memory' and workers > 1:
+        server.log.warning('CACHE_BACKEND=memory keeps a separate cache per worker; '
+                           'writes only invalidate the worker that handled them')
+
+
+def child_exit(server, worker):
+    """Fold an exited worker's metrics into the cumulative snapshot"""
+    fold_exited(os.environ['METRICS_DIR'], worker.pid)
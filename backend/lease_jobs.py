@@ -0,0 +1,345 @@
+"""Lease expiry and renewal offer batch jobs
+
+Two idempotent jobs keep leases in step with the calendar:
+
+- ``expire``: active leases whose ``end_date`` has passed become
+  'expired', their units go back to 'available' unless another active
+  lease holds them, and renewal offers still open on those leases lapse
+- ``renewals``: active leases ending within LEASE_RENEWAL_NOTICE_DAYS
+  get a renewal offer for another lease term, at the current rent plus
+  LEASE_RENEWAL_RENT_INCREASE, unless they have one already or the unit
+  is already let to someone from the day after
+
+Both walk the partial (end_date, id) index over active leases from
+migration 0009 in chunks of LEASE_JOBS_CHUNK_SIZE, and each chunk is a
+few set-based statements committed on its own. Expiring a chunk is one
+
+    UPDATE leases SET status = 'expired'
+    WHERE status = 'active' AND id IN (
+        SELECT id FROM leases WHERE status = 'active' AND end_date < :as_of
+        ORDER BY end_date, id LIMIT :chunk)
+    RETURNING id, unit_id, monthly_rent, security_deposit
+
+followed by one UPDATE of the returned units, one of their offers and one
+batched lease counter upsert. Memory is bounded by the chunk size and an
+interrupted run loses at most its current chunk; running again carries
+on where it stopped, and rows already processed no longer match. On
+Postgres the chunk is picked with FOR UPDATE SKIP LOCKED, so overlapping
+runs (one per worker of the in-process scheduler, or cron plus a
+scheduler) split the work instead of waiting on each other.
+
+Run from the backend directory, e.g. daily from cron:
+
+    flask --app app leases run
+    flask --app app leases expire --as-of 2025-07-01
+    flask --app app leases renewals --days 90
+
+or set LEASE_JOBS_INTERVAL_MINUTES to run both in every app process.
+"""
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import exists, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import aliased
+from models import db, Unit, Lease, LeaseRenewalOffer
+from booking_workflow import run_transaction, LEASE_TERM_DAYS
+from cache import cache, MemoryBackend
+import lease_stats
+
+CHUNK_SIZE = 1000
+RENEWAL_NOTICE_DAYS = 60
+RENEWAL_RENT_INCREASE = 0.05
+
+leases_table = Lease.__table__
+units_table = Unit.__table__
+offers_table = LeaseRenewalOffer.__table__
+
+
+def _settings(name, default):
+    return current_app.config.get(name, default)
+
+
+def _expire_chunk(as_of, chunk_size):
+    """Expire one chunk of ended leases; returns (leases, units freed, offers lapsed)"""
+    due = (
+        select(leases_table.c.id)
+        .where(leases_table.c.status == 'active', leases_table.c.end_date < as_of)
+        .order_by(leases_table.c.end_date, leases_table.c.id)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    expired = db.session.execute(
+        update(leases_table)
+        .where(leases_table.c.id.in_(due.scalar_subquery()), leases_table.c.status == 'active')
+        .values(status='expired')
+        .returning(leases_table.c.id, leases_table.c.unit_id,
+                   leases_table.c.monthly_rent, leases_table.c.security_deposit)
+    ).all()
+    if not expired:
+        return 0, 0, 0
+
+    lease_ids = [row.id for row in expired]
+    unit_ids = sorted({row.unit_id for row in expired})
+    towers = dict(db.session.execute(
+        select(units_table.c.id, units_table.c.tower_id).where(units_table.c.id.in_(unit_ids))
+    ).all())
+    deltas = lease_stats.LeaseDeltas()
+    for row in expired:
+        deltas.transition(towers.get(row.unit_id), 'active', 'expired', row.monthly_rent, row.security_deposit)
+    lease_stats.apply_deltas(deltas)
+
+    # A unit stays occupied while any other active lease (e.g. a renewal) holds it
+    still_let = exists().where(leases_table.c.unit_id == units_table.c.id, leases_table.c.status == 'active')
+    freed = db.session.execute(
+        update(units_table)
+        .where(units_table.c.id.in_(unit_ids), units_table.c.status == 'occupied', ~still_let)
+        .values(status='available', version=units_table.c.version + 1)
+    ).rowcount
+
+    lapsed = db.session.execute(
+        update(offers_table)
+        .where(offers_table.c.lease_id.in_(lease_ids), offers_table.c.status == 'offered')
+        .values(status='lapsed')
+    ).rowcount
+    return len(expired), freed, lapsed
+
+
+def expire_leases(as_of=None, chunk_size=None, log=None):
+    """Expire every active lease that ended before as_of (default today)
+
+    Returns counts of expired leases, freed units and lapsed offers.
+    """
+    as_of = as_of or date.today()
+    chunk_size = chunk_size or _settings('LEASE_JOBS_CHUNK_SIZE', CHUNK_SIZE)
+    totals = {'expired': 0, 'units_freed': 0, 'offers_lapsed': 0}
+    try:
+        while True:
+            expired, freed, lapsed = run_transaction(lambda: _expire_chunk(as_of, chunk_size))
+            totals['expired'] += expired
+            totals['units_freed'] += freed
+            totals['offers_lapsed'] += lapsed
+            if expired and log:
+                log(f"   expired {totals['expired']:,} leases, freed {totals['units_freed']:,} units")
+            # A short chunk means nothing is left, or the rest is locked by another run
+            if expired < chunk_size:
+                break
+    finally:
+        if totals['units_freed']:
+            cache.invalidate('units', 'towers')
+    return totals
+
+
+def _insert_offers(rows):
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        return db.session.execute(
+            insert(offers_table).on_conflict_do_nothing(index_elements=[offers_table.c.lease_id]), rows
+        ).rowcount
+    taken = set(db.session.execute(
+        select(offers_table.c.lease_id).where(offers_table.c.lease_id.in_([row['lease_id'] for row in rows]))
+    ).scalars())
+    rows = [row for row in rows if row['lease_id'] not in taken]
+    if rows:
+        db.session.execute(offers_table.insert(), rows)
+    return len(rows)
+
+
+def _offer_chunk(as_of, notice_days, rent_increase, chunk_size, after):
+    """Offer renewals for one chunk of ending leases; returns (leases scanned, offers, last key)"""
+    successor = aliased(Lease)
+    query = (
+        select(Lease.id, Lease.user_id, Lease.unit_id, Lease.end_date, Lease.monthly_rent)
+        .where(
+            Lease.status == 'active',
+            Lease.end_date >= as_of,
+            Lease.end_date <= as_of + timedelta(days=notice_days),
+            ~exists().where(LeaseRenewalOffer.lease_id == Lease.id),
+            # The unit is already let to someone from the day after
+            ~exists().where(successor.unit_id == Lease.unit_id, successor.status == 'active',
+                            successor.start_date > Lease.end_date)
+        )
+        .order_by(Lease.end_date, Lease.id)
+        .limit(chunk_size)
+    )
+    if after is not None:
+        query = query.where(tuple_(Lease.end_date, Lease.id) > tuple_(*after))
+    leases = db.session.execute(query).all()
+    if not leases:
+        return 0, 0, after
+
+    now = datetime.utcnow()
+    rows = []
+    for lease in leases:
+        start = lease.end_date + timedelta(days=1)
+        rows.append({
+            'lease_id': lease.id,
+            'user_id': lease.user_id,
+            'unit_id': lease.unit_id,
+            'start_date': start,
+            'end_date': start + timedelta(days=LEASE_TERM_DAYS),
+            'monthly_rent': round((lease.monthly_rent or 0) * (1 + rent_increase), 2),
+            'status': 'offered',
+            'created_at': now
+        })
+    offered = _insert_offers(rows)
+    return len(leases), offered, (leases[-1].end_date, leases[-1].id)
+
+
+def create_renewal_offers(as_of=None, notice_days=None, rent_increase=None, chunk_size=None, log=None):
+    """Offer renewals on active leases ending within notice_days of as_of (default today)
+
+    Returns counts of leases considered and offers created.
+    """
+    as_of = as_of or date.today()
+    notice_days = notice_days if notice_days is not None else _settings('LEASE_RENEWAL_NOTICE_DAYS',
+                                                                         RENEWAL_NOTICE_DAYS)
+    rent_increase = rent_increase if rent_increase is not None else _settings('LEASE_RENEWAL_RENT_INCREASE',
+                                                                               RENEWAL_RENT_INCREASE)
+    chunk_size = chunk_size or _settings('LEASE_JOBS_CHUNK_SIZE', CHUNK_SIZE)
+    totals = {'considered': 0, 'offered': 0}
+    after = None
+    while True:
+        scanned, offered, after = run_transaction(
+            lambda: _offer_chunk(as_of, notice_days, rent_increase, chunk_size, after)
+        )
+        totals['considered'] += scanned
+        totals['offered'] += offered
+        if offered and log:
+            log(f"   offered {totals['offered']:,} renewals")
+        if scanned < chunk_size:
+            break
+    return totals
+
+
+def run_all(as_of=None, chunk_size=None, log=None):
+    """Expire ended leases, then offer renewals on those ending soon"""
+    return {
+        'expiry': expire_leases(as_of, chunk_size, log=log),
+        'renewals': create_renewal_offers(as_of, chunk_size=chunk_size, log=log)
+    }
+
+
+class LeaseJobScheduler:
+    """Flask extension running the lease jobs every LEASE_JOBS_INTERVAL_MINUTES
+
+    Off unless the interval is set. Each app process starts a daemon
+    thread on its first request, so forked gunicorn workers each get
+    one; the jobs are idempotent and overlapping runs skip each other's
+    rows, so several workers running them is only redundant work.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.interval = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = float(app.config.get('LEASE_JOBS_INTERVAL_MINUTES') or 0) * 60
+        app.extensions['lease_jobs'] = self
+        if self.interval > 0:
+            app.before_request(self._start_process)
+
+    def _start_process(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._loop, name='lease-jobs', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            self.run_once()
+            time.sleep(self.interval)
+
+    def run_once(self):
+        """Run both jobs in an app context, logging instead of raising"""
+        with self.app.app_context():
+            try:
+                results = run_all()
+                self.app.logger.info('Lease jobs: %s', results)
+            except Exception:
+                db.session.rollback()
+                self.app.logger.exception('Lease jobs failed')
+            finally:
+                db.session.remove()
+
+
+scheduler = LeaseJobScheduler()
+
+
+cli = AppGroup('leases', help='Lease expiry and renewal batch jobs')
+
+as_of_option = click.option('--as-of', type=click.DateTime(formats=['%Y-%m-%d']),
+                            help='treat this date as today (default: today)')
+chunk_option = click.option('--chunk-size', type=click.IntRange(min=1), help='leases per transaction')
+
+
+def _day(value):
+    return value.date() if value else None
+
+
+def _warn_unshared_cache():
+    # The serving processes only see this process's invalidations through a shared backend
+    if isinstance(cache.backend, MemoryBackend):
+        click.echo(f"Warning: CACHE_BACKEND is memory, so freed units stay cached as occupied by the "
+                   f"running app for up to {cache.default_ttl}s. Run with the app's CACHE_BACKEND=sqlite "
+                   f"and CACHE_SQLITE_PATH to invalidate its cache.", err=True)
+
+
+def _report(results):
+    for name, count in results.items():
+        click.echo(f"{name.replace('_', ' ')}: {count:,}")
+
+
+@cli.command('expire')
+@as_of_option
+@chunk_option
+def expire_command(as_of, chunk_size):
+    """Expire leases past their end date and free their units
+
+    Freed units reach the running app's response cache only when both use
+    CACHE_BACKEND=sqlite with the same CACHE_SQLITE_PATH; with the memory
+    backend they stay cached as occupied until CACHE_DEFAULT_TTL runs out.
+    """
+    _warn_unshared_cache()
+    started = time.perf_counter()
+    _report(expire_leases(_day(as_of), chunk_size, log=click.echo))
+    click.echo(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command('renewals')
+@as_of_option
+@chunk_option
+@click.option('--days', type=click.IntRange(min=0), help='notice period: offer on leases ending within this many days')
+@click.option('--rent-increase', type=float, help='fractional rent increase, e.g. 0.05')
+def renewals_command(as_of, chunk_size, days, rent_increase):
+    """Create renewal offers for leases ending soon"""
+    started = time.perf_counter()
+    _report(create_renewal_offers(_day(as_of), days, rent_increase, chunk_size, log=click.echo))
+    click.echo(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command('run')
+@as_of_option
+@chunk_option
+def run_command(as_of, chunk_size):
+    """Run expiry then renewal offers (for cron)
+
+    See ``expire`` for how freed units reach the running app's cache.
+    """
+    _warn_unshared_cache()
+    started = time.perf_counter()
+    for job, results in run_all(_day(as_of), chunk_size, log=click.echo).items():
+        click.echo(f"{job}:")
+        _report(results)
+    click.echo(f"Done in {time.perf_counter() - started:.1f}s")
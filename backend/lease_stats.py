@@ -0,0 +1,152 @@
+"""Lease statistics backed by incrementally maintained counters
+
+``lease_stat_counters`` holds one row per (tower, lease status) with the
+lease count, monthly rent and security deposit totals. Every code path
+that creates a lease or changes its status records the transition here in
+the same transaction, so the admin dashboard reads a handful of counter
+rows instead of scanning ``leases``.
+"""
+from collections import defaultdict
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Lease, LeaseStatCounter
+
+LEASE_STATUSES = ('active', 'expired', 'terminated')
+
+counters = LeaseStatCounter.__table__
+
+
+class LeaseDeltas:
+    """Accumulates counter changes so a batch is applied in one statement"""
+
+    def __init__(self):
+        self._deltas = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def add(self, tower_id, status, count, monthly_rent, deposit):
+        delta = self._deltas[(tower_id, status)]
+        delta[0] += count
+        delta[1] += count * (monthly_rent or 0)
+        delta[2] += count * (deposit or 0)
+
+    def transition(self, tower_id, old_status, new_status, monthly_rent, deposit, count=1):
+        """Record leases moving from old_status (None when new) to new_status"""
+        if old_status == new_status:
+            return
+        if old_status is not None:
+            self.add(tower_id, old_status, -count, monthly_rent, deposit)
+        if new_status is not None:
+            self.add(tower_id, new_status, count, monthly_rent, deposit)
+
+    def rows(self):
+        return [
+            {'tower_id': tower_id, 'status': status, 'lease_count': count,
+             'monthly_rent_total': rent, 'deposit_total': deposit}
+            for (tower_id, status), (count, rent, deposit) in self._deltas.items()
+        ]
+
+
+def apply_deltas(deltas):
+    """Add accumulated deltas to the counter table within the current transaction"""
+    rows = deltas.rows()
+    if not rows:
+        return
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(counters)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[counters.c.tower_id, counters.c.status],
+            set_={
+                'lease_count': counters.c.lease_count + stmt.excluded.lease_count,
+                'monthly_rent_total': counters.c.monthly_rent_total + stmt.excluded.monthly_rent_total,
+                'deposit_total': counters.c.deposit_total + stmt.excluded.deposit_total,
+            }
+        )
+        db.session.execute(stmt, rows)
+        return
+
+    for row in rows:
+        result = db.session.execute(
+            counters.update()
+            .where(counters.c.tower_id == row['tower_id'], counters.c.status == row['status'])
+            .values(
+                lease_count=counters.c.lease_count + row['lease_count'],
+                monthly_rent_total=counters.c.monthly_rent_total + row['monthly_rent_total'],
+                deposit_total=counters.c.deposit_total + row['deposit_total'],
+            )
+        )
+        if result.rowcount == 0:
+            db.session.execute(counters.insert().values(**row))
+
+
+def record_transition(tower_id, old_status, new_status, monthly_rent, deposit):
+    """Record a single lease creation or status change"""
+    deltas = LeaseDeltas()
+    deltas.transition(tower_id, old_status, new_status, monthly_rent, deposit)
+    apply_deltas(deltas)
+
+
+def _summarize(rows):
+    """Build the stats payload from (status, count, rent, deposit) rows"""
+    by_status = {status: (0, 0.0, 0.0) for status in LEASE_STATUSES}
+    for status, count, rent, deposit in rows:
+        by_status[status] = (int(count or 0), float(rent or 0), float(deposit or 0))
+
+    active_count, active_rent, active_deposits = by_status['active']
+    return {
+        'total_leases': sum(count for count, _, _ in by_status.values()),
+        'active_leases': active_count,
+        'expired_leases': by_status['expired'][0],
+        'terminated_leases': by_status['terminated'][0],
+        'monthly_rent_under_management': active_rent,
+        'deposits_held': active_deposits
+    }
+
+
+def counter_stats():
+    """Dashboard stats read from the maintained counters"""
+    rows = db.session.query(
+        counters.c.status,
+        func.sum(counters.c.lease_count),
+        func.sum(counters.c.monthly_rent_total),
+        func.sum(counters.c.deposit_total)
+    ).group_by(counters.c.status).all()
+    return _summarize(rows)
+
+
+def counter_stats_by_tower():
+    """Per-tower breakdown read from the maintained counters"""
+    towers = {}
+    for row in LeaseStatCounter.query.order_by(LeaseStatCounter.tower_id):
+        towers.setdefault(row.tower_id, []).append(
+            (row.status, row.lease_count, row.monthly_rent_total, row.deposit_total)
+        )
+    return [dict(_summarize(rows), tower_id=tower_id) for tower_id, rows in towers.items()]
+
+
+def live_stats():
+    """Dashboard stats from a single grouped pass over leases"""
+    rows = db.session.query(
+        Lease.status,
+        func.count(Lease.id),
+        func.sum(Lease.monthly_rent),
+        func.sum(Lease.security_deposit)
+    ).group_by(Lease.status).all()
+    return _summarize(rows)
+
+
+REBUILD_SQL = """
+INSERT INTO lease_stat_counters (tower_id, status, lease_count, monthly_rent_total, deposit_total)
+SELECT units.tower_id, leases.status, COUNT(leases.id),
+       COALESCE(SUM(leases.monthly_rent), 0), COALESCE(SUM(leases.security_deposit), 0)
+FROM leases JOIN units ON units.id = leases.unit_id
+WHERE leases.status IS NOT NULL
+GROUP BY units.tower_id, leases.status
+"""
+
+
+def rebuild_counters():
+    """Recompute every counter from leases (one grouped INSERT ... SELECT)"""
+    db.session.execute(counters.delete())
+    db.session.execute(text(REBUILD_SQL))
@@ -0,0 +1,103 @@
+"""Per-lease rent ledger
+
+One joined aggregate query returns each lease with its rent due to date,
+completed payment total and last payment date, so payments are summed in
+the database rather than loaded into Python. One month's rent falls due
+at the start of every monthly period that has begun by ``as_of`` and
+before the lease's end date; the period count is computed in SQL, so the
+outstanding filter and the totals see the same numbers as the entries.
+
+The endpoint pages the query on lease id, and ``ledger_totals`` sums the
+same query without paging, so totals cover every lease matching the
+filters rather than just the page returned.
+"""
+from datetime import timedelta
+from sqlalchemy import case, extract, func
+from models import db, Lease, Payment, Unit
+
+
+def _day_before(column):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column, '-1 day')
+    return column - timedelta(days=1)
+
+
+def rent_due_expression(as_of):
+    """SQL expression: monthly rent times the rent periods begun by as_of"""
+    last_day = _day_before(Lease.end_date)
+    cutoff = case((last_day < as_of, last_day), else_=as_of)
+    months = (
+        (extract('year', cutoff) - extract('year', Lease.start_date)) * 12
+        + extract('month', cutoff) - extract('month', Lease.start_date)
+        - case((extract('day', cutoff) < extract('day', Lease.start_date), 1), else_=0)
+    )
+    periods = case((cutoff < Lease.start_date, 0), else_=months + 1)
+    return periods * Lease.monthly_rent
+
+
+def ledger_query(as_of, user_id=None, lease_id=None, tower_id=None, status=None, outstanding_only=False):
+    """Leases joined with their rent due and aggregated completed payments"""
+    completed = Payment.status == 'completed'
+    rent_due = rent_due_expression(as_of)
+    total_paid = func.coalesce(func.sum(case((completed, Payment.amount), else_=0)), 0)
+    last_payment = func.max(case((completed, Payment.payment_date), else_=None))
+
+    query = db.session.query(
+        Lease.id, Lease.user_id, Lease.unit_id, Lease.status, Lease.start_date,
+        Lease.end_date, Lease.monthly_rent, rent_due.label('rent_due'),
+        total_paid.label('total_paid'), last_payment.label('last_payment_date')
+    ).outerjoin(Payment, Payment.lease_id == Lease.id)
+
+    if user_id is not None:
+        query = query.filter(Lease.user_id == user_id)
+    if lease_id is not None:
+        query = query.filter(Lease.id == lease_id)
+    if status:
+        query = query.filter(Lease.status == status)
+    if tower_id is not None:
+        query = query.join(Unit, Unit.id == Lease.unit_id).filter(Unit.tower_id == tower_id)
+
+    query = query.group_by(Lease.id)
+    if outstanding_only:
+        query = query.having(rent_due - total_paid > 0)
+    return query
+
+
+def ledger_entries(rows):
+    """Ledger entries for aggregated rows"""
+    entries = []
+    for row in rows:
+        rent_due = float(row.rent_due or 0)
+        total_paid = float(row.total_paid or 0)
+        last_payment = row.last_payment_date
+        entries.append({
+            'lease_id': row.id,
+            'user_id': row.user_id,
+            'unit_id': row.unit_id,
+            'status': row.status,
+            'start_date': row.start_date.isoformat(),
+            'end_date': row.end_date.isoformat(),
+            'monthly_rent': row.monthly_rent,
+            'rent_due': rent_due,
+            'total_paid': total_paid,
+            'outstanding_balance': rent_due - total_paid,
+            'last_payment_date': last_payment.isoformat() if last_payment else None
+        })
+    return entries
+
+
+def ledger_totals(query):
+    """Totals over every lease the (unpaged) ledger query matches"""
+    ledger = query.subquery()
+    count, rent_due, total_paid = db.session.query(
+        func.count(ledger.c.id),
+        func.coalesce(func.sum(ledger.c.rent_due), 0),
+        func.coalesce(func.sum(ledger.c.total_paid), 0)
+    ).one()
+    rent_due, total_paid = float(rent_due), float(total_paid)
+    return {
+        'lease_count': count,
+        'rent_due': rent_due,
+        'total_paid': total_paid,
+        'outstanding_balance': rent_due - total_paid
+    }
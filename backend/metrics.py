@@ -0,0 +1,379 @@
+"""Request, SQL and connection-pool metrics in Prometheus text format
+
+Every request records, labelled by method and URL rule:
+- ``http_requests_total`` by status code
+- ``http_request_duration_seconds``: time until the response (for
+  streamed responses, until the last chunk) is sent
+- ``http_response_size_bytes``
+- ``db_statements_per_request`` and ``db_time_per_request_seconds``,
+  counted by SQLAlchemy cursor events
+Plus ``db_pool_checkout_wait_seconds``, the time spent waiting for a
+pooled connection. Everything is served on ``GET /metrics``. Outside
+production, responses also carry an ``X-Query-Count`` header; for
+streamed responses it counts the statements issued before the first
+chunk.
+
+Each process keeps its own registry. With ``METRICS_DIR`` set (the
+gunicorn config does this), every worker writes a snapshot there every
+few seconds, and ``/metrics`` sums the snapshots of all workers, so the
+counters do not depend on which worker answers the scrape. When a
+worker exits, gunicorn's ``child_exit`` hook folds its snapshot into
+``exited.json``, so counters never go backwards and the directory holds
+one file per live worker plus that one. Scrapes read under a shared
+lock and folding takes it exclusively, so a scrape never sees a worker
+counted twice or not at all. The directory is emptied when gunicorn
+starts.
+
+In production, ``/metrics`` answers 403 unless ``METRICS_TOKEN`` is set,
+and then requires it as a bearer token.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, request, jsonify, has_request_context
+from sqlalchemy import event
+from models import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+# name -> (help text, buckets)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Request latency by route', LATENCY_BUCKETS),
+    'http_response_size_bytes': ('Response body size by route', SIZE_BUCKETS),
+    'db_statements_per_request': ('SQL statements issued per request', STATEMENT_BUCKETS),
+    'db_time_per_request_seconds': ('Time spent executing SQL per request', LATENCY_BUCKETS),
+    'db_pool_checkout_wait_seconds': ('Time waiting for a pooled database connection', POOL_WAIT_BUCKETS),
+}
+COUNTERS = {
+    'http_requests_total': 'Requests by route and status code',
+}
+FLUSH_SECONDS = 5
+EXITED_SNAPSHOT = 'exited.json'
+
+
+class Registry:
+    """Counters and histograms keyed by (name, labels)
+
+    A histogram is stored as per-bucket counts (the last one is +Inf)
+    followed by the sum of observed values.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def _observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        series = self.histograms.get((name, labels))
+        if series is None:
+            series = self.histograms[(name, labels)] = [0] * (len(buckets) + 2)
+        series[bisect_left(buckets, value)] += 1
+        series[-1] += value
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            self._observe(name, labels, value)
+
+    def record(self, counters, observations):
+        """Apply one request's counter increments and observations under a single lock"""
+        with self._lock:
+            for name, labels in counters:
+                self.counters[(name, labels)] = self.counters.get((name, labels), 0) + 1
+            for name, labels, value in observations:
+                self._observe(name, labels, value)
+
+    def clear(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(series)]
+                               for (name, labels), series in self.histograms.items()]
+            }
+
+    def merge(self, snapshot):
+        """Add the values of a snapshot to this registry"""
+        with self._lock:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                if name not in HISTOGRAMS or len(values) != len(HISTOGRAMS[name][1]) + 2:
+                    continue  # written by a version with different buckets
+                key = (name, tuple(map(tuple, labels)))
+                series = self.histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    series[i] += value
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for name, help_text in COUNTERS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (series_name, labels), value in sorted(self.counters.items()):
+                    if series_name == name:
+                        lines.append(f'{name}{_labels(labels)} {value}')
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for (series_name, labels), series in sorted(self.histograms.items()):
+                    if series_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ('+Inf',), series):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}')
+                    lines.append(f'{name}_sum{_labels(labels)} {_number(series[-1])}')
+                    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def _number(value):
+    return value if isinstance(value, str) else repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Metrics:
+    """Flask extension recording per-request metrics and serving /metrics"""
+
+    def __init__(self):
+        self.registry = Registry()
+        self.directory = None
+        self.token = None
+        self.query_header = False
+        self.production = False
+        self._pid = None
+        self._path = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.directory = app.config.get('METRICS_DIR') or None
+        self.token = app.config.get('METRICS_TOKEN') or None
+        self.production = app.config.get('PRODUCTION', False)
+        self.query_header = app.config.get('METRICS_QUERY_HEADER', not app.config.get('PRODUCTION'))
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+        with app.app_context():
+            self._instrument(db.engine)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_response)
+        app.teardown_request(self._record_request)
+        app.add_url_rule('/metrics', 'metrics', self._serve)
+        app.extensions['metrics'] = self
+
+    # SQLAlchemy instrumentation
+
+    def _instrument(self, engine):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine, 'engine_disposed', lambda disposed: self._time_checkouts(disposed.pool))
+        self._time_checkouts(engine.pool)
+
+    def _time_checkouts(self, pool):
+        """Wrap the pool's blocking get so waits for a free connection are observed"""
+        get = pool._do_get
+        registry = self.registry
+
+        def timed_get():
+            started = time.perf_counter()
+            try:
+                return get()
+            finally:
+                registry.observe('db_pool_checkout_wait_seconds', (), time.perf_counter() - started)
+        pool._do_get = timed_get
+
+    # Request hooks
+
+    def _start_request(self):
+        if self._pid != os.getpid():
+            self._start_process()
+        g.metrics = RequestStats()
+
+    def _finish_response(self, response):
+        stats = g.get('metrics')
+        if stats is None:
+            return response
+        if self.query_header:
+            response.headers['X-Query-Count'] = str(stats.statements)
+        stats.status = response.status_code
+        if response.is_streamed:
+            # Count bytes as they are sent; teardown runs after the last chunk
+            response.response = _counting(response.response, stats)
+        else:
+            stats.size = response.content_length or 0
+        return response
+
+    def _record_request(self, exc):
+        stats = g.pop('metrics', None)
+        if stats is None:
+            return
+        rule = request.url_rule
+        labels = (('method', request.method), ('route', rule.rule if rule else '<unmatched>'))
+        status = 500 if exc is not None else stats.status
+        self.registry.record(
+            [('http_requests_total', labels + (('status', str(status)),))],
+            [
+                ('http_request_duration_seconds', labels, time.perf_counter() - stats.started),
+                ('http_response_size_bytes', labels, stats.size),
+                ('db_statements_per_request', labels, stats.statements),
+                ('db_time_per_request_seconds', labels, stats.db_time),
+            ]
+        )
+
+    # Multi-process snapshots
+
+    def _start_process(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked from a process that already recorded requests
+                self.registry.clear()
+            self._pid = os.getpid()
+            if not self.directory:
+                return
+            self._path = os.path.join(self.directory, f'{self._pid}-{time.time_ns()}.json')
+            threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True).start()
+            atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot for the other workers' /metrics"""
+        if not self._path or self._pid != os.getpid():
+            return
+        temporary = f'{self._path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.registry.snapshot(), handle)
+        os.replace(temporary, self._path)
+
+    def render(self):
+        """Metrics of every worker sharing METRICS_DIR, or of this process alone"""
+        if not self.directory:
+            return self.registry.render()
+        merged = Registry()
+        with _directory_lock(self.directory, fcntl.LOCK_SH):
+            for path in glob.glob(os.path.join(self.directory, '*.json')):
+                if path == self._path:
+                    continue
+                _merge_file(merged, path)
+        merged.merge(self.registry.snapshot())
+        return merged.render()
+
+    def _serve(self):
+        if self.production and not self.token:
+            return jsonify({'error': 'Set METRICS_TOKEN to serve metrics in production'}), 403
+        if self.token and request.headers.get('Authorization') != f'Bearer {self.token}':
+            return jsonify({'error': 'Metrics token required'}), 401
+        return self.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@contextmanager
+def _directory_lock(directory, operation):
+    with open(os.path.join(directory, '.lock'), 'a') as handle:
+        fcntl.flock(handle, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _merge_file(registry, path):
+    try:
+        with open(path) as handle:
+            registry.merge(json.load(handle))
+    except (OSError, ValueError):
+        pass  # replaced mid-scrape or left half-written by a killed worker
+
+
+def fold_exited(directory, pid):
+    """Add an exited worker's snapshots to exited.json and delete them
+
+    Called by gunicorn's child_exit hook in the master process, after the
+    worker's last flush.
+    """
+    snapshots = glob.glob(os.path.join(directory, f'{pid}-*.json'))
+    if not snapshots:
+        return
+    exited = os.path.join(directory, EXITED_SNAPSHOT)
+    with _directory_lock(directory, fcntl.LOCK_EX):
+        folded = Registry()
+        for path in [exited] + snapshots:
+            if os.path.exists(path):
+                _merge_file(folded, path)
+        temporary = f'{exited}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(folded.snapshot(), handle)
+        os.replace(temporary, exited)
+        for path in snapshots + glob.glob(os.path.join(directory, f'{pid}-*.json.tmp')):
+            os.remove(path)
+
+
+class RequestStats:
+    """What one request has done so far"""
+    __slots__ = ('started', 'statements', 'db_time', 'status', 'size')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_time = 0.0
+        self.status = 500
+        self.size = 0
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    stats = g.get('metrics')
+    if stats is None:
+        return
+    stats.statements += 1
+    started = getattr(context, '_metrics_started', None)
+    if started is not None:
+        stats.db_time += time.perf_counter() - started
+
+
+def _counting(chunks, stats):
+    try:
+        for chunk in chunks:
+            stats.size += len(chunk)
+            yield chunk
+    finally:
+        # Closing the wrapped iterable lets stream_with_context pop its context
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+metrics = Metrics()
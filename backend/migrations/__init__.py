@@ -0,0 +1,143 @@
+"""Versioned schema migrations
+
+Each module in ``migrations/versions`` is named ``NNNN_description.py``
+and defines ``upgrade(connection)``. Versions are applied in order, each
+in its own transaction, and recorded in the ``schema_migrations`` table.
+
+Migrations are applied by the release step, never by the app itself:
+
+    flask --app app db upgrade
+
+Serving processes only call ``check()``, which reads ``schema_migrations``
+and refuses to start when the database is not at the version the code
+expects.
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, text
+
+from migrations import versions
+
+VERSION_MODULE_PATTERN = re.compile(r'^(\d{4})_(\w+)$')
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+class SchemaMismatchError(RuntimeError):
+    """Raised when the database schema does not match the code"""
+
+
+def discover():
+    """Return [(version, name, module)] for every migration, in order"""
+    found = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = VERSION_MODULE_PATTERN.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f'{versions.__name__}.{module_info.name}')
+        found.append((int(match.group(1)), match.group(2), module))
+    return sorted(found, key=lambda migration: migration[0])
+
+
+def applied_versions(connection):
+    """Return the set of versions recorded in schema_migrations"""
+    if not inspect(connection).has_table(schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(engine):
+    """Return (pending, unknown): versions not applied yet, and applied versions this code does not know"""
+    with engine.connect() as connection:
+        done = applied_versions(connection)
+    expected = {version for version, _, _ in discover()}
+    return sorted(expected - done), sorted(done - expected)
+
+
+def check(engine):
+    """Raise SchemaMismatchError unless every known migration, and nothing newer, is applied"""
+    missing, unknown = pending(engine)
+    if missing:
+        raise SchemaMismatchError(
+            f"Database schema is missing migrations {', '.join(f'{v:04d}' for v in missing)}; "
+            f"run 'flask --app app db upgrade' before starting the server"
+        )
+    if unknown:
+        raise SchemaMismatchError(
+            f"Database schema has migrations {', '.join(f'{v:04d}' for v in unknown)} "
+            f"that this code does not know; deploy the matching code version"
+        )
+
+
+def upgrade(engine, log=print):
+    """Apply all pending migrations; returns the list of versions applied"""
+    with engine.begin() as connection:
+        schema_migrations.create(connection, checkfirst=True)
+        done = applied_versions(connection)
+
+    applied = []
+    for version, name, module in discover():
+        if version in done:
+            continue
+        log(f"Applying migration {version:04d}_{name}...")
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append(version)
+    return applied
+
+
+def reset(engine, log=print):
+    """Drop every table in the database, then re-apply all migrations"""
+    with engine.begin() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Virtual tables own shadow tables that must not be dropped directly
+            virtual = connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND sql LIKE 'CREATE VIRTUAL TABLE%'"
+            )).scalars().all()
+            for name in virtual:
+                connection.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        existing = MetaData()
+        existing.reflect(connection)
+        existing.drop_all(connection)
+    return upgrade(engine, log=log)
+
+
+cli = AppGroup('db', help='Database schema migrations')
+
+
+def _engine():
+    return current_app.extensions['sqlalchemy'].engine
+
+
+@cli.command('upgrade')
+def upgrade_command():
+    """Apply pending migrations"""
+    applied = upgrade(_engine(), log=click.echo)
+    click.echo(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+
+
+@cli.command('status')
+def status_command():
+    """Show applied and pending migrations; exits 1 when not up to date"""
+    with _engine().connect() as connection:
+        done = applied_versions(connection)
+    for version, name, _ in discover():
+        click.echo(f"{'applied' if version in done else 'pending'}  {version:04d}_{name}")
+    try:
+        check(_engine())
+    except SchemaMismatchError as e:
+        raise click.ClickException(str(e))
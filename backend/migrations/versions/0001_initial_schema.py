@@ -0,0 +1,99 @@
+"""Initial schema as originally created by db.create_all()
+
+The tables are frozen here rather than taken from models.py so later
+migrations can evolve columns and indexes independently. Existing
+databases that were bootstrapped with create_all() are left untouched.
+"""
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Float, Boolean, Date, DateTime, ForeignKey
+)
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('email', String(120), unique=True, nullable=False, index=True),
+    Column('password_hash', String(255), nullable=False),
+    Column('name', String(100), nullable=False),
+    Column('phone', String(20)),
+    Column('role', String(20), default='user'),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'towers', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('address', String(255), nullable=False),
+    Column('total_floors', Integer),
+    Column('description', Text),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'units', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('tower_id', Integer, ForeignKey('towers.id'), nullable=False),
+    Column('unit_number', String(20), nullable=False),
+    Column('floor', Integer),
+    Column('bedrooms', Integer),
+    Column('bathrooms', Integer),
+    Column('size_sqft', Integer),
+    Column('rent_amount', Float, nullable=False),
+    Column('status', String(20), default='available'),
+    Column('description', Text),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'amenities', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('description', Text),
+    Column('availability_hours', String(100)),
+    Column('is_active', Boolean, default=True),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'bookings', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('unit_id', Integer, ForeignKey('units.id'), nullable=False),
+    Column('requested_move_in_date', Date, nullable=False),
+    Column('status', String(20), default='pending'),
+    Column('admin_comments', Text),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Column('updated_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'leases', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('booking_id', Integer, ForeignKey('bookings.id'), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('unit_id', Integer, ForeignKey('units.id'), nullable=False),
+    Column('start_date', Date, nullable=False),
+    Column('end_date', Date, nullable=False),
+    Column('monthly_rent', Float, nullable=False),
+    Column('security_deposit', Float),
+    Column('status', String(20), default='active'),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'payments', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('lease_id', Integer, ForeignKey('leases.id'), nullable=False),
+    Column('amount', Float, nullable=False),
+    Column('payment_date', Date, nullable=False),
+    Column('payment_method', String(50)),
+    Column('status', String(20), default='completed'),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,43 @@
+"""Composite and partial indexes for the list endpoints' filter/sort paths
+
+- units: tower/status/bedrooms filters, (created_at, id) paging, and a
+  partial index over available units
+- bookings/leases: per-user and per-status listings ordered by
+  created_at, foreign-key lookups, and a partial index over pending
+  bookings
+- payments: per-lease history ordered by payment_date
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_towers_created_at_id ON towers (created_at, id)",
+
+    "CREATE INDEX IF NOT EXISTS ix_units_tower_status ON units (tower_id, status)",
+    "CREATE INDEX IF NOT EXISTS ix_units_status_bedrooms ON units (status, bedrooms)",
+    "CREATE INDEX IF NOT EXISTS ix_units_created_at_id ON units (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_units_available ON units (tower_id, bedrooms) "
+    "WHERE status = 'available'",
+
+    "CREATE INDEX IF NOT EXISTS ix_amenities_active_created_at ON amenities (is_active, created_at, id)",
+
+    "CREATE INDEX IF NOT EXISTS ix_bookings_user_created_at ON bookings (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_status_created_at ON bookings (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_created_at_id ON bookings (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_unit_id ON bookings (unit_id)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_pending ON bookings (unit_id, created_at) "
+    "WHERE status = 'pending'",
+
+    "CREATE INDEX IF NOT EXISTS ix_leases_user_created_at ON leases (user_id, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_leases_status_created_at ON leases (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_leases_created_at_id ON leases (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_leases_unit_id ON leases (unit_id)",
+    "CREATE INDEX IF NOT EXISTS ix_leases_booking_id ON leases (booking_id)",
+
+    "CREATE INDEX IF NOT EXISTS ix_payments_lease_payment_date ON payments (lease_id, payment_date, id)",
+    "CREATE INDEX IF NOT EXISTS ix_payments_payment_date_id ON payments (payment_date, id)",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
@@ -0,0 +1,54 @@
+"""Indexes backing the unit search API
+
+- range/sort indexes on rent_amount and size_sqft, plus (status,
+  rent_amount) for the common "available units by price" search
+- full-text index on units.description: a GIN tsvector expression index
+  on Postgres, an external-content FTS5 table kept in sync by triggers on
+  SQLite (skipped if the SQLite build lacks FTS5)
+"""
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_units_rent_amount_id ON units (rent_amount, id)",
+    "CREATE INDEX IF NOT EXISTS ix_units_status_rent_amount ON units (status, rent_amount)",
+    "CREATE INDEX IF NOT EXISTS ix_units_size_sqft ON units (size_sqft)",
+]
+
+POSTGRES_FTS = [
+    "CREATE INDEX IF NOT EXISTS ix_units_description_fts ON units "
+    "USING GIN (to_tsvector('english', coalesce(description, '')))",
+]
+
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS units_fts "
+    "USING fts5(description, content='units', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS units_fts_insert AFTER INSERT ON units BEGIN "
+    "INSERT INTO units_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS units_fts_delete AFTER DELETE ON units BEGIN "
+    "INSERT INTO units_fts (units_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS units_fts_update AFTER UPDATE OF description ON units BEGIN "
+    "INSERT INTO units_fts (units_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO units_fts (rowid, description) VALUES (new.id, new.description); END",
+    "INSERT INTO units_fts (units_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
+
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        for statement in POSTGRES_FTS:
+            connection.execute(text(statement))
+    elif dialect == 'sqlite':
+        try:
+            connection.execute(text(SQLITE_FTS[0]))
+        except OperationalError:
+            # No FTS5 in this SQLite build; text search falls back to LIKE
+            return
+        for statement in SQLITE_FTS[1:]:
+            connection.execute(text(statement))
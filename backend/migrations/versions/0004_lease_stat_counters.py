@@ -0,0 +1,32 @@
+"""Per-tower, per-status lease counters for the admin dashboard
+
+Creates lease_stat_counters and backfills it from existing leases with a
+single grouped INSERT ... SELECT.
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Float, text
+
+metadata = MetaData()
+
+lease_stat_counters = Table(
+    'lease_stat_counters', metadata,
+    Column('tower_id', Integer, primary_key=True),
+    Column('status', String(20), primary_key=True),
+    Column('lease_count', Integer, nullable=False, default=0),
+    Column('monthly_rent_total', Float, nullable=False, default=0),
+    Column('deposit_total', Float, nullable=False, default=0)
+)
+
+BACKFILL = """
+INSERT INTO lease_stat_counters (tower_id, status, lease_count, monthly_rent_total, deposit_total)
+SELECT units.tower_id, leases.status, COUNT(leases.id),
+       COALESCE(SUM(leases.monthly_rent), 0), COALESCE(SUM(leases.security_deposit), 0)
+FROM leases JOIN units ON units.id = leases.unit_id
+WHERE leases.status IS NOT NULL
+GROUP BY units.tower_id, leases.status
+"""
+
+
+def upgrade(connection):
+    lease_stat_counters.create(connection, checkfirst=True)
+    connection.execute(lease_stat_counters.delete())
+    connection.execute(text(BACKFILL))
@@ -0,0 +1,14 @@
+"""Optimistic-locking version columns on bookings and units"""
+from sqlalchemy import inspect, text
+
+VERSIONED_TABLES = ('bookings', 'units')
+
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    for table in VERSIONED_TABLES:
+        columns = {column['name'] for column in inspector.get_columns(table)}
+        if 'version' not in columns:
+            connection.execute(text(
+                f'ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1'
+            ))
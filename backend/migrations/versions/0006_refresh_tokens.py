@@ -0,0 +1,22 @@
+"""Refresh tokens issued at login, for rotation and revocation"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, ForeignKey, Index
+
+metadata = MetaData()
+
+Table('users', metadata, Column('id', Integer, primary_key=True))
+
+refresh_tokens = Table(
+    'refresh_tokens', metadata,
+    Column('jti', String(36), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('family', String(36), nullable=False),
+    Column('expires_at', DateTime, nullable=False),
+    Column('revoked_at', DateTime),
+    Column('created_at', DateTime),
+    Index('ix_refresh_tokens_user_id', 'user_id'),
+    Index('ix_refresh_tokens_family', 'family')
+)
+
+
+def upgrade(connection):
+    refresh_tokens.create(connection, checkfirst=True)
@@ -0,0 +1,30 @@
+"""Indexes backing date-window unit availability (see availability.py)
+
+- partial (unit_id, start_date, end_date) index over active leases and
+  (unit_id, requested_move_in_date) over pending bookings, for the
+  per-unit overlap probes
+- on Postgres, a GiST index over the active leases' inclusive daterange,
+  so the leases overlapping a window can be found without a per-unit probe
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_leases_active_unit_dates ON leases (unit_id, start_date, end_date) "
+    "WHERE status = 'active'",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_pending_move_in ON bookings (unit_id, requested_move_in_date) "
+    "WHERE status = 'pending'",
+]
+
+POSTGRES_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_leases_active_period ON leases "
+    "USING GIST (daterange(start_date, end_date, '[]')) WHERE status = 'active'",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
+
+    if connection.dialect.name == 'postgresql':
+        for statement in POSTGRES_INDEXES:
+            connection.execute(text(statement))
@@ -0,0 +1,94 @@
+"""Amenity opening hours, slot settings and reservations
+
+- amenities gain opens_at/closes_at, backfilled from availability_hours
+  strings like "6:00 AM - 10:00 PM" ("24/7" and anything unparseable
+  stay open all day), and slot_minutes/slot_capacity, left unset so no
+  existing amenity becomes reservable until an admin configures it
+- amenity_reservations, with a partial unique index allowing one
+  confirmed reservation per resident and slot
+- amenity_slots, the per-slot counter of confirmed reservations
+"""
+import re
+from datetime import time
+from sqlalchemy import (MetaData, Table, Column, Integer, String, DateTime, Time, ForeignKey, Index,
+                        inspect, select, text)
+
+metadata = MetaData()
+
+Table('users', metadata, Column('id', Integer, primary_key=True))
+
+amenities = Table(
+    'amenities', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('availability_hours', String(100)),
+    Column('opens_at', Time),
+    Column('closes_at', Time)
+)
+
+amenity_reservations = Table(
+    'amenity_reservations', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('amenity_id', Integer, ForeignKey('amenities.id'), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('slot_start', DateTime, nullable=False),
+    Column('slot_end', DateTime, nullable=False),
+    Column('status', String(20)),
+    Column('created_at', DateTime),
+    Column('cancelled_at', DateTime),
+    Index('ix_amenity_reservations_slot_start_id', 'slot_start', 'id'),
+    Index('ix_amenity_reservations_user_slot', 'user_id', 'slot_start', 'id'),
+    Index('ix_amenity_reservations_amenity_slot', 'amenity_id', 'slot_start', 'id'),
+    Index('ix_amenity_reservations_confirmed', 'amenity_id', 'slot_start', 'user_id', unique=True,
+          postgresql_where=text("status = 'confirmed'"), sqlite_where=text("status = 'confirmed'"))
+)
+
+amenity_slots = Table(
+    'amenity_slots', metadata,
+    Column('amenity_id', Integer, ForeignKey('amenities.id'), primary_key=True),
+    Column('slot_start', DateTime, primary_key=True),
+    Column('reserved', Integer, nullable=False, default=0)
+)
+
+NEW_COLUMNS = [
+    ('opens_at', 'TIME'),
+    ('closes_at', 'TIME'),
+    ('slot_minutes', 'INTEGER'),
+    ('slot_capacity', 'INTEGER'),
+]
+
+CLOCK_TIME = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*([AaPp])\.?[Mm]')
+
+
+def parse_hours(hours):
+    """(opens_at, closes_at) from a "6:00 AM - 10:00 PM" string, or (None, None)"""
+    found = CLOCK_TIME.findall(hours or '')
+    if len(found) != 2:
+        return None, None
+    parsed = []
+    for hour, minute, meridiem in found:
+        hour, minute = int(hour), int(minute or 0)
+        if not 1 <= hour <= 12 or minute > 59:
+            return None, None
+        parsed.append(time(hour % 12 + (12 if meridiem in 'Pp' else 0), minute))
+    opens_at, closes_at = parsed
+    if closes_at <= opens_at:
+        return None, None
+    return opens_at, closes_at
+
+
+def upgrade(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns('amenities')}
+    for name, sql_type in NEW_COLUMNS:
+        if name not in columns:
+            connection.execute(text(f'ALTER TABLE amenities ADD COLUMN {name} {sql_type}'))
+
+    amenity_reservations.create(connection, checkfirst=True)
+    amenity_slots.create(connection, checkfirst=True)
+
+    for amenity_id, hours in connection.execute(select(amenities.c.id, amenities.c.availability_hours)):
+        opens_at, closes_at = parse_hours(hours)
+        if opens_at:
+            connection.execute(
+                amenities.update().where(amenities.c.id == amenity_id)
+                .values(opens_at=opens_at, closes_at=closes_at)
+            )
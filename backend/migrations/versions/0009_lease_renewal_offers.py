@@ -0,0 +1,41 @@
+"""Lease expiry and renewal batch jobs (see lease_jobs.py)
+
+- partial (end_date, id) index over active leases, walked in chunks by
+  both the expiry job and the renewal-offer job
+- lease_renewal_offers, at most one per lease
+"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, Date, DateTime, Float, ForeignKey, Index, text
+
+metadata = MetaData()
+
+Table('users', metadata, Column('id', Integer, primary_key=True))
+Table('units', metadata, Column('id', Integer, primary_key=True))
+Table('leases', metadata, Column('id', Integer, primary_key=True))
+
+lease_renewal_offers = Table(
+    'lease_renewal_offers', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('lease_id', Integer, ForeignKey('leases.id'), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('unit_id', Integer, ForeignKey('units.id'), nullable=False),
+    Column('start_date', Date, nullable=False),
+    Column('end_date', Date, nullable=False),
+    Column('monthly_rent', Float, nullable=False),
+    Column('status', String(20)),
+    Column('created_at', DateTime),
+    Index('ix_lease_renewal_offers_lease_id', 'lease_id', unique=True),
+    Index('ix_lease_renewal_offers_user_created_at', 'user_id', 'created_at', 'id'),
+    Index('ix_lease_renewal_offers_status_created_at', 'status', 'created_at', 'id'),
+    Index('ix_lease_renewal_offers_created_at_id', 'created_at', 'id')
+)
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_leases_active_end_date ON leases (end_date, id) "
+    "WHERE status = 'active'",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
+    lease_renewal_offers.create(connection, checkfirst=True)
@@ -0,0 +1,22 @@
+"""Access token revocations shared by every app process"""
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, ForeignKey, Index, inspect, text
+
+metadata = MetaData()
+
+Table('users', metadata, Column('id', Integer, primary_key=True))
+
+revoked_tokens = Table(
+    'revoked_tokens', metadata,
+    Column('jti', String(36), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('expires_at', DateTime, nullable=False),
+    Column('revoked_at', DateTime, nullable=False),
+    Index('ix_revoked_tokens_expires_at', 'expires_at')
+)
+
+
+def upgrade(connection):
+    revoked_tokens.create(connection, checkfirst=True)
+    columns = {column['name'] for column in inspect(connection).get_columns('users')}
+    if 'tokens_revoked_at' not in columns:
+        connection.execute(text('ALTER TABLE users ADD COLUMN tokens_revoked_at TIMESTAMP'))
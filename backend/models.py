@@ -1,9 +1,37 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, text, Index
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import passwords
 
 db = SQLAlchemy()
 
+
+def partial_index(name, *columns, where, unique=False):
+    """Index restricted to rows matching a SQL predicate (Postgres and SQLite)"""
+    return Index(name, *columns, unique=unique, postgresql_where=text(where), sqlite_where=text(where))
+
+
+class LoadProfileMixin:
+    """Named eager-loading profiles so list endpoints avoid N+1 lazy loads"""
+    
+    # Maps profile name -> callable returning loader options. Callables are
+    # used because backref attributes only exist once mappers are configured.
+    __load_profiles__ = {}
+    
+    @classmethod
+    def load_options(cls, profile):
+        """Return the loader options registered for a profile"""
+        factory = cls.__load_profiles__.get(profile)
+        return factory() if factory else []
+    
+    @classmethod
+    def query_with(cls, profile):
+        """Return a query with the profile's loader options applied"""
+        return cls.query.options(*cls.load_options(profile))
+
+
 class User(db.Model):
     """User model for both tenants and admins"""
     __tablename__ = 'users'
@@ -15,14 +43,17 @@ class User(db.Model):
     phone = db.Column(db.String(20))
     role = db.Column(db.String(20), default='user')  # 'user' or 'admin'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    tokens_revoked_at = db.Column(db.DateTime)  # access tokens issued before this are rejected
     
     # Relationships
     bookings = db.relationship('Booking', backref='user', lazy=True, cascade='all, delete-orphan')
     leases = db.relationship('Lease', backref='tenant', lazy=True)
+    refresh_tokens = db.relationship('RefreshToken', backref='user', lazy=True, cascade='all, delete-orphan')
+    revoked_tokens = db.relationship('RevokedToken', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password inline (scripts); request handlers use passwords.hash"""
+        self.password_hash = generate_password_hash(password, passwords.method)
     
     def check_password(self, password):
         """Check if password matches hash"""
@@ -40,9 +71,17 @@ class User(db.Model):
         }
 
 
+UNIT_STATUSES = ('available', 'occupied', 'maintenance')
+
+EMPTY_UNIT_COUNTS = {'total': 0, 'available': 0, 'occupied': 0, 'maintenance': 0}
+
+
 class Tower(db.Model):
     """Tower/Building model"""
     __tablename__ = 'towers'
+    __table_args__ = (
+        Index('ix_towers_created_at_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -54,22 +93,51 @@ class Tower(db.Model):
     # Relationships
     units = db.relationship('Unit', backref='tower', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self):
+    @staticmethod
+    def unit_counts(tower_ids=None):
+        """Per-tower unit counts by status from one grouped aggregate query"""
+        query = db.session.query(Unit.tower_id, Unit.status, func.count(Unit.id))
+        if tower_ids is not None:
+            query = query.filter(Unit.tower_id.in_(tower_ids))
+        
+        counts = {}
+        for tower_id, status, count in query.group_by(Unit.tower_id, Unit.status):
+            tower_counts = counts.setdefault(tower_id, dict(EMPTY_UNIT_COUNTS))
+            tower_counts['total'] += count
+            if status in tower_counts:
+                tower_counts[status] += count
+        return counts
+    
+    def to_dict(self, unit_counts=None):
         """Convert to dictionary"""
+        if unit_counts is None:
+            unit_counts = Tower.unit_counts([self.id]).get(self.id, EMPTY_UNIT_COUNTS)
         return {
             'id': self.id,
             'name': self.name,
             'address': self.address,
             'total_floors': self.total_floors,
             'description': self.description,
-            'unit_count': len(self.units),
+            'unit_count': unit_counts['total'],
+            'available_units': unit_counts['available'],
+            'occupied_units': unit_counts['occupied'],
+            'maintenance_units': unit_counts['maintenance'],
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
-class Unit(db.Model):
+class Unit(LoadProfileMixin, db.Model):
     """Apartment unit model"""
     __tablename__ = 'units'
+    __table_args__ = (
+        Index('ix_units_tower_status', 'tower_id', 'status'),
+        Index('ix_units_status_bedrooms', 'status', 'bedrooms'),
+        Index('ix_units_created_at_id', 'created_at', 'id'),
+        partial_index('ix_units_available', 'tower_id', 'bedrooms', where="status = 'available'"),
+    )
+    __load_profiles__ = {
+        'list': lambda: [joinedload(Unit.tower)],
+    }
     
     id = db.Column(db.Integer, primary_key=True)
     tower_id = db.Column(db.Integer, db.ForeignKey('towers.id'), nullable=False)
@@ -82,6 +150,10 @@ class Unit(db.Model):
     status = db.Column(db.String(20), default='available')  # available, occupied, maintenance
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    # Optimistic locking: ORM updates fail with StaleDataError if the row changed
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     bookings = db.relationship('Booking', backref='unit', lazy=True)
@@ -107,14 +179,29 @@ class Unit(db.Model):
 class Amenity(db.Model):
     """Amenity/Facility model"""
     __tablename__ = 'amenities'
+    __table_args__ = (
+        Index('ix_amenities_active_created_at', 'is_active', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     availability_hours = db.Column(db.String(100))
+    opens_at = db.Column(db.Time)  # opens_at/closes_at unset: open all day
+    closes_at = db.Column(db.Time)
+    slot_minutes = db.Column(db.Integer)  # slot_minutes/slot_capacity unset: not reservable
+    slot_capacity = db.Column(db.Integer)
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    reservations = db.relationship('AmenityReservation', backref='amenity', lazy=True,
+                                   cascade='all, delete-orphan')
+    slots = db.relationship('AmenitySlot', lazy=True, cascade='all, delete-orphan')
+    
+    @property
+    def reservable(self):
+        return bool(self.slot_minutes and self.slot_capacity)
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -122,14 +209,80 @@ class Amenity(db.Model):
             'name': self.name,
             'description': self.description,
             'availability_hours': self.availability_hours,
+            'opens_at': self.opens_at.isoformat() if self.opens_at else None,
+            'closes_at': self.closes_at.isoformat() if self.closes_at else None,
+            'slot_minutes': self.slot_minutes,
+            'slot_capacity': self.slot_capacity,
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
 
-class Booking(db.Model):
+RESERVATION_STATUSES = ('confirmed', 'cancelled')
+
+
+class AmenityReservation(db.Model):
+    """One resident's place in an amenity slot"""
+    __tablename__ = 'amenity_reservations'
+    __table_args__ = (
+        Index('ix_amenity_reservations_slot_start_id', 'slot_start', 'id'),
+        Index('ix_amenity_reservations_user_slot', 'user_id', 'slot_start', 'id'),
+        Index('ix_amenity_reservations_amenity_slot', 'amenity_id', 'slot_start', 'id'),
+        partial_index('ix_amenity_reservations_confirmed', 'amenity_id', 'slot_start', 'user_id',
+                      where="status = 'confirmed'", unique=True),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    amenity_id = db.Column(db.Integer, db.ForeignKey('amenities.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    slot_start = db.Column(db.DateTime, nullable=False)
+    slot_end = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), default='confirmed')  # confirmed, cancelled
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    cancelled_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'amenity_id': self.amenity_id,
+            'amenity_name': self.amenity.name if self.amenity else None,
+            'user_id': self.user_id,
+            'slot_start': self.slot_start.isoformat() if self.slot_start else None,
+            'slot_end': self.slot_end.isoformat() if self.slot_end else None,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'cancelled_at': self.cancelled_at.isoformat() if self.cancelled_at else None
+        }
+
+
+class AmenitySlot(db.Model):
+    """Confirmed reservations per amenity slot, maintained alongside reservation writes"""
+    __tablename__ = 'amenity_slots'
+    
+    amenity_id = db.Column(db.Integer, db.ForeignKey('amenities.id'), primary_key=True)
+    slot_start = db.Column(db.DateTime, primary_key=True)
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Booking(LoadProfileMixin, db.Model):
     """Booking request model"""
     __tablename__ = 'bookings'
+    __table_args__ = (
+        Index('ix_bookings_user_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_bookings_status_created_at', 'status', 'created_at', 'id'),
+        Index('ix_bookings_created_at_id', 'created_at', 'id'),
+        Index('ix_bookings_unit_id', 'unit_id'),
+        partial_index('ix_bookings_pending', 'unit_id', 'created_at', where="status = 'pending'"),
+        partial_index('ix_bookings_pending_move_in', 'unit_id', 'requested_move_in_date',
+                      where="status = 'pending'"),
+    )
+    __load_profiles__ = {
+        'list': lambda: [
+            joinedload(Booking.user),
+            joinedload(Booking.unit).joinedload(Unit.tower),
+        ],
+    }
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -139,6 +292,10 @@ class Booking(db.Model):
     admin_comments = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    
+    # Optimistic locking: ORM updates fail with StaleDataError if the row changed
+    __mapper_args__ = {'version_id_col': version}
     
     # Relationships
     lease = db.relationship('Lease', backref='booking', uselist=False, cascade='all, delete-orphan')
@@ -163,9 +320,25 @@ class Booking(db.Model):
         }
 
 
-class Lease(db.Model):
+class Lease(LoadProfileMixin, db.Model):
     """Lease/Rental agreement model"""
     __tablename__ = 'leases'
+    __table_args__ = (
+        Index('ix_leases_user_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_leases_status_created_at', 'status', 'created_at', 'id'),
+        Index('ix_leases_created_at_id', 'created_at', 'id'),
+        Index('ix_leases_unit_id', 'unit_id'),
+        Index('ix_leases_booking_id', 'booking_id'),
+        partial_index('ix_leases_active_unit_dates', 'unit_id', 'start_date', 'end_date',
+                      where="status = 'active'"),
+        partial_index('ix_leases_active_end_date', 'end_date', 'id', where="status = 'active'"),
+    )
+    __load_profiles__ = {
+        'list': lambda: [
+            joinedload(Lease.tenant),
+            joinedload(Lease.booking).joinedload(Booking.unit).joinedload(Unit.tower),
+        ],
+    }
     
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
@@ -200,9 +373,51 @@ class Lease(db.Model):
         }
 
 
+RENEWAL_OFFER_STATUSES = ('offered', 'accepted', 'declined', 'lapsed')
+
+
+class LeaseRenewalOffer(db.Model):
+    """Renewal terms offered to a tenant whose lease is ending"""
+    __tablename__ = 'lease_renewal_offers'
+    __table_args__ = (
+        Index('ix_lease_renewal_offers_lease_id', 'lease_id', unique=True),
+        Index('ix_lease_renewal_offers_user_created_at', 'user_id', 'created_at', 'id'),
+        Index('ix_lease_renewal_offers_status_created_at', 'status', 'created_at', 'id'),
+        Index('ix_lease_renewal_offers_created_at_id', 'created_at', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    lease_id = db.Column(db.Integer, db.ForeignKey('leases.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    unit_id = db.Column(db.Integer, db.ForeignKey('units.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    monthly_rent = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), default='offered')  # offered, accepted, declined, lapsed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'id': self.id,
+            'lease_id': self.lease_id,
+            'user_id': self.user_id,
+            'unit_id': self.unit_id,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'monthly_rent': self.monthly_rent,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
 class Payment(db.Model):
     """Payment record model (mock for demo)"""
     __tablename__ = 'payments'
+    __table_args__ = (
+        Index('ix_payments_lease_payment_date', 'lease_id', 'payment_date', 'id'),
+        Index('ix_payments_payment_date_id', 'payment_date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     lease_id = db.Column(db.Integer, db.ForeignKey('leases.id'), nullable=False)
@@ -223,3 +438,53 @@ class Payment(db.Model):
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class RefreshToken(db.Model):
+    """Issued refresh token, tracked for rotation and revocation"""
+    __tablename__ = 'refresh_tokens'
+    __table_args__ = (
+        Index('ix_refresh_tokens_user_id', 'user_id'),
+        Index('ix_refresh_tokens_family', 'family'),
+    )
+    
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    family = db.Column(db.String(36), nullable=False)  # shared by all rotations of one login
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class RevokedToken(db.Model):
+    """Access token revoked before its expiry (logout)"""
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
+    
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class LeaseStatCounter(db.Model):
+    """Per-tower, per-status lease totals maintained alongside lease writes"""
+    __tablename__ = 'lease_stat_counters'
+    
+    tower_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    lease_count = db.Column(db.Integer, nullable=False, default=0)
+    monthly_rent_total = db.Column(db.Float, nullable=False, default=0)
+    deposit_total = db.Column(db.Float, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'tower_id': self.tower_id,
+            'status': self.status,
+            'lease_count': self.lease_count,
+            'monthly_rent_total': self.monthly_rent_total,
+            'deposit_total': self.deposit_total
+        }
@@ -0,0 +1,155 @@
+"""Keyset (cursor) pagination for list endpoints
+
+Pagination is opt-in: without ``?limit=`` an endpoint returns the plain
+JSON list it always has. With ``?limit=`` it returns an envelope::
+
+    {"items": [...], "limit": 50, "next_cursor": "<opaque>" | null}
+
+Pass ``next_cursor`` back as ``?cursor=`` to fetch the following page.
+Cursors encode the ``(sort value, id)`` of the last row served, so each
+page is a bounded index range scan instead of an OFFSET scan.
+"""
+import base64
+import json
+from datetime import date, datetime
+from flask import request
+from sqlalchemy import and_, or_
+from serializers import json_response
+
+DEFAULT_PAGE_LIMIT = 50
+MAX_PAGE_LIMIT = 500
+
+
+class PaginationError(ValueError):
+    """Raised for malformed limit/cursor query parameters"""
+
+
+def page_args():
+    """Read (limit, cursor) from the query string; limit is None when not paginating"""
+    raw_limit = request.args.get('limit')
+    raw_cursor = request.args.get('cursor')
+    if raw_limit is None and raw_cursor is None:
+        return None, None
+
+    try:
+        limit = int(raw_limit) if raw_limit is not None else DEFAULT_PAGE_LIMIT
+    except ValueError:
+        raise PaginationError('limit must be an integer')
+    if limit < 1:
+        raise PaginationError('limit must be positive')
+
+    cursor = decode_cursor(raw_cursor) if raw_cursor else None
+    return min(limit, MAX_PAGE_LIMIT), cursor
+
+
+def encode_cursor(sort_value, row_id):
+    """Encode the last row's sort key as an opaque URL-safe token"""
+    if isinstance(sort_value, (date, datetime)):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token into its raw [sort_value, id] pair"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+
+def _coerce_sort_value(column, value):
+    """Convert a decoded cursor value back to the column's Python type"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(value)
+        if python_type is date:
+            return date.fromisoformat(value)
+        return python_type(value)
+    except (ValueError, TypeError):
+        raise PaginationError('Invalid cursor')
+
+
+def _ordering(sort_column, id_column, descending, nulls_last):
+    """ORDER BY clauses for (sort_column, id_column)"""
+    if descending:
+        clauses = [sort_column.desc(), id_column.desc()]
+    else:
+        clauses = [sort_column.asc(), id_column.asc()]
+    if nulls_last:
+        # Portable NULLS LAST: rows with a NULL sort value go after the rest
+        clauses.insert(0, sort_column.is_(None))
+    return clauses
+
+
+def _after_cursor(sort_column, id_column, sort_value, row_id, descending, nulls_last):
+    """Predicate selecting the rows that follow the cursor position"""
+    id_after = id_column < row_id if descending else id_column > row_id
+    if nulls_last and sort_value is None:
+        return and_(sort_column.is_(None), id_after)
+
+    value_after = sort_column < sort_value if descending else sort_column > sort_value
+    predicate = or_(value_after, and_(sort_column == sort_value, id_after))
+    if nulls_last:
+        predicate = or_(predicate, sort_column.is_(None))
+    return predicate
+
+
+def keyset_page(query, sort_column, id_column, limit, cursor=None, descending=False,
+                nulls_last=False):
+    """Fetch one page ordered by (sort_column, id_column)
+
+    Set ``nulls_last`` when the sort column is nullable so NULL rows are
+    paged after the others instead of being skipped.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    query = query.order_by(*_ordering(sort_column, id_column, descending, nulls_last))
+
+    if cursor is not None:
+        sort_value = _coerce_sort_value(sort_column, cursor[0])
+        query = query.filter(_after_cursor(
+            sort_column, id_column, sort_value, cursor[1], descending, nulls_last
+        ))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(
+        getattr(last, sort_column.key), getattr(last, id_column.key)
+    )
+    return rows, next_cursor
+
+
+def list_response(query, sort_column, id_column, serialize, descending=False,
+                  nulls_last=False):
+    """Return a JSON list, or a keyset page envelope when ?limit= is given
+
+    ``serialize`` receives the list of rows and returns a list of dicts;
+    pass a serializers Schema's ``query()`` and ``dump`` to skip building
+    ORM objects.
+    """
+    limit, cursor = page_args()
+    if limit is None:
+        query = query.order_by(*_ordering(sort_column, id_column, descending, nulls_last))
+        return json_response(serialize(query.all()))
+
+    rows, next_cursor = keyset_page(
+        query, sort_column, id_column, limit, cursor, descending, nulls_last
+    )
+    return json_response({
+        'items': serialize(rows),
+        'limit': limit,
+        'next_cursor': next_cursor
+    })
@@ -0,0 +1,108 @@
+"""Password hashing off the request threads
+
+Hashing and verification are deliberately slow (scrypt or PBKDF2), so
+they run in a small process pool instead of the worker thread serving
+the request. The pool has a bounded queue: once ``PASSWORD_HASH_MAX_PENDING``
+hashes are waiting, further logins are turned away with ``HashingBusy``
+(HTTP 503) instead of piling up and starving the rest of the API.
+
+``PASSWORD_HASH_METHOD`` takes any werkzeug method string, e.g.
+``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``. Stored hashes made with
+other parameters still verify and are re-hashed on the next login.
+Setting ``PASSWORD_HASH_WORKERS=0`` hashes inline, which is handy for
+scripts and debugging.
+
+Pool processes come from a forkserver (spawn where that is unavailable)
+rather than a fork of the serving process: the pool starts from a request
+thread, and a child forked while other threads hold locks (logging, the
+connection pool) can deadlock on them. A hash that does not finish within
+``PASSWORD_HASH_TIMEOUT`` seconds is reported as ``HashingBusy`` too.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(Exception):
+    """Raised when too many password hashes are already queued, or one timed out"""
+
+
+def _pool_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # The server only needs the hashing functions, not the app's __main__
+        context.set_forkserver_preload(['werkzeug.security'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+class PasswordHasher:
+    """Flask extension running werkzeug hashing in a bounded process pool"""
+
+    def __init__(self):
+        self.method = 'scrypt:32768:8:1'
+        self.workers = 0
+        self.timeout = 30
+        self._slots = threading.BoundedSemaphore(1)
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        # Normalize e.g. 'pbkdf2' to the full parameter string werkzeug stores
+        self.method = generate_password_hash('', method).split('$', 1)[0]
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', 0)
+        max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or max(self.workers, 1) * 8
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', 30)
+        app.extensions['passwords'] = self
+
+    def _executor(self):
+        # Created lazily and per process, so pre-forking servers do not share
+        # a pool inherited from the master
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, function, *args):
+        if not self.workers:
+            return function(*args)
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy('Too many concurrent logins, please retry shortly')
+        try:
+            future = self._executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise HashingBusy('Password check timed out, please retry shortly')
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Whether a stored hash was made with other method parameters"""
+        return password_hash.split('$', 1)[0] != self.method
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+passwords = PasswordHasher()
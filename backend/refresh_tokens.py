@@ -0,0 +1,99 @@
+"""Refresh-token issue, rotation and revocation
+
+Login and register hand out a short-lived access token plus a refresh
+token. ``POST /api/auth/refresh`` trades a refresh token for a new pair
+without touching the password hash: one primary-key UPDATE marks the
+presented token used, and the user's role comes from the authorization
+cache.
+
+Every refresh token is single use. All rotations descending from one
+login share a ``family``. If a token that was already rotated is
+presented again, after ``REFRESH_REUSE_GRACE_SECONDS``, it has probably
+been stolen, so the whole family is revoked and that session must log in
+again.
+"""
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import update
+from models import db, RefreshToken
+
+refresh_tokens_table = RefreshToken.__table__
+
+
+class RefreshError(Exception):
+    """Raised when a refresh token cannot be exchanged"""
+
+
+def issue_tokens(user, family=None):
+    """Access and refresh token pair for a user dict or model. Caller commits."""
+    if not isinstance(user, dict):
+        user = user.to_dict()
+    identity = str(user['id'])
+    jti = str(uuid.uuid4())
+    family = family or jti
+
+    db.session.add(RefreshToken(
+        jti=jti,
+        user_id=user['id'],
+        family=family,
+        expires_at=datetime.utcnow() + current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    ))
+    return {
+        'access_token': create_access_token(
+            identity=identity,
+            additional_claims={'role': user['role'], 'email': user['email']}
+        ),
+        'refresh_token': create_refresh_token(
+            identity=identity,
+            additional_claims={'jti': jti, 'family': family}
+        )
+    }
+
+
+def rotate(claims):
+    """Mark a presented refresh token used; returns its family. Caller commits.
+
+    On a replay the family revocation is committed here before raising
+    RefreshError, since the caller rolls back on that error.
+    """
+    now = datetime.utcnow()
+    used = db.session.execute(
+        update(refresh_tokens_table)
+        .where(refresh_tokens_table.c.jti == claims['jti'],
+               refresh_tokens_table.c.revoked_at.is_(None),
+               refresh_tokens_table.c.expires_at > now)
+        .values(revoked_at=now)
+    ).rowcount
+    if used:
+        return claims['family']
+
+    token = db.session.get(RefreshToken, claims['jti'])
+    if token is None or token.revoked_at is None:
+        raise RefreshError('Refresh token is no longer valid')
+    grace = timedelta(seconds=current_app.config['REFRESH_REUSE_GRACE_SECONDS'])
+    if now - token.revoked_at > grace:
+        # Replay of an already rotated token: end the whole session
+        revoke_family(token.family)
+        db.session.commit()
+    raise RefreshError('Refresh token has been revoked or already used')
+
+
+def revoke_family(family):
+    """Revoke every live refresh token descending from one login"""
+    db.session.execute(
+        update(refresh_tokens_table)
+        .where(refresh_tokens_table.c.family == family, refresh_tokens_table.c.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+def revoke_user(user_id):
+    """Revoke every live refresh token of a user"""
+    db.session.execute(
+        update(refresh_tokens_table)
+        .where(refresh_tokens_table.c.user_id == int(user_id),
+               refresh_tokens_table.c.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
@@ -1,45 +1,74 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
 from models import db, Amenity
+from authz import admin_required
+from cache import cache
+from pagination import list_response, PaginationError
+from serializers import amenity_schema, json_response, FieldError
+from amenity_reservations import amenity_settings, check_settings, day_slots, parse_day, ReservationError
 
 amenities_bp = Blueprint('amenities', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    claims = get_jwt()
-    return claims.get('role') == 'admin'
-
 
 @amenities_bp.route('', methods=['GET'])
+@cache.cached('amenities')
 def get_amenities():
     """Get all amenities"""
     try:
-        amenities = Amenity.query.filter_by(is_active=True).all()
-        return jsonify([amenity.to_dict() for amenity in amenities]), 200
+        view = amenity_schema.view(request.args)
+        return list_response(
+            view.query(Amenity.created_at).filter_by(is_active=True),
+            Amenity.created_at, Amenity.id, view.dump
+        ), 200
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @amenities_bp.route('/<int:amenity_id>', methods=['GET'])
+@cache.cached('amenities')
 def get_amenity(amenity_id):
     """Get single amenity by ID"""
     try:
-        amenity = Amenity.query.get(amenity_id)
+        view = amenity_schema.view(request.args)
+        amenity = view.query().filter(Amenity.id == amenity_id).first()
         if not amenity:
             return jsonify({'error': 'Amenity not found'}), 404
-        return jsonify(amenity.to_dict()), 200
+        return json_response(view.dump_one(amenity)), 200
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@amenities_bp.route('/<int:amenity_id>/slots', methods=['GET'])
+def get_amenity_slots(amenity_id):
+    """Slots of a reservable amenity on ?date= (default today) with places left"""
+    try:
+        amenity = db.session.get(Amenity, amenity_id)
+        if not amenity or not amenity.is_active:
+            return jsonify({'error': 'Amenity not found'}), 404
+        if not amenity.reservable:
+            return jsonify({'error': 'Amenity does not take reservations'}), 400
+        
+        day = parse_day(request.args.get('date'))
+        return jsonify({
+            'amenity_id': amenity.id,
+            'date': day.isoformat(),
+            'slots': day_slots(amenity, day)
+        }), 200
+        
+    except ReservationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @amenities_bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required()
 def create_amenity():
     """Create new amenity (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         
         if not data.get('name'):
@@ -49,30 +78,33 @@ def create_amenity():
             name=data['name'],
             description=data.get('description'),
             availability_hours=data.get('availability_hours'),
-            is_active=data.get('is_active', True)
+            is_active=data.get('is_active', True),
+            **amenity_settings(data)
         )
+        check_settings(amenity)
         
         db.session.add(amenity)
         db.session.commit()
+        cache.invalidate('amenities')
         
         return jsonify({
             'message': 'Amenity created successfully',
             'amenity': amenity.to_dict()
         }), 201
         
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @amenities_bp.route('/<int:amenity_id>', methods=['PUT'])
-@jwt_required()
+@admin_required()
 def update_amenity(amenity_id):
     """Update amenity (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         amenity = Amenity.query.get(amenity_id)
         if not amenity:
             return jsonify({'error': 'Amenity not found'}), 404
@@ -82,33 +114,38 @@ def update_amenity(amenity_id):
         for field in ['name', 'description', 'availability_hours', 'is_active']:
             if field in data:
                 setattr(amenity, field, data[field])
+        for field, value in amenity_settings(data).items():
+            setattr(amenity, field, value)
+        check_settings(amenity)
         
         db.session.commit()
+        cache.invalidate('amenities')
         
         return jsonify({
             'message': 'Amenity updated successfully',
             'amenity': amenity.to_dict()
         }), 200
         
+    except ReservationError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @amenities_bp.route('/<int:amenity_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required()
 def delete_amenity(amenity_id):
     """Delete amenity (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         amenity = Amenity.query.get(amenity_id)
         if not amenity:
             return jsonify({'error': 'Amenity not found'}), 404
         
         db.session.delete(amenity)
         db.session.commit()
+        cache.invalidate('amenities')
         
         return jsonify({'message': 'Amenity deleted successfully'}), 200
         
@@ -1,6 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required, get_jwt, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt import PyJWTError
 from models import db, User
+from authz import authz, current_user
+from passwords import passwords, HashingBusy
+import refresh_tokens
+from refresh_tokens import RefreshError
+from serializers import user_schema, json_response, FieldError
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -23,25 +30,25 @@ def register():
             email=data['email'],
             name=data.get('name', ''),
             phone=data.get('phone', ''),
-            role=data.get('role', 'user')  # Default to 'user'
+            role=data.get('role', 'user'),  # Default to 'user'
+            password_hash=passwords.hash(data['password'])
         )
-        user.set_password(data['password'])
         
         db.session.add(user)
-        db.session.commit()
+        db.session.flush()
         
-        # Create JWT token for new user
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={'role': user.role, 'email': user.email}
-        )
+        # Create access and refresh tokens for new user
+        tokens = refresh_tokens.issue_tokens(user)
+        db.session.commit()
 
         return jsonify({
             'message': 'User registered successfully',
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -61,22 +68,52 @@ def login():
         user = User.query.filter_by(email=data['email']).first()
         
         # Check password
-        if not user or not user.check_password(data['password']):
+        if not user or not passwords.verify(user.password_hash, data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        # Create JWT token with user info
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={'role': user.role, 'email': user.email}
-        )
+        # Upgrade hashes made with older parameters while the password is known
+        if passwords.needs_rehash(user.password_hash):
+            user.password_hash = passwords.hash(data['password'])
+        
+        # Create access and refresh tokens with user info
+        tokens = refresh_tokens.issue_tokens(user)
+        db.session.commit()
         
         return jsonify({
             'message': 'Login successful',
-            'access_token': access_token,
+            **tokens,
             'user': user.to_dict()
         }), 200
         
+    except HashingBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """Exchange a refresh token for a new access/refresh token pair"""
+    try:
+        claims = get_jwt()
+        user = authz.user(claims['sub'])
+        if not user:
+            return jsonify({'error': 'User not found'}), 401
+        
+        family = refresh_tokens.rotate(claims)
+        tokens = refresh_tokens.issue_tokens(user, family=family)
+        db.session.commit()
+        
+        return jsonify({**tokens, 'user': user}), 200
+        
+    except RefreshError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 401
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
@@ -85,13 +122,54 @@ def login():
 def get_current_user():
     """Get current user info from JWT token"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        view = user_schema.view(request.args)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify(user.to_dict()), 200
+        return json_response(view.pick(user)), 200
+        
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Revoke the current token and its session's refresh token
+
+    With ?all=1 every access and refresh token of the user is revoked.
+    Otherwise the refresh token given as {"refresh_token": ...} in the
+    body (if any) is revoked along with its rotations; one that does not
+    decode as a refresh token is a 400 and nothing is revoked.
+    """
+    try:
+        claims = get_jwt()
+        log_out_all = request.args.get('all') in ('1', 'true')
+        refresh_claims = None
+        refresh_token = None if log_out_all else (request.get_json(silent=True) or {}).get('refresh_token')
+        if refresh_token:
+            # An expired refresh token still names a family whose rotations may be live
+            try:
+                refresh_claims = decode_token(refresh_token, allow_expired=True)
+            except (PyJWTError, JWTExtendedException):
+                return jsonify({'error': 'Invalid refresh token'}), 400
+            if refresh_claims.get('type') != 'refresh' or 'family' not in refresh_claims:
+                return jsonify({'error': 'Invalid refresh token'}), 400
+        
+        authz.revoke_token(claims['jti'], claims['sub'], claims['exp'])
+        if log_out_all:
+            authz.revoke_user(claims['sub'])
+            refresh_tokens.revoke_user(claims['sub'])
+        elif refresh_claims and refresh_claims['sub'] == claims['sub']:
+            refresh_tokens.revoke_family(refresh_claims['family'])
+        
+        db.session.commit()
+        return jsonify({'message': 'Logged out'}), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,15 +1,16 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from datetime import datetime, timedelta
-from models import db, Booking, Unit, Lease
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime
+from models import db, Booking, Lease
+from authz import admin_required, current_role
+from cache import cache
+from pagination import list_response, PaginationError
+from serializers import booking_schema, json_response, FieldError
+import booking_workflow
+from booking_workflow import parse_decisions, process_batch, run_transaction, BatchError, TransitionError
 
 bookings_bp = Blueprint('bookings', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    claims = get_jwt()
-    return claims.get('role') == 'admin'
-
 
 @bookings_bp.route('', methods=['POST'])
 @jwt_required()
@@ -23,33 +24,24 @@ def create_booking():
         if not data.get('unit_id') or not data.get('requested_move_in_date'):
             return jsonify({'error': 'Unit ID and move-in date are required'}), 400
         
-        # Check if unit exists and is available
-        unit = Unit.query.get(data['unit_id'])
-        if not unit:
-            return jsonify({'error': 'Unit not found'}), 404
-        
-        if unit.status != 'available':
-            return jsonify({'error': 'Unit is not available'}), 400
-        
         # Parse date
         move_in_date = datetime.fromisoformat(data['requested_move_in_date']).date()
         
-        # Create booking
-        booking = Booking(
-            user_id=user_id,
-            unit_id=data['unit_id'],
-            requested_move_in_date=move_in_date,
-            status='pending'
+        # Create booking, checking availability atomically with the insert
+        booking_id = run_transaction(
+            lambda: booking_workflow.create(user_id, data['unit_id'], move_in_date)
         )
-        
-        db.session.add(booking)
-        db.session.commit()
+        # Pending bookings count against unit availability windows
+        cache.invalidate('units')
+        booking = Booking.query_with('list').get(booking_id)
         
         return jsonify({
             'message': 'Booking request submitted successfully',
             'booking': booking.to_dict()
         }), 201
         
+    except TransitionError as e:
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -61,25 +53,29 @@ def get_bookings():
     """Get bookings (filtered by user or all for admin)"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
+        
+        view = booking_schema.view(request.args)
+        query = view.query(Booking.created_at)
         
         if role == 'admin':
             # Admin sees all bookings
-            query = Booking.query
             
             # Optional status filter
             status = request.args.get('status')
             if status:
-                query = query.filter_by(status=status)
-            
-            bookings = query.order_by(Booking.created_at.desc()).all()
+                query = query.filter(Booking.status == status)
         else:
             # User sees only their bookings
-            bookings = Booking.query.filter_by(user_id=user_id).order_by(Booking.created_at.desc()).all()
+            query = query.filter(Booking.user_id == user_id)
         
-        return jsonify([booking.to_dict() for booking in bookings]), 200
+        return list_response(
+            query, Booking.created_at, Booking.id, view.dump,
+            descending=True
+        ), 200
         
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -90,10 +86,10 @@ def get_booking(booking_id):
     """Get single booking"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
         
-        booking = Booking.query.get(booking_id)
+        view = booking_schema.view(request.args)
+        booking = view.query(Booking.user_id).filter(Booking.id == booking_id).first()
         if not booking:
             return jsonify({'error': 'Booking not found'}), 404
         
@@ -101,91 +97,91 @@ def get_booking(booking_id):
         if role != 'admin' and booking.user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        return jsonify(booking.to_dict()), 200
+        return json_response(view.dump_one(booking)), 200
         
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @bookings_bp.route('/<int:booking_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required()
 def approve_booking(booking_id):
     """Approve booking and create lease (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
-        booking = Booking.query.get(booking_id)
-        if not booking:
-            return jsonify({'error': 'Booking not found'}), 404
-        
-        if booking.status != 'pending':
-            return jsonify({'error': 'Booking already processed'}), 400
-        
-        # Start transaction
-        # Update booking status
-        booking.status = 'approved'
-        booking.updated_at = datetime.utcnow()
-        
-        # Create lease (1 year by default)
-        lease = Lease(
-            booking_id=booking.id,
-            user_id=booking.user_id,
-            unit_id=booking.unit_id,
-            start_date=booking.requested_move_in_date,
-            end_date=booking.requested_move_in_date + timedelta(days=365),
-            monthly_rent=booking.unit.rent_amount,
-            security_deposit=booking.unit.rent_amount * 2,  # 2 months deposit
-            status='active'
-        )
-        db.session.add(lease)
-        
-        # Update unit status
-        unit = Unit.query.get(booking.unit_id)
-        unit.status = 'occupied'
-        
-        # Commit transaction
-        db.session.commit()
+        # Compare-and-set transition; competing pending bookings for the
+        # unit are rejected in the same transaction
+        _, lease_id = run_transaction(lambda: booking_workflow.approve(booking_id))
+        cache.invalidate('units', 'towers')
         
         return jsonify({
             'message': 'Booking approved successfully',
-            'booking': booking.to_dict(),
-            'lease': lease.to_dict()
+            'booking': Booking.query_with('list').get(booking_id).to_dict(),
+            'lease': Lease.query_with('list').get(lease_id).to_dict()
         }), 200
         
+    except TransitionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @bookings_bp.route('/<int:booking_id>/reject', methods=['PUT'])
-@jwt_required()
+@admin_required()
 def reject_booking(booking_id):
     """Reject booking (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
+        data = request.get_json() or {}
+        comments = data.get('comments', '')
         
-        booking = Booking.query.get(booking_id)
-        if not booking:
-            return jsonify({'error': 'Booking not found'}), 404
+        run_transaction(lambda: booking_workflow.reject(booking_id, comments))
+        cache.invalidate('units')
         
-        if booking.status != 'pending':
-            return jsonify({'error': 'Booking already processed'}), 400
+        return jsonify({
+            'message': 'Booking rejected',
+            'booking': Booking.query_with('list').get(booking_id).to_dict()
+        }), 200
         
-        data = request.get_json()
+    except TransitionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bookings_bp.route('/batch', methods=['POST'])
+@admin_required()
+def process_booking_batch():
+    """Approve/reject many bookings in one transaction (admin only)
+    
+    Body: {"decisions": [{"booking_id": 1, "decision": "approve"},
+                         {"booking_id": 2, "decision": "reject", "comments": "..."}]}
+    """
+    try:
+        decisions = parse_decisions(request.get_json())
+        results, units_changed = run_transaction(lambda: process_batch(decisions))
         
-        booking.status = 'rejected'
-        booking.admin_comments = data.get('comments', '')
-        booking.updated_at = datetime.utcnow()
+        summary = {status: 0 for status in ('approved', 'rejected', 'error')}
+        for result in results:
+            summary[result['status']] += 1
         
-        db.session.commit()
+        if units_changed:
+            cache.invalidate('units', 'towers')
+        elif summary['rejected']:
+            cache.invalidate('units')
         
         return jsonify({
-            'message': 'Booking rejected',
-            'booking': booking.to_dict()
+            'message': 'Batch processed',
+            'summary': summary,
+            'results': results
         }), 200
         
+    except BatchError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,39 @@
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from authz import admin_required
+from exports import export_query, ndjson_chunks, csv_chunks, ExportError, FORMATS
+
+exports_bp = Blueprint('exports', __name__)
+
+
+@exports_bp.route('/<dataset>', methods=['GET'])
+@admin_required()
+def export_dataset(dataset):
+    """Stream payments, leases or bookings as NDJSON or CSV (admin only)
+
+    Query parameters: format=ndjson|csv (default ndjson), fields (a
+    comma-separated subset of the columns), status, and from/to ISO
+    dates on payment_date, start_date or created_at.
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(FORMATS)}"}), 400
+
+        statement = export_query(dataset, request.args)
+        chunks = ndjson_chunks if fmt == 'ndjson' else csv_chunks
+
+        # stream_with_context keeps the app context (and its session)
+        # alive while the generator runs after the view has returned
+        return Response(
+            stream_with_context(chunks(statement, current_app.config['EXPORT_CHUNK_SIZE'])),
+            mimetype=FORMATS[fmt],
+            headers={
+                'Content-Disposition': f'attachment; filename={dataset}.{fmt}',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
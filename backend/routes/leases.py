@@ -1,14 +1,13 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from models import db, Lease
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Lease, LeaseRenewalOffer, RENEWAL_OFFER_STATUSES
+from authz import admin_required, current_role
+from pagination import list_response, PaginationError
+from serializers import lease_schema, renewal_offer_schema, json_response, FieldError
+import lease_stats
 
 leases_bp = Blueprint('leases', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    claims = get_jwt()
-    return claims.get('role') == 'admin'
-
 
 @leases_bp.route('', methods=['GET'])
 @jwt_required()
@@ -16,25 +15,74 @@ def get_leases():
     """Get leases (filtered by user or all for admin)"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
+        
+        view = lease_schema.view(request.args)
+        query = view.query(Lease.created_at)
         
         if role == 'admin':
             # Admin sees all leases
-            query = Lease.query
             
             # Optional status filter
             status = request.args.get('status')
             if status:
-                query = query.filter_by(status=status)
-            
-            leases = query.order_by(Lease.created_at.desc()).all()
+                query = query.filter(Lease.status == status)
         else:
             # User sees only their leases
-            leases = Lease.query.filter_by(user_id=user_id).order_by(Lease.created_at.desc()).all()
+            query = query.filter(Lease.user_id == user_id)
+        
+        return list_response(
+            query, Lease.created_at, Lease.id, view.dump,
+            descending=True
+        ), 200
+        
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@leases_bp.route('/renewal-offers', methods=['GET'])
+@jwt_required()
+def get_renewal_offers():
+    """Get renewal offers (the user's own, or all for admin), newest first
+    
+    Offers are created by the lease renewal job (lease_jobs.py). Filters:
+    status, lease_id; admins can also filter by user_id.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        role = current_role()
+        
+        view = renewal_offer_schema.view(request.args)
+        query = view.query(LeaseRenewalOffer.created_at)
+        
+        if role == 'admin':
+            # Admin sees all offers
+            owner_id = request.args.get('user_id', type=int)
+            if owner_id:
+                query = query.filter(LeaseRenewalOffer.user_id == owner_id)
+        else:
+            # User sees only their offers
+            query = query.filter(LeaseRenewalOffer.user_id == user_id)
+        
+        status = request.args.get('status')
+        if status:
+            if status not in RENEWAL_OFFER_STATUSES:
+                return jsonify({'error': f"status must be one of: {', '.join(RENEWAL_OFFER_STATUSES)}"}), 400
+            query = query.filter(LeaseRenewalOffer.status == status)
+        
+        lease_id = request.args.get('lease_id', type=int)
+        if lease_id:
+            query = query.filter(LeaseRenewalOffer.lease_id == lease_id)
         
-        return jsonify([lease.to_dict() for lease in leases]), 200
+        return list_response(
+            query, LeaseRenewalOffer.created_at, LeaseRenewalOffer.id, view.dump,
+            descending=True
+        ), 200
         
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -45,10 +93,10 @@ def get_lease(lease_id):
     """Get single lease"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
         
-        lease = Lease.query.get(lease_id)
+        view = lease_schema.view(request.args)
+        lease = view.query(Lease.user_id).filter(Lease.id == lease_id).first()
         if not lease:
             return jsonify({'error': 'Lease not found'}), 404
         
@@ -56,29 +104,48 @@ def get_lease(lease_id):
         if role != 'admin' and lease.user_id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        return jsonify(lease.to_dict()), 200
+        return json_response(view.dump_one(lease)), 200
         
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @leases_bp.route('/stats', methods=['GET'])
-@jwt_required()
+@admin_required()
 def get_lease_stats():
     """Get lease statistics (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
+        # ?source=live recomputes from leases in one grouped query instead
+        # of reading the maintained counters
+        if request.args.get('source') == 'live':
+            stats = lease_stats.live_stats()
+        else:
+            stats = lease_stats.counter_stats()
+        
+        if request.args.get('by_tower') in ('1', 'true'):
+            stats['by_tower'] = lease_stats.counter_stats_by_tower()
         
-        total_leases = Lease.query.count()
-        active_leases = Lease.query.filter_by(status='active').count()
-        expired_leases = Lease.query.filter_by(status='expired').count()
+        return jsonify(stats), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@leases_bp.route('/stats/rebuild', methods=['POST'])
+@admin_required()
+def rebuild_lease_stats():
+    """Recompute lease counters from the leases table (admin only)"""
+    try:
+        lease_stats.rebuild_counters()
+        db.session.commit()
         
         return jsonify({
-            'total_leases': total_leases,
-            'active_leases': active_leases,
-            'expired_leases': expired_leases
+            'message': 'Lease statistics rebuilt',
+            'stats': lease_stats.counter_stats()
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
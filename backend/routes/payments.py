@@ -1,24 +1,21 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
-from datetime import datetime
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, date
 from models import db, Payment, Lease
+from authz import admin_required, current_role
+from pagination import list_response, page_args, keyset_page, PaginationError, DEFAULT_PAGE_LIMIT
+from ledger import ledger_query, ledger_entries, ledger_totals
+from lease_stats import LEASE_STATUSES
+from serializers import payment_schema, json_response, FieldError
 
 payments_bp = Blueprint('payments', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    claims = get_jwt()
-    return claims.get('role') == 'admin'
-
 
 @payments_bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required()
 def create_payment():
     """Record a payment (admin only - mock feature)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         
         if not data.get('lease_id') or not data.get('amount') or not data.get('payment_date'):
@@ -59,24 +56,28 @@ def get_payments():
     """Get payments (filtered by user's leases or all for admin)"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
+        
+        view = payment_schema.view(request.args)
+        query = view.query(Payment.payment_date)
         
         if role == 'admin':
             # Admin sees all payments
             lease_id = request.args.get('lease_id')
             if lease_id:
-                payments = Payment.query.filter_by(lease_id=lease_id).order_by(Payment.payment_date.desc()).all()
-            else:
-                payments = Payment.query.order_by(Payment.payment_date.desc()).all()
+                query = query.filter(Payment.lease_id == lease_id)
         else:
-            # User sees payments for their leases
-            user_leases = Lease.query.filter_by(user_id=user_id).all()
-            lease_ids = [lease.id for lease in user_leases]
-            payments = Payment.query.filter(Payment.lease_id.in_(lease_ids)).order_by(Payment.payment_date.desc()).all()
+            # User sees payments for their leases (single query via subselect)
+            lease_ids = db.session.query(Lease.id).filter(Lease.user_id == user_id)
+            query = query.filter(Payment.lease_id.in_(lease_ids.scalar_subquery()))
         
-        return jsonify([payment.to_dict() for payment in payments]), 200
+        return list_response(
+            query, Payment.payment_date, Payment.id, view.dump,
+            descending=True
+        ), 200
         
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -87,18 +88,75 @@ def get_payment(payment_id):
     """Get single payment"""
     try:
         user_id = get_jwt_identity()
-        claims = get_jwt()
-        role = claims.get('role', 'user')
+        role = current_role()
         
-        payment = Payment.query.get(payment_id)
+        view = payment_schema.view(request.args)
+        payment = view.query(Payment.lease_id).filter(Payment.id == payment_id).first()
         if not payment:
             return jsonify({'error': 'Payment not found'}), 404
         
         # Check authorization
-        if role != 'admin' and payment.lease.user_id != user_id:
-            return jsonify({'error': 'Unauthorized'}), 403
+        if role != 'admin':
+            owner_id = db.session.query(Lease.user_id).filter(Lease.id == payment.lease_id).scalar()
+            if owner_id != user_id:
+                return jsonify({'error': 'Unauthorized'}), 403
+        
+        return json_response(view.dump_one(payment)), 200
+        
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@payments_bp.route('/ledger', methods=['GET'])
+@jwt_required()
+def get_ledger():
+    """Per-lease rent due, total paid and outstanding balance
+    
+    Always paged by lease id (``limit``, default 50, and ``cursor``);
+    ``totals`` cover every lease matching the filters, across pages.
+    """
+    try:
+        user_id = get_jwt_identity()
+        role = current_role()
+        
+        as_of = request.args.get('as_of')
+        try:
+            as_of = date.fromisoformat(as_of) if as_of else date.today()
+        except ValueError:
+            return jsonify({'error': 'as_of must be an ISO date (YYYY-MM-DD)'}), 400
+        lease_id = request.args.get('lease_id', type=int)
+        outstanding_only = request.args.get('outstanding_only') in ('1', 'true')
+        
+        if role == 'admin':
+            # Admin sees the whole portfolio, optionally narrowed
+            status = request.args.get('status')
+            if status and status not in LEASE_STATUSES:
+                return jsonify({'error': f"status must be one of: {', '.join(LEASE_STATUSES)}"}), 400
+            query = ledger_query(
+                as_of,
+                lease_id=lease_id,
+                tower_id=request.args.get('tower_id', type=int),
+                status=status,
+                outstanding_only=outstanding_only
+            )
+        else:
+            # User sees only their own leases
+            query = ledger_query(as_of, user_id=user_id, lease_id=lease_id, outstanding_only=outstanding_only)
+        
+        limit, cursor = page_args()
+        rows, next_cursor = keyset_page(query, Lease.id, Lease.id, limit or DEFAULT_PAGE_LIMIT, cursor)
         
-        return jsonify(payment.to_dict()), 200
+        return json_response({
+            'as_of': as_of.isoformat(),
+            'leases': ledger_entries(rows),
+            'totals': ledger_totals(query),
+            'limit': limit or DEFAULT_PAGE_LIMIT,
+            'next_cursor': next_cursor
+        }), 200
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
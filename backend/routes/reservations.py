@@ -0,0 +1,151 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from datetime import datetime, timedelta
+from models import db, AmenityReservation, RESERVATION_STATUSES
+from authz import current_role
+from pagination import list_response, PaginationError
+from serializers import reservation_schema, json_response, FieldError
+import amenity_reservations
+from amenity_reservations import parse_day, ReservationError
+from booking_workflow import run_transaction, TransitionError
+
+reservations_bp = Blueprint('reservations', __name__)
+
+
+def _reservation(reservation_id):
+    view = reservation_schema.default
+    return view.dump_one(view.query().filter(AmenityReservation.id == reservation_id).first())
+
+
+@reservations_bp.route('', methods=['POST'])
+@jwt_required()
+def create_reservation():
+    """Reserve a place in an amenity slot
+    
+    Body: {"amenity_id": 1, "slot_start": "2025-06-01T18:00"}
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        data = request.get_json()
+        
+        if not data.get('amenity_id') or not data.get('slot_start'):
+            return jsonify({'error': 'Amenity ID and slot start are required'}), 400
+        try:
+            slot_start = datetime.fromisoformat(data['slot_start'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'slot_start must be an ISO date and time'}), 400
+        
+        # Capacity is claimed with a guarded counter update in the same transaction
+        reservation_id = run_transaction(
+            lambda: amenity_reservations.reserve(user_id, data['amenity_id'], slot_start.replace(tzinfo=None))
+        )
+        
+        return json_response({
+            'message': 'Reservation confirmed',
+            'reservation': _reservation(reservation_id)
+        }), 201
+        
+    except TransitionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@reservations_bp.route('', methods=['GET'])
+@jwt_required()
+def get_reservations():
+    """Get reservations (the user's own, or all for admin), latest slot first
+    
+    Filters: amenity_id, status, date (slots on that day); admins can
+    also filter by user_id.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        role = current_role()
+        
+        view = reservation_schema.view(request.args)
+        query = view.query(AmenityReservation.slot_start)
+        
+        if role == 'admin':
+            # Admin sees all reservations
+            owner_id = request.args.get('user_id', type=int)
+            if owner_id:
+                query = query.filter(AmenityReservation.user_id == owner_id)
+        else:
+            # User sees only their reservations
+            query = query.filter(AmenityReservation.user_id == user_id)
+        
+        amenity_id = request.args.get('amenity_id', type=int)
+        if amenity_id:
+            query = query.filter(AmenityReservation.amenity_id == amenity_id)
+        
+        status = request.args.get('status')
+        if status:
+            if status not in RESERVATION_STATUSES:
+                return jsonify({'error': f"status must be one of: {', '.join(RESERVATION_STATUSES)}"}), 400
+            query = query.filter(AmenityReservation.status == status)
+        
+        if request.args.get('date'):
+            day_start = datetime.combine(parse_day(request.args['date']), datetime.min.time())
+            query = query.filter(AmenityReservation.slot_start >= day_start,
+                                 AmenityReservation.slot_start < day_start + timedelta(days=1))
+        
+        return list_response(
+            query, AmenityReservation.slot_start, AmenityReservation.id, view.dump,
+            descending=True
+        ), 200
+        
+    except (ReservationError, FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@reservations_bp.route('/<int:reservation_id>', methods=['GET'])
+@jwt_required()
+def get_reservation(reservation_id):
+    """Get single reservation"""
+    try:
+        user_id = int(get_jwt_identity())
+        role = current_role()
+        
+        view = reservation_schema.view(request.args)
+        reservation = view.query(AmenityReservation.user_id).filter(
+            AmenityReservation.id == reservation_id
+        ).first()
+        if not reservation:
+            return jsonify({'error': 'Reservation not found'}), 404
+        
+        # Check authorization
+        if role != 'admin' and reservation.user_id != user_id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return json_response(view.dump_one(reservation)), 200
+        
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@reservations_bp.route('/<int:reservation_id>/cancel', methods=['PUT'])
+@jwt_required()
+def cancel_reservation(reservation_id):
+    """Cancel a reservation and free its place (owner before the slot starts, or admin)"""
+    try:
+        user_id = int(get_jwt_identity())
+        is_admin = current_role() == 'admin'
+        
+        run_transaction(lambda: amenity_reservations.cancel(reservation_id, user_id, is_admin))
+        
+        return json_response({
+            'message': 'Reservation cancelled',
+            'reservation': _reservation(reservation_id)
+        }), 200
+        
+    except TransitionError as e:
+        return jsonify({'error': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -1,49 +1,75 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
-from models import db, Tower, User
+from models import db, Tower, EMPTY_UNIT_COUNTS
+from authz import admin_required
+from cache import cache
+from pagination import list_response, PaginationError
+from serializers import tower_schema, json_response, FieldError
 
 towers_bp = Blueprint('towers', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        return user and user.role == 'admin'
-    except:
-        return False
+
+# Computed tower fields -> key in Tower.unit_counts()
+COUNT_FIELDS = {
+    'unit_count': 'total',
+    'available_units': 'available',
+    'occupied_units': 'occupied',
+    'maintenance_units': 'maintenance',
+}
+
+
+def serialize_towers(rows, view=tower_schema.default):
+    """Serialize tower rows, adding unit counts from one aggregate query
+
+    The aggregate is skipped when the view requests no count fields.
+    """
+    towers = view.dump(rows)
+    if not view.computed:
+        return towers
+    counts = Tower.unit_counts([row.id for row in rows])
+    for row, tower in zip(rows, towers):
+        tower_counts = counts.get(row.id, EMPTY_UNIT_COUNTS)
+        for field in view.computed:
+            tower[field] = tower_counts[COUNT_FIELDS[field]]
+    return towers
 
 
 @towers_bp.route('', methods=['GET'])
+@cache.cached('towers')
 def get_towers():
     """Get all towers"""
     try:
-        towers = Tower.query.all()
-        return jsonify([tower.to_dict() for tower in towers]), 200
+        view = tower_schema.view(request.args)
+        return list_response(
+            view.query(Tower.created_at), Tower.created_at, Tower.id,
+            lambda rows: serialize_towers(rows, view)
+        ), 200
+    except (FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @towers_bp.route('/<int:tower_id>', methods=['GET'])
+@cache.cached('towers')
 def get_tower(tower_id):
     """Get single tower by ID"""
     try:
-        tower = Tower.query.get(tower_id)
+        view = tower_schema.view(request.args)
+        tower = view.query().filter(Tower.id == tower_id).first()
         if not tower:
             return jsonify({'error': 'Tower not found'}), 404
-        return jsonify(tower.to_dict()), 200
+        return json_response(serialize_towers([tower], view)[0]), 200
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @towers_bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required()
 def create_tower():
     """Create new tower (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         
         if not data.get('name') or not data.get('address'):
@@ -58,6 +84,7 @@ def create_tower():
         
         db.session.add(tower)
         db.session.commit()
+        cache.invalidate('towers', 'units')
         
         return jsonify({
             'message': 'Tower created successfully',
@@ -70,13 +97,10 @@ def create_tower():
 
 
 @towers_bp.route('/<int:tower_id>', methods=['PUT'])
-@jwt_required()
+@admin_required()
 def update_tower(tower_id):
     """Update tower (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         tower = Tower.query.get(tower_id)
         if not tower:
             return jsonify({'error': 'Tower not found'}), 404
@@ -93,6 +117,7 @@ def update_tower(tower_id):
             tower.description = data['description']
         
         db.session.commit()
+        cache.invalidate('towers', 'units')
         
         return jsonify({
             'message': 'Tower updated successfully',
@@ -105,19 +130,17 @@ def update_tower(tower_id):
 
 
 @towers_bp.route('/<int:tower_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required()
 def delete_tower(tower_id):
     """Delete tower (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         tower = Tower.query.get(tower_id)
         if not tower:
             return jsonify({'error': 'Tower not found'}), 404
         
         db.session.delete(tower)
         db.session.commit()
+        cache.invalidate('towers', 'units')
         
         return jsonify({'message': 'Tower deleted successfully'}), 200
         
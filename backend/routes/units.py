@@ -1,63 +1,110 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
+import csv
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.orm.exc import StaleDataError
 from models import db, Unit
+from authz import admin_required
+from cache import cache
+from pagination import list_response, PaginationError
+from serializers import unit_schema, json_response, FieldError
+from unit_search import build_search_query, search_order, SearchError
+from availability import filter_available, parse_window, calendar, AvailabilityError
+from unit_import import UnitImporter, ImportFormatError, iter_csv_rows, iter_ndjson_rows
 
 units_bp = Blueprint('units', __name__)
 
-def admin_required():
-    """Check if user is admin"""
-    claims = get_jwt()
-    return claims.get('role') == 'admin'
-
 
 @units_bp.route('', methods=['GET'])
+@cache.cached('units')
 def get_units():
     """Get all units with optional filters"""
     try:
-        query = Unit.query
+        view = unit_schema.view(request.args)
+        query = view.query(Unit.created_at)
         
         # Filter by tower
         tower_id = request.args.get('tower_id')
         if tower_id:
-            query = query.filter_by(tower_id=tower_id)
+            query = query.filter(Unit.tower_id == tower_id)
         
         # Filter by status
         status = request.args.get('status')
         if status:
-            query = query.filter_by(status=status)
+            query = query.filter(Unit.status == status)
         
         # Filter by bedrooms
         bedrooms = request.args.get('bedrooms')
         if bedrooms:
-            query = query.filter_by(bedrooms=int(bedrooms))
+            query = query.filter(Unit.bedrooms == int(bedrooms))
+        
+        # Filter by free date window
+        query = filter_available(query, request.args)
         
-        units = query.all()
-        return jsonify([unit.to_dict() for unit in units]), 200
+        return list_response(query, Unit.created_at, Unit.id, view.dump), 200
         
+    except (AvailabilityError, FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@units_bp.route('/search', methods=['GET'])
+@cache.cached('units')
+def search_units():
+    """Search units by ranges, multi-value filters and description text"""
+    try:
+        view = unit_schema.view(request.args)
+        sort_column, descending, nulls_last = search_order(request.args)
+        query = build_search_query(request.args, view.query(sort_column))
+        return list_response(
+            query, sort_column, Unit.id, view.dump,
+            descending=descending, nulls_last=nulls_last
+        ), 200
+        
+    except (SearchError, AvailabilityError, FieldError, PaginationError) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @units_bp.route('/<int:unit_id>', methods=['GET'])
+@cache.cached('units')
 def get_unit(unit_id):
     """Get single unit by ID"""
     try:
-        unit = Unit.query.get(unit_id)
+        view = unit_schema.view(request.args)
+        unit = view.query().filter(Unit.id == unit_id).first()
         if not unit:
             return jsonify({'error': 'Unit not found'}), 404
-        return jsonify(unit.to_dict()), 200
+        return json_response(view.dump_one(unit)), 200
+    except FieldError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@units_bp.route('/<int:unit_id>/availability', methods=['GET'])
+@cache.cached('units')
+def get_unit_availability(unit_id):
+    """Busy and free periods of a unit between from and to (inclusive ISO dates)"""
+    try:
+        window = parse_window(request.args, 'from', 'to')
+        if window is None:
+            return jsonify({'error': 'from is required'}), 400
+        unit = db.session.get(Unit, unit_id)
+        if not unit:
+            return jsonify({'error': 'Unit not found'}), 404
+        return jsonify(calendar(unit, *window)), 200
+    except AvailabilityError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @units_bp.route('', methods=['POST'])
-@jwt_required()
+@admin_required()
 def create_unit():
     """Create new unit (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         data = request.get_json()
         
         if not data.get('tower_id') or not data.get('unit_number') or not data.get('rent_amount'):
@@ -77,6 +124,7 @@ def create_unit():
         
         db.session.add(unit)
         db.session.commit()
+        cache.invalidate('units', 'towers')
         
         return jsonify({
             'message': 'Unit created successfully',
@@ -88,14 +136,61 @@ def create_unit():
         return jsonify({'error': str(e)}), 500
 
 
+@units_bp.route('/import', methods=['POST'])
+@admin_required()
+def import_units():
+    """Bulk import units from a CSV or NDJSON body (admin only)
+    
+    Query parameters: format=csv|ndjson (defaults from Content-Type),
+    dry_run=1 to validate only, on_error=abort|skip (default abort: any
+    invalid row rolls back the whole import).
+    """
+    try:
+        fmt = request.args.get('format')
+        if not fmt:
+            fmt = 'ndjson' if 'json' in (request.mimetype or '') else 'csv'
+        if fmt not in ('csv', 'ndjson'):
+            return jsonify({'error': 'format must be csv or ndjson'}), 400
+        
+        on_error = request.args.get('on_error', 'abort')
+        if on_error not in ('abort', 'skip'):
+            return jsonify({'error': 'on_error must be abort or skip'}), 400
+        
+        importer = UnitImporter(
+            batch_size=current_app.config['UNIT_IMPORT_BATCH_SIZE'],
+            max_rows=current_app.config['UNIT_IMPORT_MAX_ROWS'],
+            dry_run=request.args.get('dry_run') in ('1', 'true')
+        )
+        rows = iter_csv_rows(request.stream) if fmt == 'csv' else iter_ndjson_rows(request.stream)
+        for raw in rows:
+            importer.add(raw)
+        importer.flush()
+        
+        commit = not importer.dry_run and (on_error == 'skip' or importer.error_rows == 0)
+        if commit:
+            db.session.commit()
+            cache.invalidate('units', 'towers')
+        else:
+            db.session.rollback()
+        
+        report = importer.report(committed=commit)
+        if importer.dry_run:
+            return jsonify(report), 200
+        return jsonify(report), 201 if commit else 400
+        
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @units_bp.route('/<int:unit_id>', methods=['PUT'])
-@jwt_required()
+@admin_required()
 def update_unit(unit_id):
     """Update unit (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         unit = Unit.query.get(unit_id)
         if not unit:
             return jsonify({'error': 'Unit not found'}), 404
@@ -109,31 +204,33 @@ def update_unit(unit_id):
                 setattr(unit, field, data[field])
         
         db.session.commit()
+        cache.invalidate('units', 'towers')
         
         return jsonify({
             'message': 'Unit updated successfully',
             'unit': unit.to_dict()
         }), 200
         
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'error': 'Unit was modified concurrently, please retry'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
 @units_bp.route('/<int:unit_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required()
 def delete_unit(unit_id):
     """Delete unit (admin only)"""
     try:
-        if not admin_required():
-            return jsonify({'error': 'Admin access required'}), 403
-        
         unit = Unit.query.get(unit_id)
         if not unit:
             return jsonify({'error': 'Unit not found'}), 404
         
         db.session.delete(unit)
         db.session.commit()
+        cache.invalidate('units', 'towers')
         
         return jsonify({'message': 'Unit deleted successfully'}), 200
         
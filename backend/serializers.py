@@ -0,0 +1,453 @@
+"""Column-projected serialization for read endpoints
+
+``Model.to_dict()`` needs a fully built ORM object per row, plus the
+eager-loaded relationships it reads. A Schema instead selects just the
+columns a response contains, joined in one statement, and turns each row
+tuple into a dict with a single ``zip``. Without parameters a Schema
+produces the same keys and values as ``to_dict()``.
+
+Clients can ask for less, or for related objects, with two query
+parameters understood by the read endpoints:
+
+- ``?fields=id,status,unit_number``: only these keys. Related tables
+  whose columns are not requested are not joined.
+- ``?expand=unit,user``: embed the named related objects, e.g.
+  ``"unit": {...}`` on a booking (``null`` when there is none).
+  ``fields`` can narrow them too: ``?fields=id,unit.rent_amount``
+  expands ``unit`` with just its rent.
+
+Each combination is compiled into a View once and reused.
+
+``json_response`` produces the same bytes as ``jsonify`` (sorted keys,
+ASCII-only, compact separators, trailing newline) but encodes with
+orjson when it is installed. orjson writes non-ASCII text and very large
+or very small floats differently from the standard library, so bodies
+containing either, and pretty-printed debug output, are encoded with
+``json`` instead. Non-finite floats, which jsonify writes as invalid JSON
+(NaN, Infinity), become null.
+"""
+import json
+import re
+from datetime import date, datetime, time
+from flask import current_app
+from sqlalchemy.sql.util import ClauseAdapter, find_tables
+from models import db, User, Tower, Unit, Amenity, AmenityReservation, Booking, Lease, LeaseRenewalOffer, Payment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# Compiled views kept per schema; the parameters come from clients
+MAX_VIEWS = 256
+
+# Exponent candidates; starting the pattern with a literal keeps the scan fast
+_EXPONENT = re.compile(rb'e-?[0-9]')
+_DIGITS = frozenset(b'0123456789')
+
+
+class FieldError(ValueError):
+    """Raised for unknown names in ?fields= or ?expand="""
+
+
+def _expression(column):
+    """Core column expression of a mapped attribute"""
+    return column.__clause_element__() if hasattr(column, '__clause_element__') else column
+
+
+def _names(raw):
+    """Comma-separated parameter value as a tuple of unique names"""
+    names = []
+    for name in (raw or '').split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return tuple(names)
+
+
+class Schema:
+    """The columns behind one model's JSON representation
+
+    ``fields`` maps each output key to a column expression and ``joins``
+    lists the (model, onclause) outer joins those columns may need, in
+    dependency order. ``relations`` maps expandable names to (Schema,
+    onclause) pairs. ``computed`` names keys the endpoint fills in
+    itself after ``dump``; they are included by default and can be
+    selected with ``fields`` like any other key.
+    """
+
+    def __init__(self, model, fields, joins=(), relations=None, computed=()):
+        self.model = model
+        self.fields = dict(fields)
+        self.joins = tuple((entity.__table__, onclause) for entity, onclause in joins)
+        self.relations = dict(relations or {})
+        self.computed = tuple(computed)
+        self._views = {}
+        self.default = View(self, tuple(self.fields) + self.computed, {})
+
+    def view(self, args):
+        """View for the ``fields`` and ``expand`` parameters in args
+
+        Raises FieldError for names the schema does not know.
+        """
+        fields = _names(args.get('fields'))
+        expand = _names(args.get('expand'))
+        if not fields and not expand:
+            return self.default
+
+        view = self._views.get((fields, expand))
+        if view is None:
+            view = self._compile(fields, expand)
+            if len(self._views) >= MAX_VIEWS:
+                self._views.clear()
+            self._views[(fields, expand)] = view
+        return view
+
+    def _compile(self, fields, expand):
+        known = tuple(self.fields) + self.computed
+        keys = [] if fields else list(known)
+        nested = {}
+        for name in fields:
+            relation, _, key = name.partition('.')
+            if not key:
+                if name not in known:
+                    raise FieldError(f"Unknown field '{name}'; expected one of: {', '.join(known)}")
+                keys.append(name)
+                continue
+            self._relation(relation)
+            if key not in self.relations[relation][0].fields:
+                raise FieldError(f"Unknown field '{name}'")
+            nested.setdefault(relation, []).append(key)
+        for relation in expand:
+            self._relation(relation)
+            nested.setdefault(relation, None)
+
+        nested = {
+            relation: tuple(nested_keys or self.relations[relation][0].fields)
+            for relation, nested_keys in nested.items()
+        }
+        return View(self, tuple(keys), nested)
+
+    def _relation(self, name):
+        if name not in self.relations:
+            choices = ', '.join(self.relations) or 'none'
+            raise FieldError(f"Cannot expand '{name}'; expandable: {choices}")
+
+    # The full representation, as returned without parameters
+
+    def query(self, *keep):
+        return self.default.query(*keep)
+
+    def dump(self, rows):
+        return self.default.dump(rows)
+
+
+class View:
+    """A compiled selection of a Schema's keys and expanded relations"""
+
+    def __init__(self, schema, keys, nested):
+        self.schema = schema
+        self.keys = tuple(key for key in keys if key in schema.fields)
+        self.computed = tuple(key for key in keys if key in schema.computed)
+
+        root = schema.model.__table__
+        columns = [_expression(schema.fields[key]).label(key) for key in self.keys]
+        joins = list(schema.joins)
+        self.expansions = []
+        for name, nested_keys in nested.items():
+            related, onclause = schema.relations[name]
+            adapt = _place_relation(related, onclause, joins)
+            start = len(columns)
+            columns += [
+                adapt(_expression(related.fields[key])).label(f'{name}.{key}')
+                for key in nested_keys
+            ]
+            # The related primary key tells a missing relation from NULL fields
+            columns.append(adapt(_expression(related.model.id)).label(f'{name}.'))
+            self.expansions.append((name, start, nested_keys))
+        self.columns = tuple(columns)
+
+        # Join only the tables the selected columns come from, plus the
+        # tables those joins go through
+        needed = set()
+        for column in columns:
+            needed.update(find_tables(column, check_columns=True))
+        for table, onclause in reversed(joins):
+            if table in needed:
+                needed.update(find_tables(onclause, check_columns=True))
+        needed.discard(root)
+        self.joins = tuple((table, onclause) for table, onclause in joins if table in needed)
+
+    def query(self, *keep):
+        """Query selecting the view's columns as plain rows
+
+        ``keep`` adds columns of the schema's model that the endpoint
+        needs without returning them, such as a pagination sort key or
+        an owner id for authorization. Rows expose them, and the model's
+        id, as attributes named after the column.
+        """
+        columns = list(self.columns)
+        selected = set(self.keys)
+        for column in (self.schema.model.id,) + keep:
+            if column.key not in selected:
+                columns.append(column.label(column.key))
+                selected.add(column.key)
+        query = db.session.query(*columns).select_from(self.schema.model)
+        for table, onclause in self.joins:
+            query = query.outerjoin(table, onclause)
+        return query
+
+    def dump(self, rows):
+        """Convert rows from ``query()`` into a list of dicts"""
+        keys = self.keys
+        if not self.expansions:
+            return [dict(zip(keys, row)) for row in rows]
+
+        items = []
+        for row in rows:
+            item = dict(zip(keys, row))
+            for name, start, nested_keys in self.expansions:
+                end = start + len(nested_keys)
+                item[name] = dict(zip(nested_keys, row[start:end])) if row[end] is not None else None
+            items.append(item)
+        return items
+
+    def dump_one(self, row):
+        return self.dump([row])[0]
+
+    def pick(self, item):
+        """Restrict an already built dict, e.g. a cached to_dict(), to the view's keys"""
+        if self is self.schema.default:
+            return item
+        return {key: item[key] for key in self.keys + self.computed}
+
+
+def _place_relation(related, onclause, joins):
+    """Append the joins an expanded relation needs; returns its column adapter
+
+    The related table and the tables it joins to are shared with the
+    parent when the parent already joins them the same way (booking ->
+    unit -> tower), and joined again under an alias otherwise.
+    """
+    aliases = []
+
+    def adapt(clause):
+        for alias in aliases:
+            clause = ClauseAdapter(alias).traverse(clause)
+        return clause
+
+    wanted = [(related.model.__table__, onclause)] + list(related.joins)
+    for table, clause in wanted:
+        clause = adapt(clause)
+        if any(joined is table and existing.compare(clause) for joined, existing in joins):
+            continue
+        alias = table.alias()
+        aliases.append(alias)
+        joins.append((alias, ClauseAdapter(alias).traverse(clause)))
+    return adapt
+
+
+user_schema = Schema(User, {
+    'id': User.id,
+    'email': User.email,
+    'name': User.name,
+    'phone': User.phone,
+    'role': User.role,
+    'created_at': User.created_at,
+})
+
+# Unit counts are filled in by routes.towers.serialize_towers
+tower_schema = Schema(Tower, {
+    'id': Tower.id,
+    'name': Tower.name,
+    'address': Tower.address,
+    'total_floors': Tower.total_floors,
+    'description': Tower.description,
+    'created_at': Tower.created_at,
+}, computed=('unit_count', 'available_units', 'occupied_units', 'maintenance_units'))
+
+unit_schema = Schema(Unit, {
+    'id': Unit.id,
+    'tower_id': Unit.tower_id,
+    'tower_name': Tower.name,
+    'unit_number': Unit.unit_number,
+    'floor': Unit.floor,
+    'bedrooms': Unit.bedrooms,
+    'bathrooms': Unit.bathrooms,
+    'size_sqft': Unit.size_sqft,
+    'rent_amount': Unit.rent_amount,
+    'status': Unit.status,
+    'description': Unit.description,
+    'created_at': Unit.created_at,
+}, joins=[
+    (Tower, Tower.id == Unit.tower_id),
+], relations={
+    'tower': (tower_schema, Tower.id == Unit.tower_id),
+})
+
+amenity_schema = Schema(Amenity, {
+    'id': Amenity.id,
+    'name': Amenity.name,
+    'description': Amenity.description,
+    'availability_hours': Amenity.availability_hours,
+    'opens_at': Amenity.opens_at,
+    'closes_at': Amenity.closes_at,
+    'slot_minutes': Amenity.slot_minutes,
+    'slot_capacity': Amenity.slot_capacity,
+    'is_active': Amenity.is_active,
+    'created_at': Amenity.created_at,
+})
+
+reservation_schema = Schema(AmenityReservation, {
+    'id': AmenityReservation.id,
+    'amenity_id': AmenityReservation.amenity_id,
+    'amenity_name': Amenity.name,
+    'user_id': AmenityReservation.user_id,
+    'slot_start': AmenityReservation.slot_start,
+    'slot_end': AmenityReservation.slot_end,
+    'status': AmenityReservation.status,
+    'created_at': AmenityReservation.created_at,
+    'cancelled_at': AmenityReservation.cancelled_at,
+}, joins=[
+    (Amenity, Amenity.id == AmenityReservation.amenity_id),
+], relations={
+    'amenity': (amenity_schema, Amenity.id == AmenityReservation.amenity_id),
+    'user': (user_schema, User.id == AmenityReservation.user_id),
+})
+
+# Like Lease.to_dict, unit number and tower come from the lease's booking
+lease_schema = Schema(Lease, {
+    'id': Lease.id,
+    'booking_id': Lease.booking_id,
+    'user_id': Lease.user_id,
+    'user_name': User.name,
+    'unit_id': Lease.unit_id,
+    'unit_number': Unit.unit_number,
+    'tower_name': Tower.name,
+    'start_date': Lease.start_date,
+    'end_date': Lease.end_date,
+    'monthly_rent': Lease.monthly_rent,
+    'security_deposit': Lease.security_deposit,
+    'status': Lease.status,
+    'created_at': Lease.created_at,
+}, joins=[
+    (User, User.id == Lease.user_id),
+    (Booking, Booking.id == Lease.booking_id),
+    (Unit, Unit.id == Booking.unit_id),
+    (Tower, Tower.id == Unit.tower_id),
+], relations={
+    'tenant': (user_schema, User.id == Lease.user_id),
+    'unit': (unit_schema, Unit.id == Booking.unit_id),
+})
+
+booking_schema = Schema(Booking, {
+    'id': Booking.id,
+    'user_id': Booking.user_id,
+    'user_name': User.name,
+    'user_email': User.email,
+    'user_phone': User.phone,
+    'unit_id': Booking.unit_id,
+    'unit_number': Unit.unit_number,
+    'tower_name': Tower.name,
+    'rent_amount': Unit.rent_amount,
+    'requested_move_in_date': Booking.requested_move_in_date,
+    'status': Booking.status,
+    'admin_comments': Booking.admin_comments,
+    'created_at': Booking.created_at,
+    'updated_at': Booking.updated_at,
+}, joins=[
+    (User, User.id == Booking.user_id),
+    (Unit, Unit.id == Booking.unit_id),
+    (Tower, Tower.id == Unit.tower_id),
+], relations={
+    'user': (user_schema, User.id == Booking.user_id),
+    'unit': (unit_schema, Unit.id == Booking.unit_id),
+    'lease': (lease_schema, Lease.booking_id == Booking.id),
+})
+
+# Defined after booking_schema, which it refers to
+lease_schema.relations['booking'] = (booking_schema, Booking.id == Lease.booking_id)
+
+renewal_offer_schema = Schema(LeaseRenewalOffer, {
+    'id': LeaseRenewalOffer.id,
+    'lease_id': LeaseRenewalOffer.lease_id,
+    'user_id': LeaseRenewalOffer.user_id,
+    'unit_id': LeaseRenewalOffer.unit_id,
+    'start_date': LeaseRenewalOffer.start_date,
+    'end_date': LeaseRenewalOffer.end_date,
+    'monthly_rent': LeaseRenewalOffer.monthly_rent,
+    'status': LeaseRenewalOffer.status,
+    'created_at': LeaseRenewalOffer.created_at,
+}, relations={
+    'lease': (lease_schema, Lease.id == LeaseRenewalOffer.lease_id),
+    'unit': (unit_schema, Unit.id == LeaseRenewalOffer.unit_id),
+})
+
+payment_schema = Schema(Payment, {
+    'id': Payment.id,
+    'lease_id': Payment.lease_id,
+    'amount': Payment.amount,
+    'payment_date': Payment.payment_date,
+    'payment_method': Payment.payment_method,
+    'status': Payment.status,
+    'created_at': Payment.created_at,
+}, relations={
+    'lease': (lease_schema, Lease.id == Payment.lease_id),
+})
+
+
+def _default(value):
+    """Dates and times as ISO 8601, as to_dict() writes them; anything else as Flask would"""
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return current_app.json.default(value)
+
+
+def _odd_floats(body):
+    """Whether body may hold a float orjson writes differently from json
+
+    Those are the ones json writes with an exponent: orjson writes 1e-07
+    as 1e-7, 1e+16 as 1e16 and 1e-05 as 0.00001. Text that looks similar
+    also matches; it only costs a fallback to json.
+    """
+    if b'0.0000' in body:
+        return True
+    for match in _EXPONENT.finditer(body):
+        if match.start() and body[match.start() - 1] in _DIGITS:
+            return True
+    return False
+
+
+def dumps(payload):
+    """Encode payload exactly as jsonify would, returning bytes
+
+    Unlike jsonify, dates and datetimes are written in ISO 8601, the way
+    ``to_dict()`` writes them, so schema rows can carry them unconverted.
+    """
+    provider = current_app.json
+    pretty = getattr(provider, 'compact', None) is False or (
+        getattr(provider, 'compact', None) is None and current_app.debug
+    )
+    sort_keys = getattr(provider, 'sort_keys', True)
+    ensure_ascii = getattr(provider, 'ensure_ascii', True)
+
+    if orjson is not None and not pretty and sort_keys and ensure_ascii:
+        try:
+            body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except orjson.JSONEncodeError:
+            body = None  # a type only Flask's provider knows how to encode
+        if body is not None and body.isascii() and not _odd_floats(body):
+            return body
+
+    if pretty:
+        text = json.dumps(payload, default=_default, sort_keys=sort_keys,
+                          ensure_ascii=ensure_ascii, indent=2)
+    else:
+        text = json.dumps(payload, default=_default, sort_keys=sort_keys,
+                          ensure_ascii=ensure_ascii, separators=(',', ':'))
+    return f'{text}\n'.encode()
+
+
+def json_response(payload):
+    """Drop-in replacement for ``jsonify(payload)`` using the fast encoder"""
+    return current_app.response_class(dumps(payload), mimetype=current_app.json.mimetype)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress check for amenity reservations
+
+Creates a fresh reservable amenity with a few small evening slots and a
+group of residents, then has many threads (several per resident) grab,
+cancel and re-grab places in those slots at once, like the evening rush
+for the gym. Afterwards it verifies:
+
+- no slot has more confirmed reservations than its capacity
+- every slot counter matches its confirmed reservations
+- no resident holds the same slot twice or overlapping slots
+- every slot ends up full, since demand exceeds capacity
+
+Point it at a scratch database, e.g.:
+
+    DATABASE_URL=sqlite:////tmp/rental_stress.db python stress_amenity_reservations.py
+"""
+
+import argparse
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+
+from app import create_app, check_schema
+from models import db, User, Amenity, AmenityReservation, AmenitySlot
+
+SLOT_MINUTES = 60
+PEAK_START = time(18)
+
+
+def setup(residents, slots, capacity):
+    """Create the stress amenity and residents; returns (amenity id, slot starts, tokens)"""
+    tag = uuid.uuid4().hex[:8]
+    amenity = Amenity(name=f'Stress Gym {tag}', availability_hours='24/7', is_active=True,
+                      slot_minutes=SLOT_MINUTES, slot_capacity=capacity)
+    users = [
+        # Tokens are minted directly, so no password is needed
+        User(email=f'stress-resident-{tag}-{i}@example.com', name=f'Resident {i}', role='user',
+             password_hash='!')
+        for i in range(residents)
+    ]
+    db.session.add(amenity)
+    db.session.add_all(users)
+    db.session.commit()
+
+    first = datetime.combine(date.today() + timedelta(days=1), PEAK_START)
+    starts = [first + timedelta(minutes=SLOT_MINUTES * i) for i in range(slots)]
+    tokens = [
+        create_access_token(identity=str(user.id), additional_claims={'role': user.role, 'email': user.email})
+        for user in users
+    ]
+    return amenity.id, starts, tokens
+
+
+def run_workers(app, workers, rounds, amenity_id, starts, tokens):
+    """Race reservations and cancellations from many threads; returns response counts"""
+    outcomes = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+
+    def record(action, response):
+        with lock:
+            outcomes[(action, response.status_code)] += 1
+        return response
+
+    def worker(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        # Several threads per resident, so one resident's requests race too
+        headers = {'Authorization': f'Bearer {tokens[seed % len(tokens)]}'}
+        held = []
+        barrier.wait()
+        for _ in range(rounds):
+            if held and rng.random() < 0.3:
+                reservation_id = held.pop(rng.randrange(len(held)))
+                record('cancel', client.put(f'/api/reservations/{reservation_id}/cancel', headers=headers))
+                continue
+            slot_start = rng.choice(starts)
+            response = record('reserve', client.post('/api/reservations', headers=headers, json={
+                'amenity_id': amenity_id, 'slot_start': slot_start.isoformat()
+            }))
+            if response.status_code == 201:
+                held.append(response.get_json()['reservation']['id'])
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def verify(amenity_id, starts, capacity):
+    """Return a list of invariant violations for the stress amenity"""
+    problems = []
+    confirmed = db.session.query(
+        AmenityReservation.user_id, AmenityReservation.slot_start
+    ).filter(
+        AmenityReservation.amenity_id == amenity_id, AmenityReservation.status == 'confirmed'
+    ).all()
+    per_slot = Counter(slot_start for _, slot_start in confirmed)
+    counters = dict(
+        db.session.query(AmenitySlot.slot_start, AmenitySlot.reserved)
+        .filter(AmenitySlot.amenity_id == amenity_id)
+    )
+    for slot_start in starts:
+        taken = per_slot.get(slot_start, 0)
+        if taken > capacity:
+            problems.append(f'slot {slot_start}: {taken} confirmed reservations for {capacity} places')
+        if counters.get(slot_start, 0) != taken:
+            problems.append(f'slot {slot_start}: counter says {counters.get(slot_start, 0)}, '
+                            f'{taken} confirmed reservations')
+        if taken < capacity:
+            problems.append(f'slot {slot_start}: only {taken} of {capacity} places taken')
+
+    duplicates = [key for key, count in Counter(confirmed).items() if count > 1]
+    if duplicates:
+        problems.append(f'{len(duplicates)} residents hold the same slot twice')
+    # Slots are back to back, so two different slots of one resident never overlap;
+    # overlaps would only show up as duplicates above
+    unknown = db.session.query(func.count(AmenityReservation.id)).filter(
+        AmenityReservation.amenity_id == amenity_id,
+        AmenityReservation.slot_start.notin_(starts)
+    ).scalar()
+    if unknown:
+        problems.append(f'{unknown} reservations outside the stress slots')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--residents', type=int, default=24)
+    parser.add_argument('--slots', type=int, default=3)
+    parser.add_argument('--capacity', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=48)
+    parser.add_argument('--rounds', type=int, default=10, help='requests per worker')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    with app.app_context():
+        amenity_id, starts, tokens = setup(args.residents, args.slots, args.capacity)
+
+    print(f"{args.workers} workers from {args.residents} residents racing for "
+          f"{args.slots} slots of {args.capacity} places...")
+    outcomes = run_workers(app, args.workers, args.rounds, amenity_id, starts, tokens)
+    # Demand exceeds capacity, so a final round of grabs fills anything freed late
+    client = app.test_client()
+    for token in tokens:
+        for slot_start in starts:
+            client.post('/api/reservations', headers={'Authorization': f'Bearer {token}'}, json={
+                'amenity_id': amenity_id, 'slot_start': slot_start.isoformat()
+            })
+    for (action, status), count in sorted(outcomes.items()):
+        print(f"   {action:8} {status}: {count}")
+
+    with app.app_context():
+        problems = verify(amenity_id, starts, args.capacity)
+
+    if any(status >= 500 for _, status in outcomes):
+        problems.append('some requests failed with a server error')
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print(f"\n✅ {args.slots} slots filled to exactly {args.capacity} places, no double bookings")
+
+
+if __name__ == "__main__":
+    main()
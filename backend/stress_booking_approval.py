@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress check for booking approval
+
+Creates a fresh tower of units, each with several competing pending
+bookings, then has many threads approve bookings, reject bookings and
+submit new bookings for the same units at once. Afterwards it verifies:
+
+- no unit has more than one active lease or approved booking
+- no booking for those units is left pending
+- the unit is occupied and the lease counters match the lease table
+
+Point it at a scratch database, e.g.:
+
+    DATABASE_URL=sqlite:////tmp/rental_stress.db python stress_booking_approval.py
+"""
+
+import argparse
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from datetime import date
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func
+
+from app import create_app, check_schema
+from models import db, User, Tower, Unit, Booking, Lease
+import lease_stats
+
+
+def setup(units, bookings_per_unit):
+    """Create the stress tower, users and pending bookings; returns ids and tokens"""
+    tag = uuid.uuid4().hex[:8]
+    admin = User(email=f'stress-admin-{tag}@example.com', name='Stress Admin', role='admin')
+    tenant = User(email=f'stress-tenant-{tag}@example.com', name='Stress Tenant', role='user')
+    admin.set_password(tag)
+    tenant.set_password(tag)
+    tower = Tower(name=f'Stress {tag}', address='Stress Road', total_floors=10)
+    db.session.add_all([admin, tenant, tower])
+    db.session.flush()
+
+    unit_rows = [
+        Unit(tower_id=tower.id, unit_number=str(100 + i), floor=i % 10, bedrooms=2,
+             rent_amount=20000.0, status='available')
+        for i in range(units)
+    ]
+    db.session.add_all(unit_rows)
+    db.session.flush()
+
+    booking_rows = [
+        Booking(user_id=tenant.id, unit_id=unit.id, requested_move_in_date=date(2025, 1, 1),
+                status='pending')
+        for unit in unit_rows for _ in range(bookings_per_unit)
+    ]
+    db.session.add_all(booking_rows)
+    db.session.commit()
+
+    def token(user):
+        return create_access_token(
+            identity=str(user.id), additional_claims={'role': user.role, 'email': user.email}
+        )
+
+    return ([unit.id for unit in unit_rows], [booking.id for booking in booking_rows],
+            token(admin), token(tenant))
+
+
+def run_workers(app, workers, unit_ids, booking_ids, admin_token, tenant_token, batch_size):
+    """Hammer the booking endpoints from many threads; returns response counts"""
+    outcomes = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(workers)
+    admin = {'Authorization': f'Bearer {admin_token}'}
+    tenant = {'Authorization': f'Bearer {tenant_token}'}
+
+    def record(action, response):
+        with lock:
+            outcomes[(action, response.status_code)] += 1
+
+    def worker(seed):
+        client = app.test_client()
+        rng = random.Random(seed)
+        ids = booking_ids[:]
+        rng.shuffle(ids)
+        barrier.wait()
+        for position, booking_id in enumerate(ids):
+            roll = rng.random()
+            if roll < 0.1:
+                record('create', client.post('/api/bookings', headers=tenant, json={
+                    'unit_id': rng.choice(unit_ids), 'requested_move_in_date': '2025-02-01'
+                }))
+            elif roll < 0.2:
+                record('reject', client.put(f'/api/bookings/{booking_id}/reject',
+                                            headers=admin, json={'comments': 'stress'}))
+            elif roll < 0.3 and batch_size:
+                chunk = ids[position:position + batch_size]
+                record('batch', client.post('/api/bookings/batch', headers=admin, json={
+                    'decisions': [{'booking_id': i, 'decision': 'approve'} for i in chunk]
+                }))
+            else:
+                record('approve', client.put(f'/api/bookings/{booking_id}/approve', headers=admin))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def sweep(app, unit_ids, admin_token):
+    """Approve one still-pending booking for units that no worker managed to lease"""
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    with app.app_context():
+        pending = db.session.query(Booking.id).join(Unit).filter(
+            Booking.unit_id.in_(unit_ids), Booking.status == 'pending', Unit.status == 'available'
+        ).all()
+    for (booking_id,) in pending:
+        client.put(f'/api/bookings/{booking_id}/approve', headers=headers)
+
+
+def verify(unit_ids):
+    """Return a list of invariant violations for the stress units"""
+    problems = []
+    active = dict(
+        db.session.query(Lease.unit_id, func.count(Lease.id))
+        .filter(Lease.unit_id.in_(unit_ids), Lease.status == 'active')
+        .group_by(Lease.unit_id)
+    )
+    approved = dict(
+        db.session.query(Booking.unit_id, func.count(Booking.id))
+        .filter(Booking.unit_id.in_(unit_ids), Booking.status == 'approved')
+        .group_by(Booking.unit_id)
+    )
+    statuses = dict(db.session.query(Unit.id, Unit.status).filter(Unit.id.in_(unit_ids)))
+    for unit_id in unit_ids:
+        leased = active.get(unit_id, 0)
+        if leased > 1 or approved.get(unit_id, 0) > 1:
+            problems.append(f'unit {unit_id}: {leased} active leases, '
+                            f'{approved.get(unit_id, 0)} approved bookings')
+        if leased == 1 and statuses[unit_id] != 'occupied':
+            problems.append(f'unit {unit_id}: leased but status is {statuses[unit_id]}')
+
+    still_pending = db.session.query(func.count(Booking.id)).join(Unit).filter(
+        Booking.unit_id.in_(unit_ids), Booking.status == 'pending', Unit.status == 'occupied'
+    ).scalar()
+    if still_pending:
+        problems.append(f'{still_pending} bookings still pending for occupied units')
+
+    if lease_stats.counter_stats() != lease_stats.live_stats():
+        problems.append('lease counters do not match the leases table')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--units', type=int, default=25)
+    parser.add_argument('--bookings-per-unit', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--batch-size', type=int, default=5, help='0 disables batch approvals')
+    args = parser.parse_args()
+
+    app = create_app()
+    check_schema(app)
+    with app.app_context():
+        unit_ids, booking_ids, admin_token, tenant_token = setup(args.units, args.bookings_per_unit)
+
+    print(f"{args.workers} workers racing over {len(booking_ids)} bookings for {len(unit_ids)} units...")
+    outcomes = run_workers(app, args.workers, unit_ids, booking_ids, admin_token, tenant_token,
+                           args.batch_size)
+    sweep(app, unit_ids, admin_token)
+    for (action, status), count in sorted(outcomes.items()):
+        print(f"   {action:8} {status}: {count}")
+
+    with app.app_context():
+        problems = verify(unit_ids)
+        leased = db.session.query(func.count(Lease.id)).filter(
+            Lease.unit_id.in_(unit_ids), Lease.status == 'active'
+        ).scalar()
+
+    if any(status >= 500 for _, status in outcomes):
+        problems.append('some requests failed with a server error')
+    if problems:
+        for problem in problems:
+            print(f"❌ {problem}")
+        sys.exit(1)
+    print(f"\n✅ {leased} active leases for {len(unit_ids)} units, no double bookings")
+
+
+if __name__ == "__main__":
+    main()
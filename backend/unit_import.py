@@ -0,0 +1,183 @@
+"""Bulk unit import from CSV or NDJSON
+
+The request body is parsed as a stream, one row at a time. Valid rows are
+buffered into batches and written with executemany INSERTs inside a
+single transaction. Rows that fail validation are collected into a
+per-row error report.
+"""
+import csv
+import io
+import json
+import math
+from datetime import datetime
+from sqlalchemy import insert
+from models import db, Tower, Unit, UNIT_STATUSES
+
+INTEGER_FIELDS = ('floor', 'bedrooms', 'bathrooms', 'size_sqft')
+UNIT_NUMBER_MAX_LENGTH = Unit.__table__.c.unit_number.type.length
+
+# Cap the error list so a completely wrong file cannot bloat the response
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """Raised when the upload cannot be parsed at all"""
+
+
+def iter_csv_rows(stream):
+    """Yield row dicts from a CSV byte stream with a header line"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if reader.fieldnames is None:
+        return
+    missing = {'tower_id', 'unit_number', 'rent_amount'} - set(reader.fieldnames)
+    if missing:
+        raise ImportFormatError(f"CSV header is missing: {', '.join(sorted(missing))}")
+    for row in reader:
+        yield {key: (value if value != '' else None) for key, value in row.items()}
+
+
+def iter_ndjson_rows(stream):
+    """Yield row dicts from a newline-delimited JSON byte stream"""
+    for line in io.TextIOWrapper(stream, encoding='utf-8'):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {'__invalid__': line[:80]}
+
+
+def _integer(value, field, errors, minimum=0):
+    if value is None:
+        return None
+    # int() would turn True into 1 and truncate 2.7 to 2
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        errors.append(f'{field} must be an integer')
+        return None
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        errors.append(f'{field} must be an integer')
+        return None
+    if number < minimum:
+        errors.append(f'{field} must be at least {minimum}')
+    return number
+
+
+class UnitImporter:
+    """Validates rows and inserts them in batches within one transaction"""
+
+    def __init__(self, batch_size=1000, max_rows=None, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.max_rows = max_rows
+        self.tower_ids = {tower_id for (tower_id,) in db.session.query(Tower.id)}
+        self._unit_numbers = {}
+        self._batch = []
+        self.created = 0
+        self.rows = 0
+        self.error_rows = 0
+        self.errors = []
+
+    def _existing_unit_numbers(self, tower_id):
+        """Unit numbers already used in a tower, loaded once per tower"""
+        if tower_id not in self._unit_numbers:
+            self._unit_numbers[tower_id] = {
+                number for (number,) in
+                db.session.query(Unit.unit_number).filter(Unit.tower_id == tower_id)
+            }
+        return self._unit_numbers[tower_id]
+
+    def validate(self, raw):
+        """Return (row, errors) for one raw input row"""
+        if '__invalid__' in raw:
+            return None, ['Row is not a JSON object']
+
+        errors = []
+        tower_id = _integer(raw.get('tower_id'), 'tower_id', errors, minimum=1)
+        if raw.get('tower_id') is None:
+            errors.append('tower_id is required')
+        elif tower_id is not None and tower_id not in self.tower_ids:
+            errors.append(f'Tower {tower_id} not found')
+
+        unit_number = raw.get('unit_number')
+        unit_number = str(unit_number).strip() if unit_number is not None else ''
+        if not unit_number:
+            errors.append('unit_number is required')
+        elif len(unit_number) > UNIT_NUMBER_MAX_LENGTH:
+            errors.append(f'unit_number must be at most {UNIT_NUMBER_MAX_LENGTH} characters')
+        elif tower_id in self.tower_ids and unit_number in self._existing_unit_numbers(tower_id):
+            errors.append(f'Unit {unit_number} already exists in tower {tower_id}')
+
+        rent_amount = raw.get('rent_amount')
+        try:
+            if isinstance(rent_amount, bool):
+                raise TypeError
+            rent_amount = float(rent_amount)
+            if not math.isfinite(rent_amount):
+                errors.append('rent_amount must be a finite number')
+            elif rent_amount <= 0:
+                errors.append('rent_amount must be positive')
+        except (TypeError, ValueError):
+            errors.append('rent_amount is required and must be a number')
+
+        status = raw.get('status') or 'available'
+        if status not in UNIT_STATUSES:
+            errors.append(f"status must be one of: {', '.join(UNIT_STATUSES)}")
+
+        row = {
+            'tower_id': tower_id,
+            'unit_number': unit_number,
+            'rent_amount': rent_amount,
+            'status': status,
+            'description': raw.get('description')
+        }
+        for field in INTEGER_FIELDS:
+            row[field] = _integer(raw.get(field), field, errors)
+        return row, errors
+
+    def add(self, raw):
+        """Validate and buffer one row, flushing a batch when full"""
+        self.rows += 1
+        if self.max_rows and self.rows > self.max_rows:
+            raise ImportFormatError(f'Import is limited to {self.max_rows} rows')
+
+        row, errors = self.validate(raw)
+        if errors:
+            self.error_rows += 1
+            if len(self.errors) < MAX_REPORTED_ERRORS:
+                self.errors.append({'row': self.rows, 'errors': errors})
+            return
+
+        # Later rows in the same file must not reuse this unit number
+        self._existing_unit_numbers(row['tower_id']).add(row['unit_number'])
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert the buffered rows with one executemany statement"""
+        if self.dry_run:
+            self._batch = []
+            return
+        if not self._batch:
+            return
+        now = datetime.utcnow()
+        for row in self._batch:
+            row['created_at'] = now
+        db.session.execute(insert(Unit.__table__), self._batch)
+        self.created += len(self._batch)
+        self._batch = []
+
+    def report(self, committed):
+        return {
+            'dry_run': self.dry_run,
+            'committed': committed,
+            'rows': self.rows,
+            'valid_rows': self.rows - self.error_rows,
+            'created': self.created if committed else 0,
+            'error_rows': self.error_rows,
+            'errors': self.errors
+        }
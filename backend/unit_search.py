@@ -0,0 +1,148 @@
+"""Server-side unit search
+
+Query parameters accepted by ``GET /api/units/search``:
+
+- ``<field>_min`` / ``<field>_max`` for rent_amount, size_sqft, floor,
+  bathrooms and bedrooms (inclusive ranges)
+- ``status``, ``tower_id``, ``bedrooms``: comma-separated or repeated values
+- ``q``: full-text match on the unit description
+- ``sort``: one of SORT_FIELDS, prefixed with ``-`` for descending
+- ``available_from`` / ``available_to``: free date window (see availability.py)
+
+Text search uses the Postgres tsvector GIN index, or the SQLite FTS5
+``units_fts`` table created by migration 0003. Other databases, or a
+SQLite build without FTS5, fall back to a case-insensitive LIKE.
+"""
+import re
+from sqlalchemy import and_, func, inspect, select, table, column, literal_column
+from models import db, Unit, UNIT_STATUSES
+from availability import filter_available
+
+RANGE_FIELDS = ('rent_amount', 'size_sqft', 'floor', 'bathrooms', 'bedrooms')
+SORT_FIELDS = ('created_at', 'rent_amount', 'size_sqft', 'floor', 'bathrooms', 'bedrooms')
+
+# Sort columns that never hold NULL can page without the NULLS LAST emulation
+NON_NULL_SORT_FIELDS = ('created_at', 'rent_amount')
+
+TS_CONFIG = 'english'
+
+units_fts = table('units_fts', column('rowid'))
+
+_fts_available = {}
+
+
+class SearchError(ValueError):
+    """Raised for malformed search parameters"""
+
+
+def _multi(args, name, cast=str):
+    """Collect a multi-value parameter given as repeats and/or comma lists"""
+    values = []
+    for raw in args.getlist(name):
+        for part in raw.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                values.append(cast(part))
+            except ValueError:
+                raise SearchError(f"Invalid value for {name}: '{part}'")
+    return values
+
+
+def _number(args, name):
+    raw = args.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        raise SearchError(f"{name} must be a number")
+
+
+def _sqlite_has_fts(engine):
+    """Whether the FTS5 index from migration 0003 exists (cached per engine)"""
+    key = str(engine.url)
+    if key not in _fts_available:
+        _fts_available[key] = inspect(engine).has_table('units_fts')
+    return _fts_available[key]
+
+
+def _fts5_query(text):
+    """Quote each term so user input cannot inject FTS5 query syntax"""
+    terms = re.findall(r'\w+', text)
+    return ' '.join('"{}"'.format(term) for term in terms)
+
+
+def text_match(text):
+    """SQL predicate matching units whose description contains the words in text"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        document = func.to_tsvector(TS_CONFIG, func.coalesce(Unit.description, ''))
+        return document.op('@@')(func.plainto_tsquery(TS_CONFIG, text))
+
+    if dialect == 'sqlite' and _sqlite_has_fts(db.engine):
+        fts_query = _fts5_query(text)
+        if not fts_query:
+            return Unit.id.is_(None)
+        matches = select(units_fts.c.rowid).where(
+            literal_column('units_fts').op('MATCH')(fts_query)
+        )
+        return Unit.id.in_(matches)
+
+    terms = re.findall(r'\w+', text) or [text]
+    return and_(*[Unit.description.ilike(f'%{term}%') for term in terms])
+
+
+def search_order(args):
+    """Translate the sort parameter into (sort_column, descending, nulls_last)"""
+    sort = args.get('sort', 'created_at')
+    descending = sort.startswith('-')
+    sort_field = sort.lstrip('-')
+    if sort_field not in SORT_FIELDS:
+        raise SearchError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+
+    return getattr(Unit, sort_field), descending, sort_field not in NON_NULL_SORT_FIELDS
+
+
+def build_search_query(args, query=None):
+    """Apply the search filters in args to a query over units
+
+    ``query`` defaults to a Unit query with the list loading profile;
+    any query selecting from units works. Ordering comes from
+    search_order().
+    """
+    if query is None:
+        query = Unit.query_with('list')
+
+    for field in RANGE_FIELDS:
+        attribute = getattr(Unit, field)
+        low = _number(args, f'{field}_min')
+        high = _number(args, f'{field}_max')
+        if low is not None and high is not None and low > high:
+            raise SearchError(f"{field}_min cannot exceed {field}_max")
+        if low is not None:
+            query = query.filter(attribute >= low)
+        if high is not None:
+            query = query.filter(attribute <= high)
+
+    statuses = _multi(args, 'status')
+    unknown = set(statuses) - set(UNIT_STATUSES)
+    if unknown:
+        raise SearchError(f"Unknown status: {', '.join(sorted(unknown))}")
+    if statuses:
+        query = query.filter(Unit.status.in_(statuses))
+
+    tower_ids = _multi(args, 'tower_id', int)
+    if tower_ids:
+        query = query.filter(Unit.tower_id.in_(tower_ids))
+
+    bedrooms = _multi(args, 'bedrooms', int)
+    if bedrooms:
+        query = query.filter(Unit.bedrooms.in_(bedrooms))
+
+    text = (args.get('q') or '').strip()
+    if text:
+        query = query.filter(text_match(text))
+
+    return filter_available(query, args)
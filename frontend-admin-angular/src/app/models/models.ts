@@ -11,6 +11,10 @@ export interface Tower {
     address: string;
     total_floors: number;
     description?: string;
+    unit_count?: number;
+    available_units?: number;
+    occupied_units?: number;
+    maintenance_units?: number;
     created_at?: string;
 }
 
@@ -73,7 +77,14 @@ export interface Stats {
     active_leases: number;
 }
 
+export interface Page<T> {
+    items: T[];
+    limit: number;
+    next_cursor: string | null;
+}
+
 export interface LoginResponse {
     access_token: string;
+    refresh_token: string;
     user: AdminUser;
 }
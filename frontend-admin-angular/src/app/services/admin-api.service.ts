@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient, HttpHeaders } from '@angular/common/http';
+import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { AdminUser, Tower, Unit, Amenity, Booking, Lease, Stats, LoginResponse } from '../models/models';
+import { AdminUser, Tower, Unit, Amenity, Booking, Lease, Stats, LoginResponse, Page } from '../models/models';
 
 @Injectable({
     providedIn: 'root'
@@ -19,11 +19,28 @@ export class AdminApiService {
         });
     }
 
+    private pageParams(limit: number, cursor?: string | null): HttpParams {
+        let params = new HttpParams().set('limit', limit);
+        if (cursor) {
+            params = params.set('cursor', cursor);
+        }
+        return params;
+    }
+
     // Auth
     login(email: string, password: string): Observable<LoginResponse> {
         return this.http.post<LoginResponse>(`${this.apiUrl}/auth/login`, { email, password });
     }
 
+    refresh(refreshToken: string): Observable<LoginResponse> {
+        const headers = new HttpHeaders({ 'Authorization': `Bearer ${refreshToken}` });
+        return this.http.post<LoginResponse>(`${this.apiUrl}/auth/refresh`, {}, { headers });
+    }
+
+    logout(refreshToken: string | null): Observable<any> {
+        return this.http.post(`${this.apiUrl}/auth/logout`, { refresh_token: refreshToken }, { headers: this.getHeaders() });
+    }
+
     // Stats
     getStats(): Observable<Stats> {
         return this.http.get<Stats>(`${this.apiUrl}/stats`, { headers: this.getHeaders() });
@@ -85,6 +102,12 @@ export class AdminApiService {
         return this.http.get<Booking[]>(`${this.apiUrl}/bookings`, { headers: this.getHeaders() });
     }
 
+    getBookingsPage(limit: number, cursor?: string | null): Observable<Page<Booking>> {
+        return this.http.get<Page<Booking>>(`${this.apiUrl}/bookings`,
+            { headers: this.getHeaders(), params: this.pageParams(limit, cursor) }
+        );
+    }
+
     approveBooking(id: number, comments: string): Observable<any> {
         return this.http.put(`${this.apiUrl}/bookings/${id}/approve`,
             { admin_comments: comments },
@@ -99,8 +122,18 @@ export class AdminApiService {
         );
     }
 
+    processBookingBatch(decisions: { booking_id: number; decision: 'approve' | 'reject'; comments?: string }[]): Observable<any> {
+        return this.http.post(`${this.apiUrl}/bookings/batch`, { decisions }, { headers: this.getHeaders() });
+    }
+
     // Leases
     getLeases(): Observable<Lease[]> {
         return this.http.get<Lease[]>(`${this.apiUrl}/leases`, { headers: this.getHeaders() });
     }
+
+    getLeasesPage(limit: number, cursor?: string | null): Observable<Page<Lease>> {
+        return this.http.get<Page<Lease>>(`${this.apiUrl}/leases`,
+            { headers: this.getHeaders(), params: this.pageParams(limit, cursor) }
+        );
+    }
 }
@@ -3,7 +3,10 @@ import { Router } from '@angular/router';
 import { BehaviorSubject, Observable } from 'rxjs';
 import { tap } from 'rxjs/operators';
 import { AdminApiService } from './admin-api.service';
-import { AdminUser } from '../models/models';
+import { AdminUser, LoginResponse } from '../models/models';
+
+// Renew the access token this long before it expires
+const REFRESH_MARGIN_MS = 60 * 1000;
 
 @Injectable({
     providedIn: 'root'
@@ -11,11 +14,14 @@ import { AdminUser } from '../models/models';
 export class AdminAuthService {
     private currentUserSubject = new BehaviorSubject<AdminUser | null>(this.getUserFromStorage());
     public currentUser$ = this.currentUserSubject.asObservable();
+    private refreshTimer: ReturnType<typeof setTimeout> | null = null;
 
     constructor(
         private apiService: AdminApiService,
         private router: Router
-    ) { }
+    ) {
+        this.scheduleRefresh();
+    }
 
     private getUserFromStorage(): AdminUser | null {
         const userStr = localStorage.getItem('adminUser');
@@ -28,16 +34,15 @@ export class AdminAuthService {
 
     get isAuthenticated(): boolean {
         const user = this.currentUserValue;
-        return !!localStorage.getItem('adminToken') && user?.role === 'admin';
+        const hasToken = !!localStorage.getItem('adminToken') || !!localStorage.getItem('adminRefreshToken');
+        return hasToken && user?.role === 'admin';
     }
 
     login(email: string, password: string): Observable<any> {
         return this.apiService.login(email, password).pipe(
             tap(response => {
                 if (response.user.role === 'admin') {
-                    localStorage.setItem('adminToken', response.access_token);
-                    localStorage.setItem('adminUser', JSON.stringify(response.user));
-                    this.currentUserSubject.next(response.user);
+                    this.storeSession(response);
                 } else {
                     throw new Error('Not an admin user');
                 }
@@ -46,9 +51,65 @@ export class AdminAuthService {
     }
 
     logout(): void {
+        if (localStorage.getItem('adminToken')) {
+            this.apiService.logout(localStorage.getItem('adminRefreshToken')).subscribe({ error: () => { } });
+        }
+        this.clearSession();
+        this.router.navigate(['/login']);
+    }
+
+    private storeSession(response: LoginResponse): void {
+        localStorage.setItem('adminToken', response.access_token);
+        localStorage.setItem('adminRefreshToken', response.refresh_token);
+        localStorage.setItem('adminUser', JSON.stringify(response.user));
+        this.currentUserSubject.next(response.user);
+        this.scheduleRefresh();
+    }
+
+    private clearSession(): void {
+        if (this.refreshTimer) {
+            clearTimeout(this.refreshTimer);
+            this.refreshTimer = null;
+        }
         localStorage.removeItem('adminToken');
+        localStorage.removeItem('adminRefreshToken');
         localStorage.removeItem('adminUser');
         this.currentUserSubject.next(null);
-        this.router.navigate(['/login']);
+    }
+
+    // Trade the refresh token for a new pair shortly before the access token
+    // expires, so the password is only needed when the refresh token is gone
+    private scheduleRefresh(): void {
+        if (this.refreshTimer) {
+            clearTimeout(this.refreshTimer);
+        }
+        const refreshToken = localStorage.getItem('adminRefreshToken');
+        if (!refreshToken) {
+            return;
+        }
+        const delay = Math.max(tokenExpiry(localStorage.getItem('adminToken')) - Date.now() - REFRESH_MARGIN_MS, 0);
+        this.refreshTimer = setTimeout(() => {
+            this.apiService.refresh(refreshToken).subscribe({
+                next: response => {
+                    if (response.user.role === 'admin') {
+                        this.storeSession(response);
+                    } else {
+                        this.logout();
+                    }
+                },
+                error: () => {
+                    this.clearSession();
+                    this.router.navigate(['/login']);
+                }
+            });
+        }, delay);
+    }
+}
+
+function tokenExpiry(token: string | null): number {
+    try {
+        return JSON.parse(atob(token!.split('.')[1])).exp * 1000;
+    } catch {
+        return 0;
     }
 }
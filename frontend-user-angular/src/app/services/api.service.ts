@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
-import { HttpClient, HttpHeaders } from '@angular/common/http';
+import { HttpClient, HttpHeaders, HttpParams } from '@angular/common/http';
 import { Observable } from 'rxjs';
-import { User, Tower, Unit, Amenity, Booking, LoginResponse } from '../models/models';
+import { User, Tower, Unit, Amenity, Booking, LoginResponse, Page } from '../models/models';
 
 @Injectable({
     providedIn: 'root'
@@ -28,6 +28,15 @@ export class ApiService {
         return this.http.post<LoginResponse>(`${this.apiUrl}/auth/register`, { name, email, phone, password });
     }
 
+    refresh(refreshToken: string): Observable<LoginResponse> {
+        const headers = new HttpHeaders({ 'Authorization': `Bearer ${refreshToken}` });
+        return this.http.post<LoginResponse>(`${this.apiUrl}/auth/refresh`, {}, { headers });
+    }
+
+    logout(refreshToken: string | null): Observable<any> {
+        return this.http.post(`${this.apiUrl}/auth/logout`, { refresh_token: refreshToken }, { headers: this.getHeaders() });
+    }
+
     // Tower endpoints
     getTowers(): Observable<Tower[]> {
         return this.http.get<Tower[]>(`${this.apiUrl}/towers`);
@@ -43,6 +52,25 @@ export class ApiService {
         return this.http.get<Unit[]>(url);
     }
 
+    getUnitsPage(limit: number, cursor?: string | null, towerId?: number): Observable<Page<Unit>> {
+        let params = new HttpParams().set('limit', limit);
+        if (cursor) {
+            params = params.set('cursor', cursor);
+        }
+        if (towerId) {
+            params = params.set('tower_id', towerId);
+        }
+        return this.http.get<Page<Unit>>(`${this.apiUrl}/units`, { params });
+    }
+
+    searchUnits(filters: Record<string, string | number>): Observable<Unit[]> {
+        let params = new HttpParams();
+        for (const [key, value] of Object.entries(filters)) {
+            params = params.set(key, value);
+        }
+        return this.http.get<Unit[]>(`${this.apiUrl}/units/search`, { params });
+    }
+
     getUnit(id: number): Observable<Unit> {
         return this.http.get<Unit>(`${this.apiUrl}/units/${id}`);
     }
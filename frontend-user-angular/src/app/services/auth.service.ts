@@ -3,7 +3,10 @@ import { Router } from '@angular/router';
 import { BehaviorSubject, Observable } from 'rxjs';
 import { tap } from 'rxjs/operators';
 import { ApiService } from './api.service';
-import { User } from '../models/models';
+import { User, LoginResponse } from '../models/models';
+
+// Renew the access token this long before it expires
+const REFRESH_MARGIN_MS = 60 * 1000;
 
 @Injectable({
     providedIn: 'root'
@@ -11,11 +14,14 @@ import { User } from '../models/models';
 export class AuthService {
     private currentUserSubject = new BehaviorSubject<User | null>(this.getUserFromStorage());
     public currentUser$ = this.currentUserSubject.asObservable();
+    private refreshTimer: ReturnType<typeof setTimeout> | null = null;
 
     constructor(
         private apiService: ApiService,
         private router: Router
-    ) { }
+    ) {
+        this.scheduleRefresh();
+    }
 
     private getUserFromStorage(): User | null {
         const userStr = localStorage.getItem('user');
@@ -27,33 +33,75 @@ export class AuthService {
     }
 
     get isAuthenticated(): boolean {
-        return !!localStorage.getItem('token');
+        return !!localStorage.getItem('token') || !!localStorage.getItem('refreshToken');
     }
 
     login(email: string, password: string): Observable<any> {
         return this.apiService.login(email, password).pipe(
-            tap(response => {
-                localStorage.setItem('token', response.access_token);
-                localStorage.setItem('user', JSON.stringify(response.user));
-                this.currentUserSubject.next(response.user);
-            })
+            tap(response => this.storeSession(response))
         );
     }
 
     register(name: string, email: string, phone: string, password: string): Observable<any> {
         return this.apiService.register(name, email, phone, password).pipe(
-            tap(response => {
-                localStorage.setItem('token', response.access_token);
-                localStorage.setItem('user', JSON.stringify(response.user));
-                this.currentUserSubject.next(response.user);
-            })
+            tap(response => this.storeSession(response))
         );
     }
 
     logout(): void {
+        if (localStorage.getItem('token')) {
+            this.apiService.logout(localStorage.getItem('refreshToken')).subscribe({ error: () => { } });
+        }
+        this.clearSession();
+        this.router.navigate(['/login']);
+    }
+
+    private storeSession(response: LoginResponse): void {
+        localStorage.setItem('token', response.access_token);
+        localStorage.setItem('refreshToken', response.refresh_token);
+        localStorage.setItem('user', JSON.stringify(response.user));
+        this.currentUserSubject.next(response.user);
+        this.scheduleRefresh();
+    }
+
+    private clearSession(): void {
+        if (this.refreshTimer) {
+            clearTimeout(this.refreshTimer);
+            this.refreshTimer = null;
+        }
         localStorage.removeItem('token');
+        localStorage.removeItem('refreshToken');
         localStorage.removeItem('user');
         this.currentUserSubject.next(null);
-        this.router.navigate(['/login']);
+    }
+
+    // Trade the refresh token for a new pair shortly before the access token
+    // expires, so the password is only needed when the refresh token is gone
+    private scheduleRefresh(): void {
+        if (this.refreshTimer) {
+            clearTimeout(this.refreshTimer);
+        }
+        const refreshToken = localStorage.getItem('refreshToken');
+        if (!refreshToken) {
+            return;
+        }
+        const delay = Math.max(tokenExpiry(localStorage.getItem('token')) - Date.now() - REFRESH_MARGIN_MS, 0);
+        this.refreshTimer = setTimeout(() => {
+            this.apiService.refresh(refreshToken).subscribe({
+                next: response => this.storeSession(response),
+                error: () => {
+                    this.clearSession();
+                    this.router.navigate(['/login']);
+                }
+            });
+        }, delay);
+    }
+}
+
+function tokenExpiry(token: string | null): number {
+    try {
+        return JSON.parse(atob(token!.split('.')[1])).exp * 1000;
+    } catch {
+        return 0;
     }
 }